@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks for converting BEL graphs to KEEN triples.
+
+Run with:
+
+.. code-block:: sh
+
+    $ python benchmarks/benchmark.py --size 1000 --size 10000 --output results.json
+
+Each benchmark runs on a synthetic BEL graph from :func:`biokeen.testing.generate_bel_graph`, so results from different
+commits can be compared as long as the same sizes and seed are used. The results are written as JSON with the best and
+mean time of each benchmark and the number of edges converted per second.
+"""
+
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+
+import click
+
+import biokeen
+from biokeen.constants import VERSION, biokeen_config
+from biokeen.content import handle_bio2bel
+from biokeen.convert import get_pykeen_summary, get_triple, to_pykeen_df, to_pykeen_path, to_pykeen_triples
+from biokeen.graph_cache import get_graph_cache_path, to_graph_cache_path
+from biokeen.testing import generate_bel_graph
+from pybel import BELGraph
+
+#: The name of the fake Bio2BEL database used to benchmark :func:`biokeen.content.handle_bio2bel`
+_NAME = 'benchmark'
+
+
+def time_function(func: Callable[[], Any], repeats: int, setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    """Time a function several times, running the setup before each time without timing it."""
+    times = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_benchmarks(graph: BELGraph, repeats: int, directory: str) -> Dict[str, List[float]]:
+    """Run each benchmark on the graph and return the times."""
+    df = to_pykeen_df(graph, use_tqdm=False)
+    edges = list(graph.edges(keys=True))
+    path = os.path.join(directory, 'graph.keen.tsv')
+
+    rv = {
+        'get_triple': time_function(lambda: [get_triple(graph, u, v, key) for u, v, key in edges], repeats),
+        'to_pykeen_df': time_function(lambda: to_pykeen_df(graph, use_tqdm=False), repeats),
+        'to_pykeen_triples': time_function(lambda: to_pykeen_triples(graph, use_tqdm=False), repeats),
+        'to_pykeen_path': time_function(lambda: to_pykeen_path(df, path), repeats),
+        'get_pykeen_summary': time_function(lambda: get_pykeen_summary(df), repeats),
+    }
+
+    # handle_bio2bel on a database whose BEL graph is cached, but that isn't converted yet
+    data_directory = os.path.join(directory, 'data')
+    os.makedirs(data_directory)
+    graph_path = get_graph_cache_path(data_directory, _NAME, biokeen_config.bel_cache_format)
+    to_graph_cache_path(graph, graph_path, biokeen_config.bel_cache_format)
+
+    def _reset():
+        for file_name in os.listdir(data_directory):
+            if file_name != os.path.basename(graph_path):
+                os.remove(os.path.join(data_directory, file_name))
+
+    with mock.patch.object(biokeen_config, 'data_directory', data_directory):
+        rv['handle_bio2bel'] = time_function(lambda: handle_bio2bel(_NAME), repeats, setup=_reset)
+        rv['handle_bio2bel (cached)'] = time_function(lambda: handle_bio2bel(_NAME), repeats)
+
+    return rv
+
+
+def get_git_commit() -> Optional[str]:
+    """Get the commit of the BioKEEN checkout, if it is one."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(biokeen.__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@click.command()
+@click.option('-n', '--size', 'sizes', type=int, multiple=True, help='Number of edges. Can be given several times.')
+@click.option('-r', '--repeats', type=int, default=3, show_default=True)
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('-o', '--output', type=click.File('w'), default=sys.stdout, help='Where the JSON results are written.')
+def main(sizes: List[int], repeats: int, seed: int, output):
+    """Benchmark BioKEEN's conversion of BEL graphs."""
+    logging.getLogger('biokeen').setLevel(logging.ERROR)
+
+    results = []
+    for size in sizes or (1000, 10000):
+        graph = generate_bel_graph(size, seed=seed)
+        number_edges = graph.number_of_edges()
+        click.echo(f'{size} edges ({graph.number_of_nodes()} nodes / {number_edges} edges)', err=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            times = run_benchmarks(graph, repeats, directory)
+
+        for name, values in times.items():
+            best = min(values)
+            results.append({
+                'benchmark': name,
+                'size': size,
+                'nodes': graph.number_of_nodes(),
+                'edges': number_edges,
+                'times': values,
+                'best': best,
+                'mean': sum(values) / len(values),
+                'edges_per_second': number_edges / best if best else None,
+            })
+            click.echo(f'  {name:<25} {best:10.4f}s  {number_edges / best if best else 0:12.0f} edges/s', err=True)
+
+    json.dump(
+        {
+            'biokeen_version': VERSION,
+            'commit': get_git_commit(),
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'repeats': repeats,
+            'results': results,
+        },
+        output,
+        indent=2,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,21 @@
 # -*- coding: utf-8 -*-
 
-"""A package for training and evaluating knowledge graph embedding models on biological knowledge graphs."""
+"""A package for training and evaluating knowledge graph embedding models on biological knowledge graphs.
 
-from . import convert  # noqa: 401
+Subpackages like :mod:`biokeen.convert` pull in PyBEL, so they're only imported the first time they're used, like
+with ``biokeen.convert`` after ``import biokeen``. This relies on a module ``__getattr__`` (:pep:`562`), which is why
+BioKEEN needs Python 3.7.
+"""
+
+import importlib
+from typing import Any
+
+#: The subpackages that are imported the first time they're used as attributes of the package
+_LAZY_SUBPACKAGES = {'convert'}
+
+
+def __getattr__(name: str) -> Any:
+    """Import a subpackage the first time it's used."""
+    if name in _LAZY_SUBPACKAGES:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
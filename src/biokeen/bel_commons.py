@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+"""Cached acquisition of networks from `BEL Commons <https://bel-commons.scai.fraunhofer.de>`_.
+
+Each network is cached in the ``bel_commons`` folder of the data directory, in a subfolder for its host:
+
+- ``<network_id>.bel.json`` is the Node-Link JSON that was downloaded
+- ``<network_id>.http.json`` records the validators sent by the server (``ETag`` and ``Last-Modified``) and the
+  converters that produced the KEEN TSV
+- ``<network_id>.keen.tsv`` is the converted network
+
+Every time a network is requested, the server is asked whether it changed since it was downloaded. It is only
+downloaded and converted again if it did. If the server can't be reached or doesn't respond within
+``bel_commons_timeout`` seconds, the cache is used as it is.
+"""
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
+
+import requests
+
+from pybel import from_json
+from pybel.config import config as pybel_config
+from pybel.constants import DEFAULT_SERVICE_URL, PYBEL_REMOTE_HOST
+from pybel.io.web import GET_ENDPOINT
+from .constants import EMOJI, biokeen_config
+from .convert import to_pykeen_path, to_pykeen_sidecar_path, to_pykeen_triples
+from .convert.dispatch import default_dispatcher
+from .locking import FileLock, atomic_path
+
+__all__ = [
+    'get_bel_commons_host',
+    'get_bel_commons_directory',
+    'ensure_bel_commons_network',
+    'ensure_bel_commons_networks',
+]
+
+logger = logging.getLogger(__name__)
+
+NetworkId = Union[int, str]
+
+
+def get_bel_commons_host(host: Optional[str] = None) -> str:
+    """Get the BEL Commons host, falling back to the same configuration as :func:`pybel.from_web`."""
+    return host or pybel_config.get(PYBEL_REMOTE_HOST) or os.environ.get(PYBEL_REMOTE_HOST) or DEFAULT_SERVICE_URL
+
+
+def get_bel_commons_directory(host: Optional[str] = None) -> str:
+    """Get the directory in which networks from the given BEL Commons host are cached."""
+    host = get_bel_commons_host(host)
+    slug = re.sub(r'[^\w.-]+', '_', re.sub(r'^\w+://', '', host).rstrip('/'))
+    directory = os.path.join(biokeen_config.data_directory, 'bel_commons', slug)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def ensure_bel_commons_network(network_id: NetworkId, host: Optional[str] = None,
+                               session: Optional[requests.Session] = None) -> Optional[str]:
+    """Download and convert a network from BEL Commons, unless an up-to-date copy is cached.
+
+    :param network_id: The network identifier in BEL Commons
+    :param host: The host for BEL Commons. Defaults to the Fraunhofer SCAI public instance.
+    :param session: An optional session, to reuse connections across requests
+    :return: The path to the KEEN TSV, or None if the network produced no triples
+
+    Processes that share the data directory hold a lock while they fetch the same network, so it's only fetched once.
+    """
+    network_id = int(network_id)
+    host = get_bel_commons_host(host)
+    directory = get_bel_commons_directory(host)
+    lock = FileLock(os.path.join(directory, f'{network_id}.lock'), stale_after=biokeen_config.lock_stale_timeout)
+    with lock:
+        return _ensure_bel_commons_network(network_id, host, directory, session=session)
+
+
+def _ensure_bel_commons_network(network_id: int, host: str, directory: str,
+                                session: Optional[requests.Session] = None) -> Optional[str]:
+    json_path = os.path.join(directory, f'{network_id}.bel.json')
+    meta_path = os.path.join(directory, f'{network_id}.http.json')
+    pykeen_df_path = os.path.join(directory, f'{network_id}.{biokeen_config.keen_tsv_ext}')
+
+    meta = _read_meta(meta_path) if os.path.exists(json_path) else {}
+    url = host.rstrip('/') + GET_ENDPOINT.format(network_id)
+
+    try:
+        res = (session or requests).get(
+            url, headers=_get_conditional_headers(meta), timeout=biokeen_config.bel_commons_timeout,
+        )
+        res.raise_for_status()
+    except requests.RequestException:  # including timeouts, since the lock is held while waiting
+        if not meta:
+            raise
+        logger.warning(f'{EMOJI} could not revalidate {url}, using the cached network')
+    else:
+        if res.status_code != 304:
+            logger.info(f'{EMOJI} downloaded {url}')
+            with atomic_path(json_path) as temporary_path, open(temporary_path, 'wb') as file:
+                file.write(res.content)
+            meta = {
+                'url': url,
+                'etag': res.headers.get('ETag'),
+                'last_modified': res.headers.get('Last-Modified'),
+            }
+        else:
+            logger.debug(f'{EMOJI} {url} has not been modified')
+
+    converters = default_dispatcher.get_fingerprint()
+    if meta.get('converters') != converters or (not meta.get('empty') and not os.path.exists(pykeen_df_path)):
+        _convert_network(json_path, pykeen_df_path)
+        meta['converters'] = converters
+        meta['empty'] = not os.path.exists(pykeen_df_path)
+        with atomic_path(meta_path) as temporary_path, open(temporary_path, 'w') as file:
+            json.dump(meta, file, indent=2)
+
+    if os.path.exists(pykeen_df_path):
+        return pykeen_df_path
+
+
+def ensure_bel_commons_networks(network_ids: Iterable[NetworkId], host: Optional[str] = None,
+                                n_workers: int = 4) -> Dict[int, Optional[str]]:
+    """Download and convert several networks from BEL Commons concurrently.
+
+    :param network_ids: The network identifiers in BEL Commons
+    :param host: The host for BEL Commons. Defaults to the Fraunhofer SCAI public instance.
+    :param n_workers: The number of networks that are fetched at the same time
+    :return: A dictionary from network identifiers to the paths of their KEEN TSVs
+
+    All networks are fetched over a shared session so connections to the host are reused.
+    """
+    network_ids = sorted({int(network_id) for network_id in network_ids})
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=n_workers) as executor:
+        paths = executor.map(lambda network_id: ensure_bel_commons_network(network_id, host, session), network_ids)
+        return dict(zip(network_ids, paths))
+
+
+def _read_meta(path: str) -> Dict[str, Any]:
+    """Read the metadata of a cached network, or return empty metadata if it does not exist or can't be read."""
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        logger.warning(f'{EMOJI} could not read cached network metadata: {path}')
+        return {}
+
+
+def _get_conditional_headers(meta: Mapping[str, Any]) -> Dict[str, str]:
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+
+def _convert_network(json_path: str, pykeen_df_path: str) -> None:
+    with open(json_path) as file:
+        graph = from_json(json.load(file))
+
+    triples = to_pykeen_triples(graph, use_tqdm=False)
+    if to_pykeen_path(triples, pykeen_df_path):
+        to_pykeen_sidecar_path(pykeen_df_path, triples)
+    elif os.path.exists(pykeen_df_path):
+        os.remove(pykeen_df_path)
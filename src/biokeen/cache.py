@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+"""Bookkeeping for the databases cached in the BioKEEN data directory.
+
+Each database gets a build manifest, ``<name>.manifest.json``, that records for every build stage the inputs that
+went into it. A stage only needs to be rerun when its recorded inputs differ from the current ones.
+
+- The ``bel`` stage populates the Bio2BEL database and caches its BEL graph. Its inputs are the Bio2BEL module and its
+  version.
+- The ``keen`` stage converts the cached BEL graph to a KEEN TSV. Its inputs are the hash of the cached BEL graph and
+  the versions of BioKEEN, PyBEL, and the converters.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Mapping, Optional
+
+import pkg_resources
+
+from .constants import EMOJI
+from .locking import atomic_path
+from .paths import get_database_file_path
+
+__all__ = [
+    'get_manifest_path',
+    'read_manifest',
+    'write_manifest',
+    'is_stage_fresh',
+    'get_distribution_version',
+    'get_file_fingerprint',
+    'refresh_file_fingerprint',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The number of bytes read at once when hashing a file
+_CHUNK_SIZE = 2 ** 20
+
+
+def get_manifest_path(directory: str, name: str) -> str:
+    """Get the path of the build manifest for the given database."""
+    return get_database_file_path(directory, name, 'manifest')
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """Read a build manifest, or return an empty one if it does not exist or can't be read."""
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        logger.warning(f'{EMOJI} could not read build manifest: {path}')
+        return {}
+
+
+def write_manifest(manifest: Mapping[str, Any], path: str) -> None:
+    """Write a build manifest."""
+    with atomic_path(path) as temporary_path, open(temporary_path, 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+
+
+def is_stage_fresh(manifest: Mapping[str, Any], stage: str, inputs: Mapping[str, Any]) -> bool:
+    """Check if the given stage in the manifest was built from the given inputs."""
+    return manifest.get(stage, {}).get('inputs') == inputs
+
+
+def get_distribution_version(name: str) -> Optional[str]:
+    """Get the version of the installed distribution with the given name, or None if it isn't installed."""
+    try:
+        return pkg_resources.get_distribution(name).version
+    except pkg_resources.DistributionNotFound:
+        return None
+
+
+def get_file_fingerprint(path: str) -> Dict[str, Any]:
+    """Get the size, modification time, and SHA-256 hash of a file."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            sha.update(chunk)
+
+    stat = os.stat(path)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': sha.hexdigest(),
+    }
+
+
+def refresh_file_fingerprint(path: str, fingerprint: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """Get the fingerprint of a file, only rehashing it if its size or modification time changed."""
+    if fingerprint is not None:
+        stat = os.stat(path)
+        if fingerprint.get('size') == stat.st_size and fingerprint.get('mtime_ns') == stat.st_mtime_ns:
+            return dict(fingerprint)
+
+    return get_file_fingerprint(path)
@@ -14,20 +14,27 @@ later, but that will cause problems--the code will get executed twice:
 import json
 import logging
 import os
+import shutil
 from typing import List, Optional, TextIO
 
 import click
 from click_default_group import DefaultGroup
 
-from bio2bel.constants import get_global_connection
 from biokeen.constants import EMOJI, VERSION, biokeen_config
-from pykeen.constants import VERSION as PYKEEN_VERSION
+
+# Bio2BEL, PyBEL, and PyKEEN are only imported by the commands that need them, so the CLI starts quickly
+
+
+def _get_global_connection() -> str:
+    from bio2bel.constants import get_global_connection
+    return get_global_connection()
+
 
 connection_option = click.option(
     '-c',
     '--connection',
-    default=get_global_connection(),
-    show_default=True,
+    default=_get_global_connection,
+    show_default='the global Bio2BEL connection',
     help='Bio2BEL database connection string',
 )
 
@@ -43,9 +50,12 @@ def main():  # noqa: D401
 @click.option('-f', '--config', type=click.File())
 @click.option('-r', '--rebuild', is_flag=True)
 @click.option('-x', '--no-prompt-bio2bel', is_flag=True)
-def start(config: Optional[TextIO], connection: str, rebuild: bool, no_prompt_bio2bel: bool):
+@click.option('-w', '--workers', type=int, default=1, show_default=True,
+              help='Number of databases acquired at the same time. Use 0 for all cores.')
+def start(config: Optional[TextIO], connection: str, rebuild: bool, no_prompt_bio2bel: bool, workers: int):
     """Start the BioKEEN training pipeline."""
     import pykeen
+    from pykeen.constants import VERSION as PYKEEN_VERSION
 
     if config is not None:
         config = json.load(config)
@@ -55,6 +65,7 @@ def start(config: Optional[TextIO], connection: str, rebuild: bool, no_prompt_bi
             connection=connection,
             rebuild=rebuild,
             do_prompt_bio2bel=(not no_prompt_bio2bel),
+            n_workers=workers,
         )
 
     config['pykeen-version'] = PYKEEN_VERSION
@@ -76,38 +87,222 @@ def data():
     """Commands for data acquisition."""
 
 
-@data.command(help=f'Data stored in {biokeen_config.data_directory}')
-def ls():
-    """List built data."""
-    for path in biokeen_config.iterate_source_paths():
-        click.echo(path)
+@data.command()
+@click.option('--rescan', is_flag=True, help='Rebuild the index by scanning the data directory.')
+@click.option('--paths', is_flag=True, help='Only list the paths of the KEEN TSVs.')
+def ls(rescan: bool, paths: bool):
+    """List built data in the data directory."""
+    from biokeen.index import read_index, rebuild_index
+
+    databases = None if rescan else read_index()
+    if databases is None:
+        databases = rebuild_index()
+
+    if paths:
+        for _, entry in sorted(databases.items()):
+            click.echo(os.path.join(biokeen_config.data_directory, entry['path']))
+        return
+
+    rows = [('name', 'triples', 'entities', 'relations', 'size', 'built', 'files')]
+    for name, entry in sorted(databases.items()):
+        rows.append((
+            name,
+            _format_count(entry['triples']),
+            _format_count(entry['entities']),
+            _format_count(entry['relations']),
+            _format_size(sum(file['size'] for file in entry['files'].values())),
+            entry['built'][:len('YYYY-MM-DD HH:MM')].replace('T', ' '),
+            ', '.join(sorted(entry['files'])),
+        ))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        click.echo('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+
+def _format_count(count: Optional[int]) -> str:
+    return '?' if count is None else f'{count:,}'
+
+
+def _format_size(size: int) -> str:
+    for unit in ('B', 'kB', 'MB', 'GB'):
+        if size < 1000 or unit == 'GB':
+            break
+        size /= 1000
+    return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
 
 
 @data.command()
 @click.confirmation_option()
 def clear():
     """Remove all built data."""
-    for path in biokeen_config.iterate_source_paths():
-        os.remove(path)
+    from biokeen.content import get_database_lock
+    from biokeen.index import get_database_files, update_index
+    from biokeen.merge import get_merged_directory
+    from biokeen.splits import get_split_directory
+
+    names = []
+    for path in list(biokeen_config.iterate_source_paths()):
+        name = os.path.basename(path)[:-len(f'.{biokeen_config.keen_tsv_ext}')]
+        # a database that's being built is only removed once it's written
+        with get_database_lock(name):
+            for database_path in get_database_files(name).values():
+                os.remove(database_path)
+        names.append(name)
+
+    # the splits and merged stores are made from the KEEN TSVs, so they're removed with them
+    for directory in (get_split_directory(), get_merged_directory()):
+        shutil.rmtree(directory)
+
+    # the entries of the databases whose KEEN TSVs are gone are removed
+    update_index(names)
 
 
 @data.command()
 @click.argument('names', nargs=-1)
 @connection_option
 @click.option('-r', '--rebuild', is_flag=True)
+@click.option('-j', '--jobs', type=int, default=1, show_default=True,
+              help='Number of processes used for conversion. Use 0 for all cores.')
+@click.option('-w', '--workers', type=int, default=1, show_default=True,
+              help='Number of databases acquired at the same time. Use 0 for all cores.')
+@click.option('-s', '--stream', is_flag=True, help='Stream triples to the TSV to limit memory usage.')
+@click.option('-i', '--incremental', is_flag=True, help='Only convert edges that changed since the last conversion.')
+@click.option('-e', '--external-sort', is_flag=True,
+              help='Sort triples on disk to limit memory usage. The limit is set by sort_memory_limit.')
+@click.option('--stats', is_flag=True, help='Write statistics about the converters next to the summary.')
+@click.option('-p', '--pipeline', is_flag=True,
+              help='Overlap independent stages, like caching the BEL graph while converting it.')
+@click.option('--columnar', type=click.Choice(['parquet', 'feather']),
+              help='Also write a compressed, dictionary-encoded columnar file next to each TSV. Needs pyarrow.')
+@click.option('--namespace', 'namespaces', multiple=True, help='Only keep triples between entities in this namespace.')
+@click.option('--exclude-namespace', 'exclude_namespaces', multiple=True,
+              help='Drop triples with an entity in this namespace.')
+@click.option('--relation', 'relations', multiple=True, help='Only keep triples with this relation.')
+@click.option('--exclude-relation', 'exclude_relations', multiple=True, help='Drop triples with this relation.')
+@click.option('--converter', 'converters', multiple=True, help='Only use this converter.')
+@click.option('--exclude-converter', 'exclude_converters', multiple=True, help="Don't use this converter.")
+@click.option('--k-core', type=int, default=0,
+              help='Prune entities in fewer than this many triples until none are left. Not with -s or -e.')
 @click.option('-v', '--verbose', count=True)
-def get(names: List[str], connection: str, rebuild: bool, verbose: bool):
+def get(names: List[str], connection: str, rebuild: bool, jobs: int, workers: int, stream: bool, incremental: bool,
+        external_sort: bool, stats: bool, pipeline: bool, columnar: Optional[str], namespaces: List[str],
+        exclude_namespaces: List[str], relations: List[str], exclude_relations: List[str], converters: List[str],
+        exclude_converters: List[str], k_core: int, verbose: bool):
     """Install, populate, and build Bio2BEL repository."""
     if verbose == 1:
         logging.basicConfig(level=logging.INFO)
     elif verbose == 2:
         logging.basicConfig(level=logging.DEBUG)
 
-    from biokeen.content import install_bio2bel_module
+    from biokeen.content import iterate_install_bio2bel_modules
+
+    triple_filter = _get_triple_filter(
+        namespaces=namespaces,
+        exclude_namespaces=exclude_namespaces,
+        relations=relations,
+        exclude_relations=exclude_relations,
+        converters=converters,
+        exclude_converters=exclude_converters,
+        k_core=k_core,
+    )
+    _check_get_options(triple_filter, incremental=incremental, stream=stream, external_sort=external_sort,
+                       columnar=columnar)
 
     for name in names:
         click.secho(f'{EMOJI} Getting {name}', fg='cyan')
-        install_bio2bel_module(name, connection, rebuild)
+
+    results = iterate_install_bio2bel_modules(
+        names,
+        n_workers=workers,
+        connection=connection,
+        rebuild=rebuild,
+        n_jobs=jobs,
+        stream=stream,
+        incremental=incremental,
+        instrument=stats,
+        external_sort=external_sort,
+        pipeline=pipeline,
+        columnar=columnar,
+        triple_filter=triple_filter,
+    )
+
+    failures = 0
+    for result in results:
+        if result.error is None:
+            click.secho(f'{EMOJI} {result.name} done in {result.duration:.2f}s: {result.path}', fg='green')
+        else:
+            failures += 1
+            click.secho(f'{EMOJI} {result.name} failed after {result.duration:.2f}s: {result.error}', fg='red')
+
+    if failures:
+        raise click.ClickException(f'{failures} of {len(names)} databases failed')
+
+
+def _check_get_options(triple_filter, incremental: bool, stream: bool, external_sort: bool,
+                       columnar: Optional[str]) -> None:
+    """Reject the options of ``get`` that can't be used together before any database is built."""
+    if incremental and triple_filter:
+        raise click.UsageError('filters can not be used with --incremental')
+    if columnar is not None and (stream or external_sort):
+        raise click.UsageError('--columnar can not be used with --stream or --external-sort')
+    if triple_filter and 1 < triple_filter.k_core and (stream or external_sort):
+        raise click.UsageError('--k-core can not be used with --stream or --external-sort')
+
+
+def _get_triple_filter(namespaces: List[str], exclude_namespaces: List[str], relations: List[str],
+                       exclude_relations: List[str], converters: List[str], exclude_converters: List[str], k_core: int):
+    """Get the filter from the options of ``get``, or none if nothing is filtered."""
+    from biokeen.convert.filters import TripleFilter
+
+    try:
+        triple_filter = TripleFilter(
+            namespaces=namespaces or None,
+            exclude_namespaces=exclude_namespaces,
+            relations=relations or None,
+            exclude_relations=exclude_relations,
+            converters=converters or None,
+            exclude_converters=exclude_converters,
+            k_core=k_core,
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--k-core')
+    return triple_filter or None
+
+
+@data.command()
+@click.argument('names', nargs=-1, required=True)
+@connection_option
+@click.option('-t', '--test-ratio', type=float, default=0.1, show_default=True,
+              help='Share of the triples of each relation held out for testing.')
+@click.option('--validation-ratio', type=float, default=0.0, show_default=True,
+              help='Share of the triples of each relation held out for validation.')
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('-v', '--verbose', count=True)
+def split(names: List[str], connection: str, test_ratio: float, validation_ratio: float, seed: int, verbose: int):
+    """Split databases into cached training, validation, and test sets."""
+    if verbose == 1:
+        logging.basicConfig(level=logging.INFO)
+    elif verbose == 2:
+        logging.basicConfig(level=logging.DEBUG)
+
+    from biokeen.content import install_bio2bel_module
+    from biokeen.splits import ensure_split_paths
+
+    paths = {}
+    for name in names:
+        path = install_bio2bel_module(name, connection=connection)
+        if path is None:
+            raise click.ClickException(f'{name} has no triples')
+        paths[name] = path
+
+    try:
+        split_paths = ensure_split_paths(paths, test_ratio=test_ratio, validation_ratio=validation_ratio, seed=seed)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    for name, path in split_paths.items():
+        click.echo(f'{name}\t{path}')
 
 
 if __name__ == '__main__':
@@ -11,18 +11,30 @@ import click
 
 from pykeen.cli.prompt import prompt_config
 from pykeen.cli.utils.cli_print_msg_helper import print_section_divider
-from pykeen.constants import TRAINING_SET_PATH
+from pykeen.constants import SEED, TEST_SET_PATH, TEST_SET_RATIO, TRAINING_SET_PATH
 from .messages import print_intro, print_welcome_message
-from ..constants import ID_TO_DATABASE_MAPPING
-from ..content import install_bio2bel_module
+from ..constants import EMOJI, ID_TO_DATABASE_MAPPING
+from ..content import iterate_install_bio2bel_modules
+from ..splits import TEST, TRAIN, ensure_split_paths
 
 __all__ = [
     'prompt_biokeen_config',
 ]
 
 
-def prompt_biokeen_config(*, connection: str, rebuild: bool, do_prompt_bio2bel: Optional[bool] = None) -> Dict:
-    """Configure experiments."""
+def prompt_biokeen_config(*, connection: str, rebuild: bool, do_prompt_bio2bel: Optional[bool] = None,
+                          n_workers: int = 1) -> Dict:
+    """Configure experiments.
+
+    :param connection: The Bio2BEL database connection
+    :param rebuild: Should the cached databases be rebuilt?
+    :param do_prompt_bio2bel: Should the user be asked to choose Bio2BEL databases? If None, asks the user first.
+    :param n_workers: The number of databases acquired at the same time
+
+    If BioKEEN's databases are used and a share of them is held out for testing, they're split once, with the chosen
+    seed, and the configuration points PyKEEN to the cached training and test sets, so PyKEEN doesn't split them on
+    every run. See :mod:`biokeen.splits`.
+    """
     config = OrderedDict()
 
     # Step 1: Welcome + Intro
@@ -37,20 +49,33 @@ def prompt_biokeen_config(*, connection: str, rebuild: bool, do_prompt_bio2bel:
         print_section_divider()
 
     do_prompt_training = True
+    installed_paths = {}
 
     if do_prompt_bio2bel:
         do_prompt_training = False
-        config[TRAINING_SET_PATH] = []
-        for name in select_bio2bel_repository():
-            try:
-                path = install_bio2bel_module(name=name, connection=connection, rebuild=rebuild)
-            except Exception:
-                click.secho(f'failed: {name}', fg='red')
+        names = list(select_bio2bel_repository())
+        results = iterate_install_bio2bel_modules(
+            names,
+            n_workers=n_workers,
+            connection=connection,
+            rebuild=rebuild,
+        )
+        for result in results:
+            if result.error is not None:
+                click.secho(f'failed: {result.name}: {result.error}', fg='red')
+            elif os.path.exists(result.path):
+                click.secho(f'done: {result.name}', fg='green')
+                installed_paths[result.name] = result.path
             else:
-                if os.path.exists(path):
-                    config[TRAINING_SET_PATH].append(f'bio2bel:{name}')
-                else:
-                    click.secho(f'failed: {name}: {path}', fg='red')
+                click.secho(f'failed: {result.name}: {result.path}', fg='red')
+
+        # keep the order of the selection, independent of which database finished first
+        installed_names = [name for name in names if name in installed_paths]
+        if 1 < len(installed_names):
+            # several databases are merged once, so the triples they share are deduplicated
+            config[TRAINING_SET_PATH] = f'bio2bel_merged:{",".join(installed_names)}'
+        else:
+            config[TRAINING_SET_PATH] = [f'bio2bel:{name}' for name in installed_names]
 
         # TODO replace this with less safe code that assumes everything installs no problemo
         """
@@ -62,12 +87,25 @@ def prompt_biokeen_config(*, connection: str, rebuild: bool, do_prompt_bio2bel:
 
     print_section_divider()
 
-    return prompt_config(
+    config = prompt_config(
         config=config,
         show_welcome=False,
         do_prompt_training=do_prompt_training,
     )
 
+    if installed_paths and TEST_SET_RATIO in config:
+        _use_split_paths(config, installed_paths)
+
+    return config
+
+
+def _use_split_paths(config: Dict, paths: Dict[str, str]) -> None:
+    """Replace the ratio of the test set with the paths of a cached split of the databases."""
+    split_paths = ensure_split_paths(paths, test_ratio=config.pop(TEST_SET_RATIO), seed=config.get(SEED, 0))
+    config[TRAINING_SET_PATH] = split_paths[TRAIN]
+    config[TEST_SET_PATH] = split_paths[TEST]
+    click.secho(f'{EMOJI} using split: {split_paths[TRAIN]}', fg='green')
+
 
 def select_bio2bel_repository() -> Iterable[str]:
     """Prompt the user for a Bio2BEL database."""
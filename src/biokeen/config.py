@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+"""Configuration for BioKEEN.
+
+Use the configuration through :data:`biokeen.constants.biokeen_config`, which only loads it when it's first used.
+"""
+
+import os
+from typing import Iterable
+
+import easy_config
+
+from .constants import HOME
+
+__all__ = [
+    'BiokeenConfig',
+]
+
+
+class BiokeenConfig(easy_config.EasyConfig):
+    """Configuration for BioKEEN."""
+
+    NAME = 'biokeen'
+    FILES = [
+        os.path.join(HOME, '.config', 'biokeen.cfg'),
+        os.path.join(HOME, '.config', 'config.ini'),
+    ]
+
+    #: the data directory where TSVs get exported
+    data_directory: str = os.path.abspath(os.path.join(HOME, '.keen', 'biokeen'))
+
+    #: The file extension of pre-processed Bio2BEL databases
+    keen_tsv_ext: str = 'keen.tsv'
+
+    #: The format in which BEL graphs are cached. See :mod:`biokeen.graph_cache`.
+    bel_cache_format: str = 'nodelink-lines-gz'
+
+    #: The approximate memory in bytes that triples may take up before they are spilled to disk when sorting them
+    #: externally. See :mod:`biokeen.convert.external`.
+    sort_memory_limit: int = 512 * 2 ** 20
+
+    #: The number of seconds after which the lock on a database that's being built is considered abandoned, if the
+    #: process holding it stops refreshing it. See :mod:`biokeen.locking`.
+    lock_stale_timeout: int = 300
+
+    #: The number of seconds to wait for BEL Commons to respond before the cached network is used instead. See
+    #: :mod:`biokeen.bel_commons`.
+    bel_commons_timeout: int = 30
+
+    def iterate_source_paths(self) -> Iterable[str]:
+        """Iterate over the source paths."""
+        for file_name in os.listdir(self.data_directory):
+            if file_name.endswith(self.keen_tsv_ext):
+                yield os.path.join(self.data_directory, file_name)
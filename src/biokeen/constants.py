@@ -1,40 +1,72 @@
 # -*- coding: utf-8 -*-
 
-"""Constants for BioKEEN."""
+"""Constants for BioKEEN.
+
+The configuration in :data:`biokeen_config` is only loaded, and its data directory only created, the first time one of
+its attributes is used, so importing BioKEEN stays cheap. See :class:`biokeen.config.BiokeenConfig` for its fields.
+"""
 
 import os
-from typing import Iterable
+from typing import Any, Dict, Optional, TYPE_CHECKING
 
-import easy_config
+if TYPE_CHECKING:
+    from .config import BiokeenConfig  # noqa: F401
 
 HERE = os.path.abspath(os.path.dirname(__file__))
 HOME = os.path.expanduser('~')
 
 
-class BiokeenConfig(easy_config.EasyConfig):
-    """Configuration for BioKEEN."""
+class _LazyBiokeenConfig:
+    """A proxy for the BioKEEN configuration that loads it the first time one of its attributes is used."""
+
+    __slots__ = ('_config',)
+
+    def __init__(self) -> None:
+        """Initialize the proxy without loading the configuration."""
+        object.__setattr__(self, '_config', None)
+
+    def _load(self) -> 'BiokeenConfig':
+        config: Optional['BiokeenConfig'] = object.__getattribute__(self, '_config')
+        if config is None:
+            from .config import BiokeenConfig
+            config = BiokeenConfig.load()
+            os.makedirs(config.data_directory, exist_ok=True)
+            object.__setattr__(self, '_config', config)
+        return config
+
+    @property
+    def __dict__(self) -> Dict[str, Any]:
+        """Get the attributes of the configuration, so :func:`unittest.mock.patch.object` can restore them."""
+        return self._load().__dict__
+
+    def __getattr__(self, name: str) -> Any:
+        """Get an attribute of the configuration."""
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set an attribute of the configuration."""
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        """Delete an attribute of the configuration."""
+        delattr(self._load(), name)
 
-    NAME = 'biokeen'
-    FILES = [
-        os.path.join(HOME, '.config', 'biokeen.cfg'),
-        os.path.join(HOME, '.config', 'config.ini'),
-    ]
+    def __repr__(self) -> str:
+        """Represent the configuration."""
+        return repr(self._load())
 
-    #: the data directory where TSVs get exported
-    data_directory: str = os.path.abspath(os.path.join(HOME, '.keen', 'biokeen'))
 
-    #: The file extension of pre-processed Bio2BEL databases
-    keen_tsv_ext: str = 'keen.tsv'
+#: The BioKEEN configuration, loaded when it's first used
+biokeen_config = _LazyBiokeenConfig()
 
-    def iterate_source_paths(self) -> Iterable[str]:
-        """Iterate over the source paths."""
-        for file_name in os.listdir(self.data_directory):
-            if file_name.endswith(self.keen_tsv_ext):
-                yield os.path.join(self.data_directory, file_name)
 
+def __getattr__(name: str) -> Any:
+    """Get :class:`biokeen.config.BiokeenConfig`, which used to be defined here, without importing it up front."""
+    if name == 'BiokeenConfig':
+        from .config import BiokeenConfig
+        return BiokeenConfig
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-biokeen_config = BiokeenConfig.load()
-os.makedirs(biokeen_config.data_directory, exist_ok=True)
 
 VERSION = '0.0.15-dev'
 EMOJI = '🍩'
@@ -6,17 +6,41 @@ import importlib
 import logging
 import os
 import sys
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from contextlib import redirect_stdout
-from typing import Optional, Union
+from typing import Any, Dict, Iterable, Mapping, NamedTuple, Optional, Union
 
 import numpy as np
 import pkg_resources
 
 from bio2bel import AbstractManager
 from bio2bel.manager.bel_manager import BELManagerMixin
-from pybel import from_json_path, from_web, to_json_path
-from .constants import EMOJI, biokeen_config
-from .convert import to_pykeen_df, to_pykeen_path, to_pykeen_summary_path
+from pybel import BELGraph
+from .bel_commons import ensure_bel_commons_network
+from .cache import (
+    get_distribution_version, get_manifest_path, is_stage_fresh, read_manifest,
+    refresh_file_fingerprint, write_manifest,
+)
+from .constants import EMOJI, VERSION, biokeen_config
+from .convert import (
+    from_pykeen_columnar_path, load_pykeen_path, load_pykeen_triples, stream_pykeen_path, to_pykeen_columnar_path,
+    to_pykeen_path, to_pykeen_sidecar_path, to_pykeen_summary_path, to_pykeen_triples,
+)
+from .convert.dispatch import ConverterDispatcher, DEFAULT_CONVERTERS, default_dispatcher
+from .convert.external import sort_pykeen_path
+from .convert.filters import TripleFilter
+from .convert.incremental import update_pykeen_path
+from .convert.instrumentation import InstrumentedDispatcher, get_stats_path
+from .convert.sources import EdgeSource, get_graph_cache_edge_source
+from .convert.unhandled import UnhandledEdges, get_unhandled_path
+from .graph_cache import (
+    GRAPH_CACHE_FORMATS, get_graph_cache_format, get_graph_cache_path, to_graph_cache_path,
+)
+from .index import update_index
+from .locking import FileLock
+from .merge import ensure_merged_pykeen_paths
+from .paths import get_keen_file_path
 
 _SPECIAL_CASES = {
     'compath': 'compath_resources',
@@ -25,31 +49,217 @@ _SPECIAL_CASES = {
 logger = logging.getLogger(__name__)
 
 
-def install_bio2bel_module(name: str, connection: Optional[str] = None, rebuild: bool = False) -> Optional[str]:
+def install_bio2bel_module(name: str, connection: Optional[str] = None, rebuild: bool = False,
+                           n_jobs: int = 1, stream: bool = False, incremental: bool = False,
+                           instrument: bool = False, external_sort: bool = False,
+                           pipeline: bool = False, columnar: Optional[str] = None,
+                           triple_filter: Optional[TripleFilter] = None) -> Optional[str]:
     """Install Bio2BEL module.
 
     :param name: The name of the Bio2BEL module
     :param connection: The optional database connection
     :param rebuild: Should the cache not be used? Defaults to False.
+    :param n_jobs: The number of processes used to convert the BEL graph. See :func:`biokeen.convert.to_pykeen_df`.
+    :param stream: Should the triples be streamed to the TSV instead of building a DataFrame? See
+     :func:`biokeen.convert.stream_pykeen_path`. The binary sidecar isn't written then, since it would need all
+     triples in memory. It's written the first time the KEEN TSV is loaded instead.
+    :param incremental: Should only the edges that changed since the last conversion be converted? The added and
+     removed triples are written to ``<name>.keen.delta.tsv``. See :mod:`biokeen.convert.incremental`. The edge
+     index of the last conversion is used even if ``rebuild`` is set, so a rebuilt database is converted
+     incrementally.
+    :param external_sort: Should the triples be sorted on disk, so they never all have to be in memory? See
+     :func:`biokeen.convert.external.sort_pykeen_path`. Like with ``stream``, the binary sidecar isn't written.
+    :param instrument: Should statistics about the converters be collected? They are written to
+     ``<name>.keen.stats.json`` whenever the BEL graph is converted. See :mod:`biokeen.convert.instrumentation`.
+    :param pipeline: Should independent stages overlap? A newly generated BEL graph is then cached in a background
+     thread while it's converted, and the summary and reports are written while the KEEN TSV is. The outputs are the
+     same either way.
+    :param columnar: The format of a columnar file to write next to the KEEN TSV, either ``parquet`` or ``feather``.
+     It's written even if the KEEN TSV is already up to date. It can't be used with ``stream`` or ``external_sort``,
+     which never hold all triples in memory. See :mod:`biokeen.convert.columnar`.
+    :param triple_filter: An optional filter applied while the BEL graph is converted. It's recorded in the summary
+     and in the build manifest, so changing it reconverts the cached BEL graph. It can't be used with ``incremental``,
+     and it can only prune to a k-core if the triples are converted in memory. See :mod:`biokeen.convert.filters`.
+
+    Whenever the BEL graph is converted, the edges no converter handles are counted by kind, with a few examples, in
+    ``<name>.keen.unhandled.json``. See :mod:`biokeen.convert.unhandled`.
+
+    The BEL graph and the KEEN TSV are cached in the data directory. Each is only rebuilt when the inputs recorded
+    in the database's build manifest have changed (see :mod:`biokeen.cache`), so upgrading the Bio2BEL package
+    rebuilds everything, while changing the converters only reconverts the cached BEL graph.
+
+    Whether or not anything is rebuilt, the database's entry in the index of the data directory is updated. See
+    :mod:`biokeen.index`.
+
+    Processes that share the data directory, even on different machines, can install the same database at the same
+    time. The first one to get the database's lock builds it while the others wait, then they use what it built.
+    Every file is written to a temporary file first, which then replaces it, so no one ever reads a partial file. See
+    :mod:`biokeen.locking`.
     """
+    if incremental and triple_filter:
+        raise ValueError('a filter can not be used for incremental conversion')
+    if columnar is not None and (stream or external_sort):
+        raise ValueError('a columnar file can only be written when the triples are converted in memory')
+
+    # only one process builds a database at a time. The others wait, then find it up to date
+    with get_database_lock(name):
+        try:
+            return _install_bio2bel_module(
+                name, connection=connection, rebuild=rebuild, n_jobs=n_jobs, stream=stream, incremental=incremental,
+                instrument=instrument, external_sort=external_sort, pipeline=pipeline, columnar=columnar,
+                triple_filter=triple_filter,
+            )
+        finally:
+            update_index([name])
+
+
+def get_database_lock(name: str) -> FileLock:
+    """Get the lock that's held while the given database is built, shared by all processes using the data directory."""
+    return FileLock(
+        os.path.join(biokeen_config.data_directory, f'{name}.lock'),
+        stale_after=biokeen_config.lock_stale_timeout,
+    )
+
+
+def _install_bio2bel_module(name: str, connection: Optional[str] = None, rebuild: bool = False,
+                            n_jobs: int = 1, stream: bool = False, incremental: bool = False,
+                            instrument: bool = False, external_sort: bool = False,
+                            pipeline: bool = False, columnar: Optional[str] = None,
+                            triple_filter: Optional[TripleFilter] = None) -> Optional[str]:
     module_name = _SPECIAL_CASES.get(name, f'bio2bel_{name}')
 
     pykeen_df_path = os.path.join(biokeen_config.data_directory, f'{name}.{biokeen_config.keen_tsv_ext}')
-    pykeen_df_summary_path = os.path.join(biokeen_config.data_directory, f'{name}.keen.summary.json')
-    json_path = os.path.join(biokeen_config.data_directory, f'{name}.bel.json')
+    pykeen_df_summary_path = get_keen_file_path(pykeen_df_path, 'summary')
+    manifest_path = get_manifest_path(biokeen_config.data_directory, name)
+    manifest = {} if rebuild else read_manifest(manifest_path)
 
-    if os.path.exists(pykeen_df_path) and not rebuild:
+    if not manifest and os.path.exists(pykeen_df_path) and not rebuild:
         logger.info(f'{EMOJI} {module_name} has already been retrieved. See: {pykeen_df_path}')
+        _ensure_columnar(pykeen_df_path, columnar)
         return pykeen_df_path
 
-    if os.path.exists(json_path) and not rebuild:
-        logger.info(f'{EMOJI} loaded {module_name} JSON: {json_path}')
-        graph = from_json_path(json_path)
-        df = to_pykeen_df(graph)
-        to_pykeen_path(df, pykeen_df_path)
-        to_pykeen_summary_path(df, pykeen_df_summary_path)
+    with (ThreadPoolExecutor(max_workers=2) if pipeline else _SerialExecutor()) as executor:
+        graph, graph_cache = None, None
+        bel_inputs = {'module': module_name, 'version': get_distribution_version(module_name)}
+        graph_path = _find_graph_cache_path(name, manifest)
+        if not rebuild and _is_bel_cache_usable(manifest, graph_path, bel_inputs):
+            previous = manifest.get('bel', {})
+            manifest['bel'] = {
+                'inputs': previous.get('inputs') or bel_inputs,
+                'output': _get_graph_cache_fingerprint(graph_path, previous.get('output')),
+            }
+        else:
+            fmt = biokeen_config.bel_cache_format
+            graph_path = get_graph_cache_path(biokeen_config.data_directory, name, fmt)
+            graph = _build_bel_graph(module_name, connection)
+            graph_cache = executor.submit(to_graph_cache_path, graph, graph_path, fmt)
+            manifest.pop('keen', None)
+            if not pipeline:
+                _record_bel_stage(manifest, manifest_path, graph_cache, graph_path, bel_inputs)
+
+        if graph is None:
+            keen_inputs = _get_keen_inputs(manifest, triple_filter)
+            if os.path.exists(pykeen_df_path) and is_stage_fresh(manifest, 'keen', keen_inputs):
+                logger.info(f'{EMOJI} {module_name} has already been retrieved. See: {pykeen_df_path}')
+                _ensure_columnar(pykeen_df_path, columnar)
+                return pykeen_df_path
+
+            # the cached BEL graph is converted as it's read, without building it
+            logger.info(f'{EMOJI} reading {module_name} BEL graph: {graph_path}')
+            graph = get_graph_cache_edge_source(graph_path)
+
+        logger.debug(f'{EMOJI} generating PyKEEN TSV for {module_name}')
+        success = _write_pykeen(
+            graph, pykeen_df_path, pykeen_df_summary_path, n_jobs=n_jobs, stream=stream, incremental=incremental,
+            instrument=instrument, external_sort=external_sort, columnar=columnar, triple_filter=triple_filter,
+            executor=executor,
+        )
+
+        # the fingerprint of a BEL graph that was cached in the background can only be taken once it's written
+        if pipeline and graph_cache is not None:
+            _record_bel_stage(manifest, manifest_path, graph_cache, graph_path, bel_inputs)
+
+    manifest['keen'] = {'inputs': _get_keen_inputs(manifest, triple_filter)}
+    write_manifest(manifest, manifest_path)
+
+    if success:
+        logger.debug(f'{EMOJI} wrote PyKEEN TSV to {pykeen_df_path}')
         return pykeen_df_path
 
+    logger.warning(f'{EMOJI} no statements generated')
+
+
+class _SerialExecutor(Executor):
+    """An executor that runs each function as soon as it's submitted, for when stages don't overlap."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Run the function and get a future that's already done."""
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _record_bel_stage(manifest: Dict[str, Any], manifest_path: str, graph_cache: Future, graph_path: str,
+                      bel_inputs: Dict[str, Any]) -> None:
+    """Wait for the BEL graph to be cached, then record it in the build manifest."""
+    graph_cache.result()
+    bel_inputs['version'] = get_distribution_version(bel_inputs['module'])
+    manifest['bel'] = {'inputs': bel_inputs, 'output': _get_graph_cache_fingerprint(graph_path)}
+    write_manifest(manifest, manifest_path)
+
+
+def _get_keen_inputs(manifest: Mapping[str, Any], triple_filter: Optional[TripleFilter] = None) -> Dict[str, Any]:
+    """Get the inputs of the conversion of the BEL graph recorded in the build manifest."""
+    rv = {
+        'bel_sha256': manifest['bel']['output']['sha256'],
+        'biokeen_version': VERSION,
+        'pybel_version': get_distribution_version('pybel'),
+        'converters': default_dispatcher.get_fingerprint(),
+    }
+    if triple_filter:
+        rv['filter'] = triple_filter.to_json()
+    return rv
+
+
+def _find_graph_cache_path(name: str, manifest: Mapping[str, Any]) -> Optional[str]:
+    """Find the cached BEL graph for the given database, preferring the one recorded in its build manifest."""
+    recorded = manifest.get('bel', {}).get('output', {}).get('path')
+    candidates = [] if recorded is None else [os.path.join(biokeen_config.data_directory, recorded)]
+    candidates.append(get_graph_cache_path(biokeen_config.data_directory, name, biokeen_config.bel_cache_format))
+    candidates.extend(
+        get_graph_cache_path(biokeen_config.data_directory, name, fmt)
+        for fmt in GRAPH_CACHE_FORMATS
+    )
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+
+
+def _get_graph_cache_fingerprint(path: str, previous: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """Get the fingerprint of the cached BEL graph, along with its file name and format."""
+    rv = refresh_file_fingerprint(path, previous)
+    rv['path'] = os.path.basename(path)
+    rv['format'] = get_graph_cache_format(path)
+    return rv
+
+
+def _is_bel_cache_usable(manifest: Mapping[str, Any], graph_path: Optional[str], inputs: Mapping[str, Any]) -> bool:
+    """Check if the cached BEL graph can be used instead of generating it again."""
+    if graph_path is None:
+        return False
+
+    # The cache predates build manifests, or the module is no longer installed, so the cache is the best there is
+    if 'bel' not in manifest or inputs['version'] is None:
+        return True
+
+    return is_stage_fresh(manifest, 'bel', inputs)
+
+
+def _build_bel_graph(module_name: str, connection: Optional[str]) -> BELGraph:
+    """Populate the Bio2BEL database and generate its BEL graph."""
     bio2bel_module = ensure_bio2bel_installation(module_name)
     logger.debug(f'{EMOJI} imported {module_name}')
 
@@ -73,18 +283,153 @@ def install_bio2bel_module(name: str, connection: Optional[str] = None, rebuild:
     graph = manager.to_bel()
 
     logger.debug(f'Summary: {graph.number_of_nodes()} nodes / {graph.number_of_edges()} edges')
-    to_json_path(graph, json_path, indent=2)
+    return graph
 
-    logger.debug(f'{EMOJI} generating PyKEEN TSV for {module_name}')
-    df = to_pykeen_df(graph)
-    to_pykeen_summary_path(df, pykeen_df_summary_path)
-    success = to_pykeen_path(df, pykeen_df_path)
 
-    if success:
-        logger.debug(f'{EMOJI} wrote PyKEEN TSV to {pykeen_df_path}')
-        return pykeen_df_path
+def _write_pykeen(graph: Union[BELGraph, EdgeSource], path: str, summary_path: str, n_jobs: int = 1,
+                  stream: bool = False, incremental: bool = False, instrument: bool = False,
+                  external_sort: bool = False, columnar: Optional[str] = None,
+                  triple_filter: Optional[TripleFilter] = None, executor: Optional[Executor] = None) -> bool:
+    """Convert a BEL graph and write its KEEN TSV and summary. Returns if any triples were written.
 
-    logger.warning(f'{EMOJI} no statements generated')
+    The summary, the reports, and the columnar file are written with the executor, if given, so they can be written
+    while the KEEN TSV or the sidecar is.
+    """
+    if executor is None:
+        executor = _SerialExecutor()
+    dispatcher = _get_dispatcher(instrument=instrument, triple_filter=triple_filter)
+    unhandled = UnhandledEdges()
+    triples = None
+
+    if incremental:
+        delta = update_pykeen_path(
+            graph, path, summary_path, delta_path=get_keen_file_path(path, 'delta'), dispatcher=dispatcher,
+            unhandled=unhandled,
+        )
+        success = 0 < len(delta.triples)
+    elif stream:
+        summary = stream_pykeen_path(
+            graph, path, summary_path, dispatcher=dispatcher, unhandled=unhandled, triple_filter=triple_filter,
+        )
+        success = 0 < summary['relations']
+    elif external_sort:
+        summary = sort_pykeen_path(
+            graph, path, summary_path, dispatcher=dispatcher, unhandled=unhandled, triple_filter=triple_filter,
+        )
+        success = 0 < summary['relations']
+    else:
+        triples = to_pykeen_triples(
+            graph, n_jobs=n_jobs, dispatcher=dispatcher, unhandled=unhandled, triple_filter=triple_filter,
+        )
+        summary_written = executor.submit(to_pykeen_summary_path, triples, summary_path, triple_filter=triple_filter)
+        success = to_pykeen_path(triples, path)
+        summary_written.result()
+
+    reports = [executor.submit(unhandled.to_json_path, get_unhandled_path(path))]
+    if dispatcher.stats is not None:
+        reports.append(executor.submit(dispatcher.stats.to_json_path, get_stats_path(path)))
+
+    if success and incremental:
+        # the delta was applied to the KEEN TSV in place, so it's read back, which also writes the sidecar
+        triples = load_pykeen_triples(path)
+    elif success and triples is not None:
+        to_pykeen_sidecar_path(path, triples)
+
+    # streamed and sorted triples are never all in memory, so they aren't read back for a sidecar or columnar file
+    if success and triples is not None and columnar is not None:
+        reports.append(executor.submit(to_pykeen_columnar_path, path, triples, columnar))
+
+    for report in reports:
+        report.result()
+
+    return success
+
+
+def _get_dispatcher(instrument: bool = False, triple_filter: Optional[TripleFilter] = None) -> ConverterDispatcher:
+    """Get the dispatcher that converts a BEL graph, over only the converters the filter allows."""
+    dispatcher = InstrumentedDispatcher(DEFAULT_CONVERTERS) if instrument else default_dispatcher
+    if triple_filter is not None:
+        dispatcher = triple_filter.restrict(dispatcher)
+    return dispatcher
+
+
+def _ensure_columnar(path: str, columnar: Optional[str]) -> None:
+    """Write the columnar file for a KEEN TSV that's already up to date, unless it has one in that format already."""
+    if columnar is None or from_pykeen_columnar_path(path, fmt=columnar) is not None:
+        return
+    to_pykeen_columnar_path(path, load_pykeen_triples(path), columnar)
+
+
+class InstallResult(NamedTuple):
+    """The outcome of installing a single Bio2BEL module with :func:`iterate_install_bio2bel_modules`."""
+
+    #: The name of the Bio2BEL module
+    name: str
+    #: The path to the KEEN TSV, if one was generated
+    path: Optional[str] = None
+    #: A description of the error, if the installation failed
+    error: Optional[str] = None
+    #: The number of seconds the installation took
+    duration: float = 0.0
+
+
+def iterate_install_bio2bel_modules(names: Iterable[str], n_workers: int = 1,
+                                    **kwargs) -> Iterable[InstallResult]:
+    """Install several Bio2BEL modules concurrently, yielding the result of each as soon as it finishes.
+
+    :param names: The names of the Bio2BEL modules
+    :param n_workers: The number of modules installed at the same time, each in its own process. If less than one,
+     uses all available cores. If one, the modules are installed one after another in this process.
+    :param kwargs: Keyword arguments passed to :func:`install_bio2bel_module`
+
+    A module that fails, including one that would exit the interpreter, only produces a failed result and does not
+    affect the others. Note that concurrent population of several modules needs a database connection that supports
+    concurrent writers.
+    """
+    names = list(names)
+    if n_workers < 1:
+        n_workers = os.cpu_count() or 1
+
+    if n_workers == 1:
+        for name in names:
+            yield _safe_install_bio2bel_module(name, kwargs)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(names) or 1)) as executor:
+        futures = {
+            executor.submit(_safe_install_bio2bel_module, name, kwargs): name
+            for name in names
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:  # the worker process itself died
+                yield InstallResult(name=futures[future], error=f'{e.__class__.__name__}: {e}')
+
+
+def install_bio2bel_modules(names: Iterable[str], n_workers: int = 1, **kwargs) -> Dict[str, InstallResult]:
+    """Install several Bio2BEL modules concurrently and return the results by name.
+
+    See :func:`iterate_install_bio2bel_modules` for the arguments.
+    """
+    return {
+        result.name: result
+        for result in iterate_install_bio2bel_modules(names, n_workers=n_workers, **kwargs)
+    }
+
+
+def _safe_install_bio2bel_module(name: str, kwargs: Mapping[str, Any]) -> InstallResult:
+    start = time.time()
+    try:
+        path = install_bio2bel_module(name, **kwargs)
+    except (Exception, SystemExit) as e:
+        logger.exception(f'{EMOJI} failed to install {name}')
+        return InstallResult(name=name, error=f'{e.__class__.__name__}: {e}', duration=time.time() - start)
+
+    if path is None:
+        return InstallResult(name=name, error='no statements generated', duration=time.time() - start)
+
+    return InstallResult(name=name, path=path, duration=time.time() - start)
 
 
 def ensure_bio2bel_installation(package: str):
@@ -125,12 +470,22 @@ def handle_bio2bel(module_name: str) -> np.ndarray:
     :param module_name: The name of the bio2bel repository (with no prefix)
     """
     path = install_bio2bel_module(module_name)
-    return np.loadtxt(
-        fname=path,
-        dtype=str,
-        comments='@Comment@ Subject Predicate Object',
-        delimiter='\t',
-    )
+    return load_pykeen_path(path)
+
+
+def handle_bio2bel_merged(module_names: str) -> np.ndarray:
+    """Load several Bio2BEL repositories, merged and deduplicated.
+
+    :param module_names: The names of the bio2bel repositories (with no prefix), separated by commas
+
+    The merged triples are cached for each combination of repositories. See :mod:`biokeen.merge`.
+    """
+    paths = {}
+    for module_name in module_names.split(','):
+        path = install_bio2bel_module(module_name)
+        if path is not None:
+            paths[module_name] = path
+    return ensure_merged_pykeen_paths(paths).to_labels()
 
 
 def handle_bel_commons(network_id: Union[int, str], host: Optional[str] = None) -> np.ndarray:
@@ -138,7 +493,11 @@ def handle_bel_commons(network_id: Union[int, str], host: Optional[str] = None)
 
     :param network_id: The network identifier in BEL Commons
     :param host: The host for BEL Commons. Defaults to the Fraunhofer SCAI public instance.
+
+    The network is cached in the data directory and only downloaded and converted again if it changed on the server.
+    See :mod:`biokeen.bel_commons`.
     """
-    graph = from_web(int(network_id), host=host)
-    df = to_pykeen_df(graph)
-    return df.to_numpy()
+    path = ensure_bel_commons_network(network_id, host=host)
+    if path is None:
+        return np.empty((0, 3), dtype=str)
+    return load_pykeen_path(path)
@@ -2,4 +2,13 @@
 
 """Conversion from BEL to proper triples."""
 
-from .io import get_pykeen_summary, get_triple, to_pykeen_df, to_pykeen_path, to_pykeen_summary_path  # noqa: F401
+from .columnar import from_pykeen_columnar_path, get_columnar_path, to_pykeen_columnar_path  # noqa: F401
+from .dispatch import ConverterDispatcher, DEFAULT_CONVERTERS  # noqa: F401
+from .filters import TripleFilter  # noqa: F401
+from .io import (  # noqa: F401
+    from_pykeen_sidecar_path, get_sidecar_path, get_triple, load_pykeen_path, load_pykeen_triples, stream_pykeen_path,
+    to_pykeen_df, to_pykeen_path, to_pykeen_sidecar_path, to_pykeen_summary_path, to_pykeen_triples,
+)
+from .labels import CachedEntityLabeler, EntityLabeler  # noqa: F401
+from .summary import TripleSummarizer, get_pykeen_summary  # noqa: F401
+from .triples import CompactTriples  # noqa: F401
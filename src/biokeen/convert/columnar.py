@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+"""Columnar copies of KEEN TSV files.
+
+A KEEN TSV can be accompanied by a dictionary-encoded, compressed columnar file in either `Parquet
+<https://parquet.apache.org>`_ or `Feather <https://arrow.apache.org/docs/python/feather.html>`_ format. Each of
+its columns stores the labels once, in a dictionary, and the triples as 32-bit indexes into it, like
+:class:`biokeen.convert.CompactTriples`, so the file is much smaller than the TSV and is read without tokenizing.
+
+>>> from biokeen.convert import to_pykeen_df, to_pykeen_path
+>>> graph = ...  # Something from PyBEL
+>>> to_pykeen_path(to_pykeen_df(graph), 'graph.keen.tsv', columnar='parquet')
+
+This writes ``graph.keen.parquet`` next to ``graph.keen.tsv``. Like the binary sidecar, the columnar file records
+the size and modification time of the TSV, and :func:`biokeen.convert.load_pykeen_triples` reads it instead of the
+TSV whenever it is up to date.
+
+Columnar files need :mod:`pyarrow`, which can be installed with ``pip install biokeen[columnar]``.
+"""
+
+import logging
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .triples import COLUMNS, CompactTriples
+from ..constants import EMOJI
+from ..locking import atomic_path
+from ..paths import get_keen_file_path
+
+__all__ = [
+    'PARQUET',
+    'FEATHER',
+    'COLUMNAR_FORMATS',
+    'get_columnar_path',
+    'iterate_columnar_paths',
+    'to_pykeen_columnar_path',
+    'from_pykeen_columnar_path',
+    'read_columnar_path',
+]
+
+logger = logging.getLogger(__name__)
+
+PARQUET = 'parquet'
+FEATHER = 'feather'
+
+#: The columnar formats, in the order they are looked for
+COLUMNAR_FORMATS = [PARQUET, FEATHER]
+
+_TSV_SIZE = b'biokeen.tsv_size'
+_TSV_MTIME_NS = b'biokeen.tsv_mtime_ns'
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError('columnar files need pyarrow. Install it with: pip install biokeen[columnar]') from e
+    return pyarrow
+
+
+def get_columnar_path(path: str, fmt: str = PARQUET) -> str:
+    """Get the path of the columnar file in the given format for a KEEN TSV file."""
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f'invalid columnar format: {fmt}. Should be one of: {", ".join(COLUMNAR_FORMATS)}')
+    return get_keen_file_path(path, fmt)
+
+
+def iterate_columnar_paths(path: str, formats: Optional[Iterable[str]] = None) -> List[str]:
+    """Get the paths of the columnar files that exist for a KEEN TSV file.
+
+    :param path: The path to the KEEN TSV file
+    :param formats: The formats to look for. Defaults to all of :data:`COLUMNAR_FORMATS`.
+    """
+    return [
+        columnar_path
+        for columnar_path in (get_columnar_path(path, fmt) for fmt in (formats or COLUMNAR_FORMATS))
+        if os.path.exists(columnar_path)
+    ]
+
+
+def to_pykeen_columnar_path(path: str, triples: CompactTriples, fmt: str = PARQUET) -> str:
+    """Write a columnar file next to a KEEN TSV file.
+
+    :param path: The path to the KEEN TSV file
+    :param triples: The triples in the KEEN TSV file
+    :param fmt: Either ``parquet`` or ``feather``
+    :return: The path to the columnar file
+    """
+    columnar_path = get_columnar_path(path, fmt)
+    pa = _import_pyarrow()
+
+    entities = pa.array(triples.entities.tolist(), type=pa.string())
+    relations = pa.array(triples.relations.tolist(), type=pa.string())
+    stat = os.stat(path)
+    table = pa.table(
+        [
+            pa.DictionaryArray.from_arrays(pa.array(triples.triples[:, 0]), entities),
+            pa.DictionaryArray.from_arrays(pa.array(triples.triples[:, 1]), relations),
+            pa.DictionaryArray.from_arrays(pa.array(triples.triples[:, 2]), entities),
+        ],
+        names=COLUMNS,
+        metadata={_TSV_SIZE: str(stat.st_size), _TSV_MTIME_NS: str(stat.st_mtime_ns)},
+    )
+
+    with atomic_path(columnar_path) as temporary_path:
+        if fmt == PARQUET:
+            import pyarrow.parquet as pq
+            pq.write_table(table, temporary_path, compression='zstd')
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, temporary_path, compression='zstd')
+
+    return columnar_path
+
+
+def from_pykeen_columnar_path(path: str, fmt: Optional[str] = None) -> Optional[CompactTriples]:
+    """Load the triples from a columnar file of a KEEN TSV file if one exists and matches the TSV.
+
+    :param path: The path to the KEEN TSV file
+    :param fmt: The format of the columnar file. Defaults to the first of :data:`COLUMNAR_FORMATS` that's up to date.
+
+    Returns none if :mod:`pyarrow` isn't installed.
+    """
+    columnar_paths = iterate_columnar_paths(path, formats=None if fmt is None else [fmt])
+    if not columnar_paths:
+        return None
+
+    try:
+        _import_pyarrow()
+    except ImportError:
+        logger.debug(f'{EMOJI} pyarrow is not installed, so the columnar files are skipped: {path}')
+        return None
+
+    stat = os.stat(path)
+    for columnar_path in columnar_paths:
+        try:
+            triples, metadata = _read_columnar(columnar_path)
+        except (OSError, ValueError, KeyError):
+            logger.warning(f'{EMOJI} could not read columnar file: {columnar_path}')
+            continue
+
+        if metadata.get(_TSV_SIZE) != str(stat.st_size).encode() or \
+                metadata.get(_TSV_MTIME_NS) != str(stat.st_mtime_ns).encode():
+            logger.debug(f'{EMOJI} columnar file is out of date: {columnar_path}')
+            continue
+
+        return triples
+
+
+def read_columnar_path(columnar_path: str) -> CompactTriples:
+    """Read the triples from a columnar file, whether or not it matches its KEEN TSV."""
+    _import_pyarrow()
+    return _read_columnar(columnar_path)[0]
+
+
+def _read_columnar(columnar_path: str) -> Tuple[CompactTriples, dict]:
+    if columnar_path.endswith(f'.{PARQUET}'):
+        import pyarrow.parquet as pq
+        table = pq.read_table(columnar_path, columns=COLUMNS, read_dictionary=COLUMNS)
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(columnar_path, columns=COLUMNS)
+
+    table = table.unify_dictionaries()
+    (subject_labels, subject_codes), (relations, relation_codes), (object_labels, object_codes) = (
+        _decode_column(table.column(column))
+        for column in COLUMNS
+    )
+
+    # subjects and objects are stored with separate dictionaries, so they're translated to a shared vocabulary
+    entities = np.unique(np.concatenate([subject_labels, object_labels]))
+    triples = np.stack([
+        np.searchsorted(entities, subject_labels)[subject_codes],
+        relation_codes,
+        np.searchsorted(entities, object_labels)[object_codes],
+    ], axis=1)
+
+    return CompactTriples(entities, relations, triples), table.schema.metadata or {}
+
+
+def _decode_column(column) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the sorted labels in a column and the index of each row's label in them."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not pa.types.is_dictionary(column.type):
+        column = pc.dictionary_encode(column)
+
+    if column.num_chunks == 0:
+        return np.empty(0, dtype=object), np.empty(0, dtype=np.int64)
+
+    # after unifying, every chunk has the same dictionary
+    dictionary = np.asarray(column.chunk(0).dictionary.to_pylist(), dtype=object)
+    codes = np.concatenate([
+        chunk.indices.to_numpy(zero_copy_only=False)
+        for chunk in column.chunks
+    ])
+
+    # the labels are sorted so that triples can be compared by their indexes
+    labels, inverse = np.unique(dictionary, return_inverse=True)
+    return labels, inverse.ravel()[codes]
@@ -13,6 +13,7 @@ from pybel.dsl import (
     Abundance, BaseAbundance, BaseEntity, BiologicalProcess, ComplexAbundance, MicroRna,
     NamedComplexAbundance, Pathology, Protein, Rna,
 )
+from .labels import EntityLabeler, default_labeler
 
 
 class Converter(ABC):
@@ -25,20 +26,22 @@ class Converter(ABC):
 
     @staticmethod
     @abstractmethod
-    def convert(u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict) -> Tuple[str, str, str]:
-        """Convert a BEL edge."""
+    def convert(u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict,
+                labeler: EntityLabeler = default_labeler) -> Tuple[str, str, str]:
+        """Convert a BEL edge, labeling its entities with the given labeler."""
 
 
 class SimpleConverter(Converter):
     """A class for converting the source and target that have simple names."""
 
     @classmethod
-    def convert(cls, u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict) -> Tuple[str, str, str]:
+    def convert(cls, u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict,
+                labeler: EntityLabeler = default_labeler) -> Tuple[str, str, str]:
         """Convert a BEL edge."""
         return (
-            f'{u.namespace}:{u.identifier or u.name}',
+            labeler.get_curie(u),
             edge_data[RELATION],
-            f'{v.namespace}:{v.identifier or v.name}',
+            labeler.get_curie(v),
         )
 
 
@@ -48,12 +51,13 @@ class TypedConverter(Converter):
     target_relation = None
 
     @classmethod
-    def convert(cls, u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict) -> Tuple[str, str, str]:
+    def convert(cls, u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict,
+                labeler: EntityLabeler = default_labeler) -> Tuple[str, str, str]:
         """Convert a BEL edge."""
         return (
-            f'{u.namespace}:{u.identifier or u.name}',
+            labeler.get_curie(u),
             cls.target_relation,
-            f'{v.namespace}:{v.identifier or v.name}',
+            labeler.get_curie(v),
         )
 
 
@@ -118,12 +122,13 @@ class NamedComplexHasComponentConverter(SimpleTypedPredicate):
     target_relation = 'partOf'
 
     @classmethod
-    def convert(cls, u: BaseEntity, v: BaseEntity, key: str, data: Dict) -> Tuple[str, str, str]:
+    def convert(cls, u: BaseEntity, v: BaseEntity, key: str, data: Dict,
+                labeler: EntityLabeler = default_labeler) -> Tuple[str, str, str]:
         """Convert a BEL edge."""
         return (
-            f'{v.namespace}:{v.identifier or v.name}',
+            labeler.get_curie(v),
             cls.target_relation,
-            f'{u.namespace}:{u.identifier or u.name}',
+            labeler.get_curie(u),
         )
 
 
@@ -136,12 +141,13 @@ class ListComplexHasComponentConverter(SimpleTypedPredicate):
     target_relation = 'partOf'
 
     @classmethod
-    def convert(cls, u: ComplexAbundance, v: BaseAbundance, key: str, data: Dict) -> Tuple[str, str, str]:
+    def convert(cls, u: ComplexAbundance, v: BaseAbundance, key: str, data: Dict,
+                labeler: EntityLabeler = default_labeler) -> Tuple[str, str, str]:
         """Convert a BEL edge."""
         return (
-            f'{v.namespace}:{v.identifier or v.name}',
+            labeler.get_curie(v),
             cls.target_relation,
-            str(u),
+            labeler.get_bel(u),
         )
 
 
@@ -174,6 +180,8 @@ class EquivalenceConverter(SimplePredicate, SimpleConverter):
 class CorrelationConverter(SimpleConverter):
     """Converts BEL statements like ``A(B) pos|neg|noCorrelation C(D)``."""
 
+    relations = CORRELATIVE_RELATIONS
+
     @staticmethod
     def predicate(u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict) -> bool:
         """Test a BEL edge."""
@@ -183,18 +191,21 @@ class CorrelationConverter(SimpleConverter):
 class AssociationConverter(Converter):
     """Converts BEL statements like ``a(X) -- path(Y)``."""
 
+    relation = ASSOCIATION
+
     @staticmethod
     def predicate(u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict) -> bool:
         """Test a BEL edge."""
         return edge_data[RELATION] == ASSOCIATION
 
     @staticmethod
-    def convert(u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict) -> Tuple[str, str, str]:
+    def convert(u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict,
+                labeler: EntityLabeler = default_labeler) -> Tuple[str, str, str]:
         """Convert a BEL edge."""
         return (
-            f'{u.namespace}:{u.identifier or u.name}',
+            labeler.get_curie(u),
             edge_data.get('association_type', ASSOCIATION),  # allow more specific association to be defined
-            f'{v.namespace}:{v.identifier or v.name}',
+            labeler.get_curie(v),
         )
 
 
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+"""Dispatching of BEL edges to the converters that can handle them."""
+
+import hashlib
+import importlib
+import inspect
+import sys
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from pybel.constants import RELATION
+from pybel.dsl import BaseEntity
+from .converters import (
+    AssociationConverter, Converter, CorrelationConverter, DecreasesAmountConverter, DrugIndicationConverter,
+    DrugSideEffectConverter, EquivalenceConverter, IncreasesAmountConverter, IsAConverter,
+    ListComplexHasComponentConverter, MiRNADecreasesExpressionConverter, MiRNADirectlyDecreasesExpressionConverter,
+    NamedComplexHasComponentConverter, PartOfNamedComplexConverter, ProteinPartOfBiologicalProcess,
+    RegulatesActivityConverter, RegulatesAmountConverter, SubprocessPartOfBiologicalProcess,
+)
+from .labels import EntityLabeler, default_labeler
+
+__all__ = [
+    'CONVERSION_VERSION',
+    'DEFAULT_CONVERTERS',
+    'FINGERPRINT_MODULES',
+    'ConverterDispatcher',
+    'default_dispatcher',
+]
+
+Triple = Tuple[str, str, str]
+ConverterCandidates = Tuple[Type[Converter], ...]
+
+#: The converters that are applied to every BEL edge. Order is important: the first match wins.
+DEFAULT_CONVERTERS: List[Type[Converter]] = [
+    NamedComplexHasComponentConverter,
+    ListComplexHasComponentConverter,
+    PartOfNamedComplexConverter,
+    SubprocessPartOfBiologicalProcess,
+    ProteinPartOfBiologicalProcess,
+    RegulatesActivityConverter,
+    MiRNADecreasesExpressionConverter,
+    MiRNADirectlyDecreasesExpressionConverter,
+    IsAConverter,
+    EquivalenceConverter,
+    CorrelationConverter,
+    AssociationConverter,
+    DrugIndicationConverter,
+    DrugSideEffectConverter,
+    RegulatesAmountConverter,
+    IncreasesAmountConverter,
+    DecreasesAmountConverter,
+]
+
+#: The modules besides those of the converters that shape the triples: how entities are labeled and how triples are
+#: deduplicated and sorted. They're imported when they're hashed, since some of them import this one.
+FINGERPRINT_MODULES: List[str] = [
+    'biokeen.convert.labels',
+    'biokeen.convert.triples',
+]
+
+#: The version of how edges are turned into the rows of a KEEN TSV outside of the fingerprinted modules, like how
+#: unhandled edges are skipped and how labels are escaped. Bump it whenever that changes the output of a conversion.
+CONVERSION_VERSION = 2
+
+
+def get_converter_relations(converter: Type[Converter]) -> Optional[Set[str]]:
+    """Get the BEL relations a converter can match, or None if it does not declare any."""
+    relations = getattr(converter, 'relations', ...)
+    if relations is not ...:
+        return set(relations)
+
+    relation = getattr(converter, 'relation', ...)
+    if relation is not ...:
+        return {relation}
+
+    return None
+
+
+def _matches_type(converter: Type[Converter], attr: str, cls: type) -> bool:
+    """Check if the entity class could satisfy the converter's type constraint on the given side."""
+    constraint = getattr(converter, attr, ...)
+    return constraint is ... or issubclass(cls, constraint)
+
+
+class ConverterDispatcher:
+    """Dispatches BEL edges to the converters that can apply to them.
+
+    The index is keyed on the relation of the edge, then on the classes of the subject and object entities. Each
+    bucket lists the candidate converters in their original order, so the first matching converter still wins.
+    Buckets are built the first time a given combination is seen and reused afterwards.
+    """
+
+    #: Statistics about the converted edges, if the dispatcher is instrumented. See
+    #: :class:`biokeen.convert.instrumentation.InstrumentedDispatcher`.
+    stats = None
+
+    def __init__(self, converters: Iterable[Type[Converter]],
+                 disabled: Optional[Iterable[Type[Converter]]] = None) -> None:
+        """Build a dispatcher.
+
+        :param converters: The converters to dispatch to, in order of precedence
+        :param disabled: Converters that still match edges, but don't convert them. The edges they match are left
+         unhandled rather than passed on to the converters after them.
+        """
+        self.converters = list(converters)
+        self.disabled = frozenset(disabled or ())
+        self._relations = [get_converter_relations(converter) for converter in self.converters]
+        self._index: Dict[str, Dict[Tuple[type, type], ConverterCandidates]] = {}
+
+    def get_fingerprint(self) -> str:
+        """Get a hash of the converters and their implementations.
+
+        The hash changes whenever the order of the converters, the source of any module defining one of them (or
+        one of their base classes), the source of any of the :data:`FINGERPRINT_MODULES`, or the
+        :data:`CONVERSION_VERSION` changes, so outputs built with other converters or labels can be recognized.
+        """
+        modules = {
+            cls.__module__
+            for converter in self.converters
+            for cls in converter.__mro__
+            if issubclass(cls, Converter)
+        }
+        modules.add(__name__)
+        modules.update(FINGERPRINT_MODULES)
+
+        sha = hashlib.sha256(f'{CONVERSION_VERSION}\n'.encode('utf-8'))
+        for converter in self.converters:
+            sha.update(f'{converter.__module__}.{converter.__qualname__}\n'.encode('utf-8'))
+        for module in sorted(modules):
+            sha.update(inspect.getsource(sys.modules.get(module) or importlib.import_module(module)).encode('utf-8'))
+        return sha.hexdigest()
+
+    def _get_relation_candidates(self, relation: str) -> List[Type[Converter]]:
+        return [
+            converter
+            for converter, relations in zip(self.converters, self._relations)
+            if relations is None or relation in relations
+        ]
+
+    def get_candidates(self, relation: str, subject_cls: type, object_cls: type) -> ConverterCandidates:
+        """Get the converters that could apply to an edge with the given relation and entity classes."""
+        relation_index = self._index.get(relation)
+        if relation_index is None:
+            relation_index = self._index[relation] = {}
+
+        candidates = relation_index.get((subject_cls, object_cls))
+        if candidates is None:
+            candidates = relation_index[subject_cls, object_cls] = tuple(
+                converter
+                for converter in self._get_relation_candidates(relation)
+                if (
+                    _matches_type(converter, 'subject_type', subject_cls) and
+                    _matches_type(converter, 'object_type', object_cls)
+                )
+            )
+
+        return candidates
+
+    def get_converter(self, u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict) -> Optional[Type[Converter]]:
+        """Get the first converter whose predicate accepts the edge, if any."""
+        for converter in self.get_candidates(edge_data[RELATION], u.__class__, v.__class__):
+            if converter.predicate(u, v, key, edge_data):
+                return converter
+
+    def convert(self, u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict,
+                labeler: EntityLabeler = default_labeler) -> Optional[Triple]:
+        """Convert a BEL edge with the first converter that accepts it, if any.
+
+        :param labeler: The labeler for the entities. Pass the same :class:`biokeen.convert.labels.CachedEntityLabeler`
+         for all edges of a conversion so each node is only labeled once.
+        """
+        converter = self.get_converter(u, v, key, edge_data)
+        if converter is not None and converter not in self.disabled:
+            return converter.convert(u, v, key, edge_data, labeler=labeler)
+
+
+#: The dispatcher over the default converters
+default_dispatcher = ConverterDispatcher(DEFAULT_CONVERTERS)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+"""Conversion of BEL graphs whose triples don't fit in memory.
+
+:func:`sort_pykeen_path` writes the same KEEN TSV as :func:`biokeen.convert.to_pykeen_df` and
+:func:`biokeen.convert.to_pykeen_path`, without ever holding all triples in memory. Triples are collected until they
+take up about as much memory as allowed, then they are sorted and spilled to a temporary file as a run. Finally, the
+runs are merged into the KEEN TSV, dropping duplicates along the way.
+"""
+
+import csv
+import heapq
+import logging
+import os
+import sys
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from pybel import BELGraph
+from .dispatch import ConverterDispatcher, default_dispatcher
+from .filters import TripleFilter
+from .io import KeenDialect, _check_streamable, _iterate_triples
+from .summary import TripleSummarizer, _add_filter, _dump_summary
+from .unhandled import UnhandledEdges
+from ..constants import EMOJI, biokeen_config
+from ..locking import atomic_path
+
+__all__ = [
+    'sort_pykeen_path',
+    'merge_runs',
+]
+
+logger = logging.getLogger(__name__)
+
+Triple = Tuple[str, str, str]
+
+#: The number of runs that are merged at once. If there are more, they are merged in several passes.
+MAX_RUNS_PER_MERGE = 64
+
+#: The approximate size of a slot in a set, in bytes
+_SET_SLOT_SIZE = 16
+
+
+def sort_pykeen_path(graph: BELGraph,
+                     path: str,
+                     summary_path: Optional[str] = None,
+                     memory_limit: Optional[int] = None,
+                     use_tqdm: bool = True,
+                     dispatcher: ConverterDispatcher = default_dispatcher,
+                     unhandled: Optional[UnhandledEdges] = None,
+                     directory: Optional[str] = None,
+                     triple_filter: Optional[TripleFilter] = None,
+                     ) -> Dict:
+    """Write the triples in the BEL graph to a KEEN TSV file, sorting them on disk if they don't fit in memory.
+
+    :param graph: A BEL graph, or an edge source from :mod:`biokeen.convert.sources`
+    :param path: The path to the KEEN TSV file
+    :param summary_path: An optional path to which the summary is written
+    :param memory_limit: The approximate number of bytes the triples may take up in memory before they are spilled
+     to disk. Defaults to ``sort_memory_limit`` from the BioKEEN configuration.
+    :param use_tqdm: Should a progress bar be shown?
+    :param dispatcher: The dispatcher used to convert edges
+    :param unhandled: An optional report to which the edges no converter handles are added
+    :param directory: The directory in which the runs are spilled. Defaults to the directory of the KEEN TSV file.
+    :param triple_filter: An optional filter of the triples. Since the triples are never all in memory, it can't
+     prune them to a k-core.
+    :return: The summary of the triples, as from :func:`biokeen.convert.get_pykeen_summary`
+
+    If no triples are generated, no file is left behind.
+    """
+    _check_streamable(triple_filter)
+    if triple_filter is not None:
+        dispatcher = triple_filter.restrict(dispatcher)
+    if memory_limit is None:
+        memory_limit = biokeen_config.sort_memory_limit
+    if unhandled is None:
+        unhandled = UnhandledEdges()
+
+    triples = _iterate_triples(
+        graph, use_tqdm=use_tqdm, dispatcher=dispatcher, unhandled=unhandled, triple_filter=triple_filter,
+    )
+    with tempfile.TemporaryDirectory(dir=directory or os.path.dirname(os.path.abspath(path))) as run_directory:
+        run_paths = _spill_runs(triples, run_directory, memory_limit)
+        logger.debug(f'{EMOJI} merging {len(run_paths)} sorted runs into {path}')
+        summary = merge_runs(run_paths, path, directory=run_directory)
+    unhandled.log()
+
+    summary = _add_filter(summary, triple_filter)
+
+    if summary_path is not None:
+        _dump_summary(summary, summary_path)
+    return summary
+
+
+def _spill_runs(triples: Iterable[Optional[Triple]], directory: str, memory_limit: int) -> List[str]:
+    """Collect triples until they exceed the memory limit, then sort them and write them to a run."""
+    run_paths = []
+    batch: Set[Triple] = set()
+    batch_size = 0
+    for triple in triples:
+        if triple is None or triple in batch:
+            continue
+
+        batch.add(triple)
+        batch_size += _get_triple_size(triple)
+        if memory_limit <= batch_size:
+            run_paths.append(_write_run(batch, directory, len(run_paths)))
+            batch.clear()
+            batch_size = 0
+
+    if batch or not run_paths:
+        run_paths.append(_write_run(batch, directory, len(run_paths)))
+
+    return run_paths
+
+
+def _get_triple_size(triple: Triple) -> int:
+    """Estimate the memory a triple takes up in a set, counting its strings as if they weren't shared."""
+    return _SET_SLOT_SIZE + sys.getsizeof(triple) + sum(map(sys.getsizeof, triple))
+
+
+def _write_run(triples: Iterable[Triple], directory: str, index: int) -> str:
+    path = os.path.join(directory, f'run-{index:06}.tsv')
+    with open(path, 'w', newline='') as file:
+        csv.writer(file, KeenDialect).writerows(sorted(triples))
+    return path
+
+
+def _read_run(path: str) -> Iterator[Triple]:
+    with open(path, newline='') as file:
+        for row in csv.reader(file, KeenDialect):
+            yield tuple(row)
+
+
+def merge_runs(run_paths: List[str], path: str, directory: Optional[str] = None) -> Dict:
+    """Merge sorted runs of triples into a KEEN TSV file, dropping duplicates.
+
+    :param run_paths: The paths of the runs. Each one is a TSV of sorted triples.
+    :param path: The path to the KEEN TSV file
+    :param directory: The directory for intermediate runs, if there are more than :data:`MAX_RUNS_PER_MERGE` runs.
+     Defaults to the directory of the KEEN TSV file. Intermediate runs are removed once they have been merged.
+    :return: The summary of the triples, as from :func:`biokeen.convert.get_pykeen_summary`
+
+    If there are no triples, no file is left behind.
+    """
+    directory = directory or os.path.dirname(os.path.abspath(path))
+    intermediate_paths = []
+    while MAX_RUNS_PER_MERGE < len(run_paths):
+        merged_paths = [
+            _merge_runs_to_path(run_paths[i:i + MAX_RUNS_PER_MERGE], directory)
+            for i in range(0, len(run_paths), MAX_RUNS_PER_MERGE)
+        ]
+        _remove_paths(intermediate_paths)
+        intermediate_paths = run_paths = merged_paths
+
+    summarizer = TripleSummarizer()
+    with atomic_path(path) as temporary_path:
+        with open(temporary_path, 'w', newline='') as file:
+            writer = csv.writer(file, KeenDialect)
+            for triple in _iterate_merged(run_paths):
+                writer.writerow(triple)
+                summarizer.add(*triple)
+
+        if not summarizer.relations:
+            os.remove(temporary_path)
+
+    _remove_paths(intermediate_paths)
+
+    if not summarizer.relations and os.path.exists(path):
+        os.remove(path)
+
+    return summarizer.get_summary()
+
+
+def _merge_runs_to_path(run_paths: List[str], directory: str) -> str:
+    """Merge sorted runs into a single, longer run."""
+    fd, path = tempfile.mkstemp(prefix='merge-', suffix='.tsv', dir=directory)
+    with open(fd, 'w', newline='') as file:
+        csv.writer(file, KeenDialect).writerows(_iterate_merged(run_paths))
+    return path
+
+
+def _remove_paths(paths: Iterable[str]) -> None:
+    for path in paths:
+        os.remove(path)
+
+
+def _iterate_merged(run_paths: List[str]) -> Iterator[Triple]:
+    """Iterate over the triples from sorted runs in order, without duplicates."""
+    previous = None
+    for triple in heapq.merge(*map(_read_run, run_paths)):
+        if triple != previous:
+            yield triple
+            previous = triple
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""Filters applied while BEL graphs are converted.
+
+A :class:`TripleFilter` keeps only some of the triples, so a KEEN TSV doesn't need to be filtered with pandas after
+the whole graph has been converted:
+
+>>> from biokeen.convert import to_pykeen_df
+>>> from biokeen.convert.filters import TripleFilter
+>>> graph = ...  # Something from PyBEL
+>>> df = to_pykeen_df(graph, triple_filter=TripleFilter(namespaces=['HGNC', 'GO'], k_core=2))
+
+Each filter is applied as early as it can be:
+
+1. Converters that aren't allowed still match edges, but they're disabled in the dispatcher, so they never convert
+   them. The edges they match are reported as unhandled rather than passed on to a later converter, so a filter never
+   changes the relation of a triple.
+2. Triples are filtered by the namespaces of their entities and by their relations as soon as they're converted, even
+   in worker processes, so they're never collected.
+3. Once all triples are collected, the ones with an entity that takes part in fewer than ``k_core`` triples are
+   pruned, over and over until every entity left takes part in at least ``k_core`` triples.
+
+Like in summaries, the namespace of an entity is everything before the first colon of its label.
+"""
+
+from typing import Any, Collection, Dict, Iterable, List, Optional, Type, Union
+
+import numpy as np
+
+from .converters import Converter
+from .dispatch import ConverterDispatcher, Triple
+from .triples import CompactTriples
+
+__all__ = [
+    'TripleFilter',
+    'prune_k_core',
+]
+
+ConverterReference = Union[str, Type[Converter]]
+
+
+class TripleFilter:
+    """Which triples to keep when converting a BEL graph."""
+
+    def __init__(self,
+                 namespaces: Optional[Iterable[str]] = None,
+                 exclude_namespaces: Optional[Iterable[str]] = None,
+                 relations: Optional[Iterable[str]] = None,
+                 exclude_relations: Optional[Iterable[str]] = None,
+                 converters: Optional[Iterable[ConverterReference]] = None,
+                 exclude_converters: Optional[Iterable[ConverterReference]] = None,
+                 k_core: int = 0,
+                 ) -> None:
+        """Specify the triples to keep. Everything is kept by default.
+
+        :param namespaces: The only namespaces the subject and the object of a triple may come from
+        :param exclude_namespaces: The namespaces neither the subject nor the object of a triple may come from
+        :param relations: The only relations a triple may have, like ``increases``
+        :param exclude_relations: The relations a triple may not have
+        :param converters: The only converters used, as classes or by their names
+        :param exclude_converters: The converters not used, as classes or by their names
+        :param k_core: The number of triples every entity has to take part in. Entities that don't are pruned, along
+         with their triples, until all entities left do.
+        """
+        self.namespaces = _to_set(namespaces)
+        self.exclude_namespaces = _to_set(exclude_namespaces) or set()
+        self.relations = _to_set(relations)
+        self.exclude_relations = _to_set(exclude_relations) or set()
+        self.converters = _to_names(converters)
+        self.exclude_converters = _to_names(exclude_converters) or set()
+        if k_core < 0:
+            raise ValueError(f'k_core should not be negative: {k_core}')
+        self.k_core = k_core
+
+    @property
+    def filters_triples(self) -> bool:
+        """Check if triples are filtered by the namespaces of their entities or by their relations."""
+        return (
+            self.namespaces is not None or bool(self.exclude_namespaces) or
+            self.relations is not None or bool(self.exclude_relations)
+        )
+
+    def __bool__(self) -> bool:
+        """Check if anything is filtered."""
+        return (
+            self.filters_triples or
+            self.converters is not None or bool(self.exclude_converters) or
+            1 < self.k_core
+        )
+
+    def accepts(self, triple: Triple) -> bool:
+        """Check if a triple passes the filters on namespaces and relations."""
+        subject, relation, obj = triple
+        if (self.relations is not None and relation not in self.relations) or relation in self.exclude_relations:
+            return False
+        return self._accepts_entity(subject) and self._accepts_entity(obj)
+
+    def _accepts_entity(self, label: str) -> bool:
+        namespace = label.split(':', 1)[0]
+        return (self.namespaces is None or namespace in self.namespaces) and namespace not in self.exclude_namespaces
+
+    def get_converters(self, converters: Iterable[Type[Converter]]) -> List[Type[Converter]]:
+        """Get the converters that are allowed, in the same order.
+
+        :raises ValueError: if a converter is named that isn't one of the given converters
+        """
+        converters = list(converters)
+        unknown = ((self.converters or set()) | self.exclude_converters) - {c.__name__ for c in converters}
+        if unknown:
+            raise ValueError(f'unknown converters: {", ".join(sorted(unknown))}')
+
+        return [
+            converter
+            for converter in converters
+            if (self.converters is None or converter.__name__ in self.converters) and
+            converter.__name__ not in self.exclude_converters
+        ]
+
+    def restrict(self, dispatcher: ConverterDispatcher) -> ConverterDispatcher:
+        """Get a dispatcher of the same class with the converters that aren't allowed disabled.
+
+        All converters still match edges, so an edge a disabled converter matches is left unhandled instead of being
+        converted by a later one. If no more converters are disabled, the same dispatcher is returned. Otherwise, the
+        new dispatcher shares the statistics of an instrumented one, so they're still collected where the caller can
+        read them.
+        """
+        allowed = self.get_converters(dispatcher.converters)
+        disabled = dispatcher.disabled.union(
+            converter
+            for converter in dispatcher.converters
+            if converter not in allowed
+        )
+        if disabled == dispatcher.disabled:
+            return dispatcher
+
+        restricted = dispatcher.__class__(dispatcher.converters, disabled=disabled)
+        if dispatcher.stats is not None:
+            restricted.stats = dispatcher.stats
+        return restricted
+
+    def prune(self, triples: CompactTriples) -> CompactTriples:
+        """Prune the triples down to their k-core, if one is asked for."""
+        if self.k_core <= 1:
+            return triples
+        return prune_k_core(triples, self.k_core)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Get the specification of the filter, with only what is filtered."""
+        rv = {
+            key: sorted(value)
+            for key, value in (
+                ('namespaces', self.namespaces),
+                ('exclude_namespaces', self.exclude_namespaces),
+                ('relations', self.relations),
+                ('exclude_relations', self.exclude_relations),
+                ('converters', self.converters),
+                ('exclude_converters', self.exclude_converters),
+            )
+            if value
+        }
+        if 1 < self.k_core:
+            rv['k_core'] = self.k_core
+        return rv
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'TripleFilter':
+        """Get the filter from its specification, as from :meth:`to_json`."""
+        return cls(**data)
+
+
+def _to_set(values: Optional[Iterable[str]]) -> Optional[Collection[str]]:
+    return None if values is None else set(values)
+
+
+def _to_names(converters: Optional[Iterable[ConverterReference]]) -> Optional[Collection[str]]:
+    if converters is None:
+        return None
+    return {
+        converter if isinstance(converter, str) else converter.__name__
+        for converter in converters
+    }
+
+
+def prune_k_core(triples: CompactTriples, k: int) -> CompactTriples:
+    """Prune triples until every entity takes part in at least ``k`` of them.
+
+    Each round counts the triples of all entities at once with :func:`numpy.bincount` and drops every triple with an
+    entity that has too few. The entities and relations left without triples are dropped from the vocabularies.
+    """
+    codes = triples.triples
+    while len(codes):
+        degrees = np.bincount(codes[:, [0, 2]].ravel(), minlength=len(triples.entities))
+        keep = (k <= degrees[codes[:, 0]]) & (k <= degrees[codes[:, 2]])
+        if keep.all():
+            break
+        codes = codes[keep]
+
+    entity_ids = np.unique(codes[:, [0, 2]])
+    relation_ids = np.unique(codes[:, 1])
+    return CompactTriples(
+        entities=triples.entities[entity_ids],
+        relations=triples.relations[relation_ids],
+        triples=np.stack([
+            np.searchsorted(entity_ids, codes[:, 0]),
+            np.searchsorted(relation_ids, codes[:, 1]),
+            np.searchsorted(entity_ids, codes[:, 2]),
+        ], axis=1),
+    )
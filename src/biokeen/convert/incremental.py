@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+"""Incremental reconversion of BEL graphs that changed since their last conversion.
+
+When a BEL graph is converted incrementally, a hash of every edge is stored next to the KEEN TSV in an edge index
+(``<name>.keen.edges.tsv.gz``), together with the triple the edge was converted to. The next time, only the edges
+whose hashes are not in the index are converted. The edges whose hashes disappeared are looked up in the index, so
+their triples can be removed without converting them again. Since several edges can produce the same triple, a triple
+is only removed when no remaining edge produces it.
+
+The added and removed triples can also be written to a delta file, with one triple per line prefixed by ``+`` or
+``-``.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import pandas as pd
+from tqdm import tqdm
+
+from pybel import BELGraph
+from pybel.dsl import BaseEntity
+from .dispatch import ConverterDispatcher, default_dispatcher
+from .io import _convert_edge, to_pykeen_path
+from .labels import CachedEntityLabeler
+from .summary import TripleSummarizer, _dump_summary
+from .unhandled import UnhandledEdges
+from ..constants import EMOJI
+from ..locking import atomic_path
+from ..paths import get_keen_file_path
+
+__all__ = [
+    'PykeenDelta',
+    'get_edges_path',
+    'iterate_edge_hashes',
+    'read_edge_index',
+    'write_edge_index',
+    'update_pykeen_path',
+    'to_pykeen_delta_path',
+]
+
+logger = logging.getLogger(__name__)
+
+Triple = Tuple[str, str, str]
+EdgeIndex = Dict[str, Optional[Triple]]
+
+_CONVERTERS_HEADER = '#converters'
+
+
+class PykeenDelta(NamedTuple):
+    """The result of an incremental conversion with :func:`update_pykeen_path`."""
+
+    #: All triples after the update, sorted
+    triples: List[Triple]
+    #: The triples that were not produced before the update, sorted
+    added: List[Triple]
+    #: The triples that are no longer produced after the update, sorted
+    removed: List[Triple]
+    #: The number of edges that had to be converted
+    converted_edges: int
+    #: The summary of the triples, as from :func:`biokeen.convert.get_pykeen_summary`
+    summary: Dict
+
+
+def get_edges_path(path: str) -> str:
+    """Get the path of the edge index for a KEEN TSV file."""
+    return get_keen_file_path(path, 'edges')
+
+
+def iterate_edge_hashes(graph: BELGraph) -> Iterable[Tuple[str, BaseEntity, BaseEntity, str, Dict]]:
+    """Iterate over the edges in a BEL graph with a hash of each of them.
+
+    The hash covers the BEL of both nodes and the edge data, so it doesn't depend on the order of the edges or on the
+    graph the edge came from. The BEL of each node is computed only once.
+    """
+    bels = {}
+
+    def _get_bel(node: BaseEntity) -> str:
+        bel = bels.get(id(node))
+        if bel is None:
+            bel = bels[id(node)] = node.as_bel()
+        return bel
+
+    for u, v, key, data in graph.edges(keys=True, data=True):
+        sha = hashlib.blake2b(digest_size=16)
+        sha.update(_get_bel(u).encode('utf-8'))
+        sha.update(b'\t')
+        sha.update(_get_bel(v).encode('utf-8'))
+        sha.update(b'\t')
+        sha.update(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        yield sha.hexdigest(), u, v, key, data
+
+
+def read_edge_index(path: str, converters: Optional[str] = None) -> EdgeIndex:
+    """Read an edge index.
+
+    :param path: The path to the edge index
+    :param converters: The fingerprint of the current converters. If given and the index was made with other
+     converters, an empty index is returned since none of the triples in it can be trusted.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    rv = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        header = next(file, '').rstrip('\n').split('\t')
+        if header[0] != _CONVERTERS_HEADER or (converters is not None and header[1] != converters):
+            logger.info(f'{EMOJI} edge index was made with other converters: {path}')
+            return {}
+
+        for line in file:
+            edge_hash, *triple = line.rstrip('\n').split('\t')
+            rv[edge_hash] = tuple(triple) if triple else None
+
+    return rv
+
+
+def write_edge_index(edge_index: Mapping[str, Optional[Triple]], path: str, converters: str) -> None:
+    """Write an edge index."""
+    with atomic_path(path) as temporary_path, \
+            gzip.open(temporary_path, 'wt', encoding='utf-8', compresslevel=3) as file:
+        print(_CONVERTERS_HEADER, converters, sep='\t', file=file)
+        for edge_hash, triple in edge_index.items():
+            if triple is None:
+                print(edge_hash, file=file)
+            else:
+                print(edge_hash, *triple, sep='\t', file=file)
+
+
+def update_pykeen_path(graph: BELGraph,
+                       path: str,
+                       summary_path: Optional[str] = None,
+                       delta_path: Optional[str] = None,
+                       dispatcher: ConverterDispatcher = default_dispatcher,
+                       use_tqdm: bool = True,
+                       unhandled: Optional[UnhandledEdges] = None,
+                       ) -> PykeenDelta:
+    """Convert a BEL graph to a KEEN TSV file, only converting the edges that changed since the last time.
+
+    :param graph: A BEL graph, or an edge source from :mod:`biokeen.convert.sources`
+    :param path: The path to the KEEN TSV file
+    :param summary_path: An optional path to which the summary is written
+    :param delta_path: An optional path to which the added and removed triples are written
+    :param dispatcher: The dispatcher used to convert edges
+    :param use_tqdm: Should a progress bar be shown?
+    :param unhandled: An optional report to which the converted edges that no converter handles are added
+
+    The KEEN TSV is the same as the one from :func:`biokeen.convert.to_pykeen_df` and
+    :func:`biokeen.convert.to_pykeen_path`. If there is no edge index for the KEEN TSV yet, or it was made with other
+    converters, all edges are converted.
+    """
+    edges_path = get_edges_path(path)
+    converters = dispatcher.get_fingerprint()
+    previous = read_edge_index(edges_path, converters=converters)
+
+    counts = Counter(triple for triple in previous.values() if triple is not None)
+    before = set(counts)
+    summarizer = TripleSummarizer()
+    for triple in before:
+        summarizer.add(*triple)
+
+    if unhandled is None:
+        unhandled = UnhandledEdges()
+    edge_index, converted_edges = _update_edge_index(
+        graph, previous, counts, dispatcher, use_tqdm=use_tqdm, unhandled=unhandled,
+    )
+    unhandled.log()
+
+    after = {triple for triple, count in counts.items() if 0 < count}
+    added, removed = sorted(after - before), sorted(before - after)
+    for triple in removed:
+        summarizer.remove(*triple)
+    for triple in added:
+        summarizer.add(*triple)
+
+    triples = sorted(after)
+    if not to_pykeen_path(pd.DataFrame(triples, columns=['subject', 'predicate', 'object']), path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    write_edge_index(edge_index, edges_path, converters)
+
+    summary = summarizer.get_summary()
+    if summary_path is not None:
+        _dump_summary(summary, summary_path)
+
+    if delta_path is not None:
+        to_pykeen_delta_path(added, removed, delta_path)
+
+    logger.info(f'{EMOJI} converted {converted_edges} of {len(edge_index)} edges, {len(added)} triples added and '
+                f'{len(removed)} removed')
+
+    return PykeenDelta(
+        triples=triples,
+        added=added,
+        removed=removed,
+        converted_edges=converted_edges,
+        summary=summary,
+    )
+
+
+def _update_edge_index(graph: BELGraph, previous: EdgeIndex, counts: Counter, dispatcher: ConverterDispatcher,
+                       use_tqdm: bool = True, unhandled: Optional[UnhandledEdges] = None) -> Tuple[EdgeIndex, int]:
+    """Build the edge index for the graph, only converting edges missing from the previous one.
+
+    The counts of the triples are updated in place: incremented for each new edge and decremented for each edge in
+    the previous index that is no longer in the graph.
+    """
+    it = iterate_edge_hashes(graph)
+    if use_tqdm:
+        it = tqdm(it, total=graph.number_of_edges(), desc=f'{EMOJI} updating TSV')
+
+    edge_index = {}
+    converted_edges = 0
+    labeler = CachedEntityLabeler()
+    for edge_hash, u, v, key, data in it:
+        if edge_hash in edge_index:  # the same edge with a different key
+            continue
+
+        if edge_hash in previous:
+            edge_index[edge_hash] = previous.pop(edge_hash)
+            continue
+
+        converted_edges += 1
+        triple = edge_index[edge_hash] = _convert_edge(
+            u, v, key, data, dispatcher=dispatcher, labeler=labeler, unhandled=unhandled,
+        )
+        if triple is not None:
+            counts[triple] += 1
+
+    # the edges left over in the previous index are the ones that were removed from the graph
+    for triple in previous.values():
+        if triple is not None:
+            counts[triple] -= 1
+
+    return edge_index, converted_edges
+
+
+def to_pykeen_delta_path(added: Iterable[Triple], removed: Iterable[Triple], path: str) -> None:
+    """Write added and removed triples to a file, prefixed with ``+`` and ``-`` respectively."""
+    with atomic_path(path) as temporary_path, open(temporary_path, 'w') as file:
+        for triple in removed:
+            print('-', *triple, sep='\t', file=file)
+        for triple in added:
+            print('+', *triple, sep='\t', file=file)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""Instrumentation of the conversion of BEL edges.
+
+Conversion is not instrumented by default. To see which converters fire and where the time goes, pass an
+:class:`InstrumentedDispatcher` to any of the conversion functions, then get its statistics:
+
+>>> from biokeen.convert import DEFAULT_CONVERTERS, to_pykeen_df
+>>> from biokeen.convert.instrumentation import InstrumentedDispatcher
+>>> graph = ...  # Something from PyBEL
+>>> dispatcher = InstrumentedDispatcher(DEFAULT_CONVERTERS)
+>>> df = to_pykeen_df(graph, dispatcher=dispatcher)
+>>> dispatcher.stats.edges_per_second
+"""
+
+import json
+import time
+from typing import Any, Dict, Iterable, Optional, Type
+
+from pybel.constants import RELATION
+from pybel.dsl import BaseEntity
+from .converters import Converter
+from .dispatch import ConverterDispatcher, Triple
+from .labels import EntityLabeler, default_labeler
+from ..locking import atomic_path
+from ..paths import get_keen_file_path
+
+__all__ = [
+    'ConverterStats',
+    'ConversionStats',
+    'InstrumentedDispatcher',
+    'get_stats_path',
+]
+
+
+class ConverterStats:
+    """Statistics about a single converter."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        #: The number of edges the converter's predicate was evaluated on
+        self.evaluations = 0
+        #: The number of edges the converter's predicate accepted
+        self.matches = 0
+        #: The time spent in the converter's predicate, in seconds
+        self.predicate_time = 0.0
+        #: The time spent converting the edges the converter accepted, in seconds
+        self.convert_time = 0.0
+
+    @property
+    def time(self) -> float:
+        """Get the cumulative time spent in the converter, in seconds."""
+        return self.predicate_time + self.convert_time
+
+    def merge(self, other: 'ConverterStats') -> None:
+        """Add the statistics from another run of the same converter."""
+        self.evaluations += other.evaluations
+        self.matches += other.matches
+        self.predicate_time += other.predicate_time
+        self.convert_time += other.convert_time
+
+    def to_json(self) -> Dict[str, Any]:
+        """Get the statistics as a JSON-serializable dictionary."""
+        return {
+            'evaluations': self.evaluations,
+            'matches': self.matches,
+            'predicate_time': self.predicate_time,
+            'convert_time': self.convert_time,
+            'time': self.time,
+        }
+
+
+class ConversionStats:
+    """Statistics about the conversion of BEL edges, overall and for each converter."""
+
+    def __init__(self, converters: Iterable[Type[Converter]] = ()) -> None:
+        """Initialize empty statistics.
+
+        :param converters: The converters to report on, even if they are never evaluated
+        """
+        #: The number of edges that were converted
+        self.edges = 0
+        #: The number of edges that no converter accepted
+        self.unhandled = 0
+        #: The time spent converting edges, in seconds. When converting with several processes, this is the sum of
+        #: the time spent in each of them.
+        self.time = 0.0
+        #: The statistics for each converter, by name, in order of precedence
+        self.converters: Dict[str, ConverterStats] = {
+            converter.__name__: ConverterStats()
+            for converter in converters
+        }
+
+    @property
+    def edges_per_second(self) -> Optional[float]:
+        """Get the number of edges converted per second, if any time was spent."""
+        if not self.time:
+            return None
+        return self.edges / self.time
+
+    def get_converter_stats(self, converter: Type[Converter]) -> ConverterStats:
+        """Get the statistics for the given converter."""
+        stats = self.converters.get(converter.__name__)
+        if stats is None:
+            stats = self.converters[converter.__name__] = ConverterStats()
+        return stats
+
+    def merge(self, other: 'ConversionStats') -> None:
+        """Add the statistics from another conversion, like one in a worker process."""
+        self.edges += other.edges
+        self.unhandled += other.unhandled
+        self.time += other.time
+        for name, converter_stats in other.converters.items():
+            self.converters.setdefault(name, ConverterStats()).merge(converter_stats)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Get the statistics as a JSON-serializable dictionary."""
+        return {
+            'edges': self.edges,
+            'unhandled': self.unhandled,
+            'time': self.time,
+            'edges_per_second': self.edges_per_second,
+            'converters': {
+                name: converter_stats.to_json()
+                for name, converter_stats in self.converters.items()
+            },
+        }
+
+    def to_json_path(self, path: str, indent: int = 2) -> None:
+        """Write the statistics to a JSON file."""
+        with atomic_path(path) as temporary_path, open(temporary_path, 'w') as file:
+            json.dump(self.to_json(), file, indent=indent)
+
+
+class InstrumentedDispatcher(ConverterDispatcher):
+    """A dispatcher that collects statistics about the edges it converts in :attr:`stats`.
+
+    When it is sent to worker processes, each copy starts with empty statistics. The conversion functions merge them
+    back into the original's.
+    """
+
+    def __init__(self, converters: Iterable[Type[Converter]],
+                 disabled: Optional[Iterable[Type[Converter]]] = None) -> None:
+        """Build an instrumented dispatcher.
+
+        :param converters: The converters to dispatch to, in order of precedence
+        :param disabled: Converters that still match edges, but don't convert them
+        """
+        super().__init__(converters, disabled=disabled)
+        self.stats = ConversionStats(self.converters)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Get the state for pickling, with empty statistics."""
+        state = self.__dict__.copy()
+        state['stats'] = ConversionStats(self.converters)
+        return state
+
+    def get_converter(self, u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict) -> Optional[Type[Converter]]:
+        """Get the first converter whose predicate accepts the edge, if any, timing each predicate."""
+        for converter in self.get_candidates(edge_data[RELATION], u.__class__, v.__class__):
+            converter_stats = self.stats.get_converter_stats(converter)
+            start = time.perf_counter()
+            matched = converter.predicate(u, v, key, edge_data)
+            converter_stats.predicate_time += time.perf_counter() - start
+            converter_stats.evaluations += 1
+            if matched:
+                converter_stats.matches += 1
+                return converter
+
+    def convert(self, u: BaseEntity, v: BaseEntity, key: str, edge_data: Dict,
+                labeler: EntityLabeler = default_labeler) -> Optional[Triple]:
+        """Convert a BEL edge with the first converter that accepts it, if any, timing the conversion."""
+        start = time.perf_counter()
+        converter = self.get_converter(u, v, key, edge_data)
+        if converter is None or converter in self.disabled:
+            triple = None
+            self.stats.unhandled += 1
+        else:
+            convert_start = time.perf_counter()
+            triple = converter.convert(u, v, key, edge_data, labeler=labeler)
+            self.stats.get_converter_stats(converter).convert_time += time.perf_counter() - convert_start
+
+        self.stats.edges += 1
+        self.stats.time += time.perf_counter() - start
+        return triple
+
+
+def get_stats_path(path: str) -> str:
+    """Get the path of the conversion statistics for a KEEN TSV file."""
+    return get_keen_file_path(path, 'stats')
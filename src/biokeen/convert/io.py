@@ -2,38 +2,73 @@
 
 """Input and output for BEL conversion."""
 
+import collections
+import csv
+import hashlib
 import itertools as itt
-import json
 import logging
-from collections import Counter
-from typing import Dict, Optional, Tuple
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
 from pybel import BELGraph
 from pybel.dsl import BaseEntity
-from .converters import (
-    AssociationConverter, CorrelationConverter, DecreasesAmountConverter, DrugIndicationConverter,
-    DrugSideEffectConverter, EquivalenceConverter, IncreasesAmountConverter, IsAConverter,
-    ListComplexHasComponentConverter, MiRNADecreasesExpressionConverter, MiRNADirectlyDecreasesExpressionConverter,
-    NamedComplexHasComponentConverter, PartOfNamedComplexConverter, ProteinPartOfBiologicalProcess,
-    RegulatesActivityConverter, RegulatesAmountConverter, SubprocessPartOfBiologicalProcess,
-)
+from .columnar import from_pykeen_columnar_path, to_pykeen_columnar_path
+from .dispatch import ConverterDispatcher, default_dispatcher
+from .filters import TripleFilter
+from .labels import CachedEntityLabeler, EntityLabeler, default_labeler
+from .summary import TripleSummarizer, _dump_summary, get_pykeen_summary
+from .triples import COLUMNS, CompactTriples
+from .unhandled import UnhandledEdges
 from ..constants import EMOJI
+from ..locking import atomic_path
+from ..paths import get_keen_file_path
 
 __all__ = [
+    'KeenDialect',
     'to_pykeen_path',
     'to_pykeen_df',
-    'get_pykeen_summary',
+    'to_pykeen_triples',
     'to_pykeen_summary_path',
+    'stream_pykeen_path',
     'get_triple',
+    'get_sidecar_path',
+    'to_pykeen_sidecar_path',
+    'from_pykeen_sidecar_path',
+    'load_pykeen_path',
+    'load_pykeen_triples',
 ]
 
 logger = logging.getLogger(__name__)
 
+#: The number of edges sent to each process at a time if the number of edges isn't known in advance
+DEFAULT_CHUNK_SIZE = 10000
 
-def to_pykeen_path(df: pd.DataFrame, path: str) -> bool:
+
+class KeenDialect(csv.Dialect):
+    """How KEEN TSV files are written and read.
+
+    Labels are never quoted, so a KEEN TSV gives the same labels as its sidecar or columnar file, including when
+    it's read with :func:`numpy.loadtxt` like PyKEEN does. Tabs, line breaks, and backslashes in labels are escaped
+    with a backslash.
+    """
+
+    delimiter = '\t'
+    quoting = csv.QUOTE_NONE
+    quotechar = None
+    escapechar = '\\'
+    doublequote = False
+    skipinitialspace = False
+    lineterminator = '\n'
+    strict = False
+
+
+def to_pykeen_path(df: Union[pd.DataFrame, CompactTriples], path: str, columnar: Optional[str] = None) -> bool:
     """Write the relationships in the BEL graph to a KEEN TSV file.
 
     If you have a BEL graph, first do:
@@ -42,78 +77,377 @@ def to_pykeen_path(df: pd.DataFrame, path: str) -> bool:
     >>> graph = ...  # Something from PyBEL
     >>> df = to_pykeen_df(graph)
     >>> to_pykeen_path(df, 'graph.keen.tsv')
+
+    The triples can also be given as :class:`biokeen.convert.CompactTriples`.
+
+    :param columnar: The format of a columnar file to write next to the TSV, either ``parquet`` or ``feather``. See
+     :mod:`biokeen.convert.columnar`.
     """
+    triples = df if isinstance(df, CompactTriples) else None
+    if triples is not None:
+        df = triples.to_df()
     if len(df.index) == 0:
         return False
-    df.to_csv(path, sep='\t', index=None, header=None)
+    with atomic_path(path) as temporary_path, open(temporary_path, 'w', newline='') as file:
+        csv.writer(file, KeenDialect).writerows(df.itertuples(index=False, name=None))
+
+    if columnar is not None:
+        to_pykeen_columnar_path(path, triples if triples is not None else CompactTriples.from_df(df), fmt=columnar)
     return True
 
 
-def get_pykeen_summary(df: pd.DataFrame) -> Dict:
-    """Summarize a KEEN dataframe."""
-    entity_count = Counter(itt.chain(df[df.columns[0]], df[df.columns[2]]))
-    return {
-        'namespaces': Counter(
-            element.split(':')[0]
-            for element in itt.chain(df[df.columns[0]], df[df.columns[2]])
-        ),
-        'entities': len(entity_count),
-        'relations': len(df.index),
-    }
+def get_sidecar_path(path: str) -> str:
+    """Get the path of the binary sidecar for a KEEN TSV file."""
+    return get_keen_file_path(path, 'sidecar')
 
 
-def to_pykeen_summary_path(df: pd.DataFrame, path: str, indent=2, **kwargs):
-    """Write the summary of a KEEN dataframe to a file."""
-    with open(path, 'w') as file:
-        json.dump(get_pykeen_summary(df), file, indent=indent, **kwargs)
+def to_pykeen_sidecar_path(path: str, triples: Union[None, np.ndarray, CompactTriples] = None) -> str:
+    """Write a binary sidecar next to a KEEN TSV file so it can be loaded quickly later.
 
+    :param path: The path to the KEEN TSV file
+    :param triples: The triples in the KEEN TSV file, either compact or as an array of labels. If not given, they are
+     read from it.
+    :return: The path to the sidecar
 
-def to_pykeen_df(graph: BELGraph, use_tqdm: bool = True) -> pd.DataFrame:
-    """Get a DataFrame representing the triples."""
-    it = graph.edges(keys=True)
+    The triples are stored compactly, as in :class:`biokeen.convert.CompactTriples`. The size and modification time
+    of the TSV are stored alongside them so a stale sidecar can be detected.
+    """
+    if triples is None:
+        triples = _read_pykeen_tsv(path)
+    elif not isinstance(triples, CompactTriples):
+        triples = CompactTriples.from_labels(triples)
+    stat = os.stat(path)
+    sidecar_path = get_sidecar_path(path)
+    with atomic_path(sidecar_path) as temporary_path, open(temporary_path, 'wb') as file:
+        np.savez(
+            file,
+            tsv_size=np.int64(stat.st_size),
+            tsv_mtime_ns=np.int64(stat.st_mtime_ns),
+            **triples.to_arrays(),
+        )
+    return sidecar_path
+
+
+def from_pykeen_sidecar_path(path: str) -> Optional[np.ndarray]:
+    """Load the triples from the binary sidecar of a KEEN TSV file if it exists and matches the TSV."""
+    triples = _read_pykeen_sidecar(path)
+    if triples is None:
+        return None
+    return triples.to_labels()
+
+
+def _read_pykeen_sidecar(path: str) -> Optional[CompactTriples]:
+    sidecar_path = get_sidecar_path(path)
+    if not os.path.exists(sidecar_path):
+        return None
+
+    stat = os.stat(path)
+    try:
+        with np.load(sidecar_path, allow_pickle=False) as sidecar:
+            if sidecar['tsv_size'] != stat.st_size or sidecar['tsv_mtime_ns'] != stat.st_mtime_ns:
+                logger.debug(f'{EMOJI} sidecar is out of date: {sidecar_path}')
+                return None
+            return CompactTriples.from_arrays(sidecar)
+    except (OSError, ValueError, KeyError):
+        logger.warning(f'{EMOJI} could not read sidecar: {sidecar_path}')
+        return None
+
+
+def load_pykeen_triples(path: str) -> CompactTriples:
+    """Load the triples from a KEEN TSV file compactly, using its columnar file or binary sidecar if it is up to date.
+
+    If neither is, the TSV is parsed and a new sidecar is written for next time. See :mod:`biokeen.convert.columnar`
+    for columnar files.
+    """
+    triples = from_pykeen_columnar_path(path)
+    if triples is not None:
+        return triples
+
+    triples = _read_pykeen_sidecar(path)
+    if triples is not None:
+        return triples
+
+    triples = _read_pykeen_tsv(path)
+    try:
+        to_pykeen_sidecar_path(path, triples)
+    except OSError:
+        logger.warning(f'{EMOJI} could not write sidecar for {path}')
+    return triples
 
-    if use_tqdm:
-        it = tqdm(it, total=graph.number_of_edges(), desc=f'{EMOJI} preparing TSV')
 
-    triples = (
-        get_triple(graph, u, v, key)
-        for u, v, key in it
+def load_pykeen_path(path: str) -> np.ndarray:
+    """Load the triples from a KEEN TSV file as an (n, 3) array of labels.
+
+    The columnar file or the sidecar of the KEEN TSV is used if possible. See :func:`load_pykeen_triples`.
+    """
+    return load_pykeen_triples(path).to_labels()
+
+
+def _read_pykeen_tsv(path: str) -> CompactTriples:
+    """Read a KEEN TSV file like :func:`numpy.loadtxt` does, without building a fixed-width string array."""
+    if os.path.getsize(path) == 0:
+        return CompactTriples.from_labels([])
+    df = pd.read_csv(
+        path,
+        dialect=KeenDialect,
+        header=None,
+        names=COLUMNS,
+        dtype=object,
+        na_filter=False,
     )
+    return CompactTriples.from_df(df)
+
+
+def to_pykeen_summary_path(df: Union[pd.DataFrame, CompactTriples], path: str, indent=2,
+                           triple_filter: Optional[TripleFilter] = None, **kwargs):
+    """Write the summary of a KEEN dataframe or compact triples to a file.
+
+    :param triple_filter: The filter the triples were converted with, which is recorded in the summary
+    """
+    _dump_summary(get_pykeen_summary(df, triple_filter=triple_filter), path, indent=indent, **kwargs)
+
+
+def stream_pykeen_path(graph: BELGraph, path: str, summary_path: Optional[str] = None, use_tqdm: bool = True,
+                       dispatcher: ConverterDispatcher = default_dispatcher,
+                       unhandled: Optional[UnhandledEdges] = None,
+                       triple_filter: Optional[TripleFilter] = None) -> Dict:
+    """Write the triples in the BEL graph directly to a KEEN TSV file without building a DataFrame.
+
+    :param graph: A BEL graph, or an edge source from :mod:`biokeen.convert.sources`
+    :param path: The path to the KEEN TSV file
+    :param summary_path: An optional path to which the summary is written
+    :param use_tqdm: Should a progress bar be shown?
+    :param dispatcher: The dispatcher used to convert edges
+    :param unhandled: An optional report to which the edges no converter handles are added
+    :param triple_filter: An optional filter of the triples. Since the triples are never all in memory, it can't
+     prune them to a k-core.
+    :return: The summary of the triples, as from :func:`get_pykeen_summary`
+
+    Triples are written in the order their edges are first encountered. Duplicates are dropped by keeping only a
+    fixed-size digest of each triple that has been written, so the triples themselves are never held in memory. If no
+    triples are generated, no file is left behind.
+
+    >>> from biokeen.convert import stream_pykeen_path
+    >>> graph = ...  # Something from PyBEL
+    >>> summary = stream_pykeen_path(graph, 'graph.keen.tsv', 'graph.keen.summary.json')
+    """
+    _check_streamable(triple_filter)
+    if triple_filter is not None:
+        dispatcher = triple_filter.restrict(dispatcher)
+    summarizer = TripleSummarizer()
+    seen = set()
+    if unhandled is None:
+        unhandled = UnhandledEdges()
+
+    triples = _iterate_triples(
+        graph, use_tqdm=use_tqdm, dispatcher=dispatcher, unhandled=unhandled, triple_filter=triple_filter,
+    )
+    with atomic_path(path) as temporary_path:
+        with open(temporary_path, 'w', newline='') as file:
+            writer = csv.writer(file, KeenDialect)
+            for triple in triples:
+                if triple is None:
+                    continue
+
+                digest = _get_triple_digest(triple)
+                if digest in seen:
+                    continue
+                seen.add(digest)
+
+                writer.writerow(triple)
+                summarizer.add(*triple)
+
+        if not summarizer.relations:
+            os.remove(temporary_path)
+
+    unhandled.log()
+    if not summarizer.relations and os.path.exists(path):
+        os.remove(path)
+
+    summary = summarizer.get_summary(triple_filter=triple_filter)
+    if summary_path is not None:
+        _dump_summary(summary, summary_path)
+    return summary
+
+
+def _check_streamable(triple_filter: Optional[TripleFilter]) -> None:
+    """Raise an error if the filter can only be applied once all triples are in memory."""
+    if triple_filter is not None and 1 < triple_filter.k_core:
+        raise ValueError('triples can only be pruned to a k-core when they are converted in memory')
+
+
+def _get_triple_digest(triple: Tuple[str, str, str]) -> bytes:
+    return hashlib.blake2b('\t'.join(triple).encode('utf-8'), digest_size=16).digest()
+
+
+def to_pykeen_df(graph: BELGraph, use_tqdm: bool = True, n_jobs: int = 1, chunk_size: Optional[int] = None,
+                 dispatcher: ConverterDispatcher = default_dispatcher,
+                 unhandled: Optional[UnhandledEdges] = None,
+                 triple_filter: Optional[TripleFilter] = None) -> pd.DataFrame:
+    """Get a DataFrame representing the triples.
+
+    :param graph: A BEL graph, or an edge source from :mod:`biokeen.convert.sources`
+    :param use_tqdm: Should a progress bar be shown?
+    :param n_jobs: The number of processes used for conversion. If less than one, uses all available cores.
+    :param chunk_size: The number of edges sent to each process at a time. Defaults to splitting the edges into four
+     chunks per process, or to :data:`DEFAULT_CHUNK_SIZE` if the number of edges isn't known in advance.
+    :param dispatcher: The dispatcher used to convert edges. Pass a
+     :class:`biokeen.convert.instrumentation.InstrumentedDispatcher` to collect statistics about the conversion.
+    :param unhandled: An optional report to which the edges no converter handles are added. Either way, a single
+     warning summarizes them.
+    :param triple_filter: An optional filter of the namespaces, relations, and converters, and of the entities by
+     their degree, applied during conversion. See :mod:`biokeen.convert.filters`.
+
+    The triples are deduplicated and sorted, so the result does not depend on the number of processes.
+    """
+    return to_pykeen_triples(
+        graph, use_tqdm=use_tqdm, n_jobs=n_jobs, chunk_size=chunk_size, dispatcher=dispatcher, unhandled=unhandled,
+        triple_filter=triple_filter,
+    ).to_df()
+
+
+def to_pykeen_triples(graph: BELGraph, use_tqdm: bool = True, n_jobs: int = 1, chunk_size: Optional[int] = None,
+                      dispatcher: ConverterDispatcher = default_dispatcher,
+                      unhandled: Optional[UnhandledEdges] = None,
+                      triple_filter: Optional[TripleFilter] = None) -> CompactTriples:
+    """Get the triples compactly, as indexes into vocabularies of their entities and relations.
+
+    Takes the same arguments as :func:`to_pykeen_df`, and the triples are in the same order.
+
+    If the filter leaves out some of the converters, a new dispatcher is made with them disabled. To collect statistics
+    about the conversion, pass an instrumented dispatcher that's already restricted with
+    :meth:`biokeen.convert.filters.TripleFilter.restrict`.
+    """
+    if n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+
+    if unhandled is None:
+        unhandled = UnhandledEdges()
+
+    if triple_filter is not None:
+        dispatcher = triple_filter.restrict(dispatcher)
+
+    if n_jobs == 1:
+        triples = _iterate_triples(
+            graph, use_tqdm=use_tqdm, dispatcher=dispatcher, unhandled=unhandled, triple_filter=triple_filter,
+        )
+    else:
+        triples = _iterate_triples_parallel(
+            graph, n_jobs=n_jobs, chunk_size=chunk_size, use_tqdm=use_tqdm, dispatcher=dispatcher,
+            unhandled=unhandled, triple_filter=triple_filter,
+        )
 
     # clean duplicates and Nones
-    triples = list(sorted({triple for triple in triples if triple is not None}))
-
-    return pd.DataFrame(triples, columns=['subject', 'predicate', 'object'])
-
-
-def get_triple(graph: BELGraph, u: BaseEntity, v: BaseEntity, key: str) -> Optional[Tuple[str, str, str]]:  # noqa: C901
-    """Get the triples' strings that should be written to the file."""
-    data = graph[u][v][key]
-
-    # order is important
-    converters = [
-        NamedComplexHasComponentConverter,
-        ListComplexHasComponentConverter,
-        PartOfNamedComplexConverter,
-        SubprocessPartOfBiologicalProcess,
-        ProteinPartOfBiologicalProcess,
-        RegulatesActivityConverter,
-        MiRNADecreasesExpressionConverter,
-        MiRNADirectlyDecreasesExpressionConverter,
-        IsAConverter,
-        EquivalenceConverter,
-        CorrelationConverter,
-        AssociationConverter,
-        DrugIndicationConverter,
-        DrugSideEffectConverter,
-        RegulatesAmountConverter,
-        IncreasesAmountConverter,
-        DecreasesAmountConverter,
-    ]
-
-    for converter in converters:
-        if converter.predicate(u, v, key, data):
-            return converter.convert(u, v, key, data)
-
-    logger.warning(f'{EMOJI} unhandled: {graph.edge_to_bel(u, v, data)}')
-    return None
+    triples = {triple for triple in triples if triple is not None}
+    unhandled.log()
+
+    triples = CompactTriples.from_labels(triples)
+    if triple_filter is not None:
+        triples = triple_filter.prune(triples)
+    return triples
+
+
+def _iterate_triples(graph: BELGraph, use_tqdm: bool = True, dispatcher: ConverterDispatcher = default_dispatcher,
+                     unhandled: Optional[UnhandledEdges] = None,
+                     triple_filter: Optional[TripleFilter] = None) -> Iterable[Optional[Tuple[str, str, str]]]:
+    """Convert each edge, yielding none for the ones that aren't handled or are filtered out.
+
+    The dispatcher should already be restricted with the filter, which only filters the converted triples here.
+    """
+    it = graph.edges(keys=True, data=True)
+
+    if use_tqdm:
+        it = tqdm(it, total=graph.number_of_edges(), desc=f'{EMOJI} preparing TSV')
+
+    return _convert_edges(it, dispatcher=dispatcher, unhandled=unhandled, triple_filter=triple_filter)
+
+
+def _convert_edges(edges: Iterable[Tuple[BaseEntity, BaseEntity, str, Dict]],
+                   dispatcher: ConverterDispatcher = default_dispatcher,
+                   unhandled: Optional[UnhandledEdges] = None,
+                   triple_filter: Optional[TripleFilter] = None) -> Iterable[Optional[Tuple[str, str, str]]]:
+    if triple_filter is not None and not triple_filter.filters_triples:
+        triple_filter = None
+
+    labeler = CachedEntityLabeler()
+    for u, v, key, data in edges:
+        triple = _convert_edge(u, v, key, data, dispatcher=dispatcher, labeler=labeler, unhandled=unhandled)
+        if triple is not None and triple_filter is not None and not triple_filter.accepts(triple):
+            triple = None
+        yield triple
+
+
+def _iterate_triples_parallel(graph: BELGraph, n_jobs: int, chunk_size: Optional[int] = None, use_tqdm: bool = True,
+                              dispatcher: ConverterDispatcher = default_dispatcher,
+                              unhandled: Optional[UnhandledEdges] = None,
+                              triple_filter: Optional[TripleFilter] = None) -> Iterable[Tuple[str, str, str]]:
+    number_of_edges = graph.number_of_edges()
+    if chunk_size is None and number_of_edges is None:
+        chunk_size = DEFAULT_CHUNK_SIZE
+    elif chunk_size is None:
+        chunk_size = max(1, math.ceil(number_of_edges / (4 * n_jobs)))
+
+    chunks = _iterate_chunks(graph.edges(keys=True, data=True), chunk_size)
+
+    progress = tqdm(total=number_of_edges, desc=f'{EMOJI} preparing TSV ({n_jobs} processes)', disable=not use_tqdm)
+    with progress, ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        # unlike executor.map, which submits every chunk up front, only a couple of chunks per process are in flight,
+        # so the edges and triples of the whole graph are never queued at once
+        futures = collections.deque(
+            executor.submit(_convert_chunk, chunk, dispatcher, triple_filter)
+            for chunk in itt.islice(chunks, 2 * n_jobs)
+        )
+        while futures:
+            number_converted, triples, stats, chunk_unhandled = futures.popleft().result()
+            for chunk in itt.islice(chunks, 1):
+                futures.append(executor.submit(_convert_chunk, chunk, dispatcher, triple_filter))
+
+            progress.update(number_converted)
+            if stats is not None:
+                dispatcher.stats.merge(stats)
+            if unhandled is not None:
+                unhandled.merge(chunk_unhandled)
+            yield from triples
+
+
+def _iterate_chunks(it: Iterable, chunk_size: int) -> Iterable[List]:
+    it = iter(it)
+    while True:
+        chunk = list(itt.islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _convert_chunk(edges: List[Tuple[BaseEntity, BaseEntity, str, Dict]],
+                   dispatcher: ConverterDispatcher = default_dispatcher,
+                   triple_filter: Optional[TripleFilter] = None):
+    """Convert a chunk of edges in a worker process.
+
+    Returns the number of edges, the unique triples that pass the filter, the statistics from the dispatcher if it is
+    instrumented, and the report of the unhandled edges.
+    """
+    unhandled = UnhandledEdges()
+    triples = set(_convert_edges(edges, dispatcher=dispatcher, unhandled=unhandled, triple_filter=triple_filter))
+    triples.discard(None)
+    return len(edges), triples, dispatcher.stats, unhandled
+
+
+def get_triple(graph: BELGraph, u: BaseEntity, v: BaseEntity, key: str,
+               dispatcher: ConverterDispatcher = default_dispatcher,
+               unhandled: Optional[UnhandledEdges] = None) -> Optional[Tuple[str, str, str]]:
+    """Get the triples' strings that should be written to the file.
+
+    :param unhandled: An optional report to which the edge is added if no converter handles it
+    """
+    return _convert_edge(u, v, key, graph[u][v][key], dispatcher=dispatcher, unhandled=unhandled)
+
+
+def _convert_edge(u: BaseEntity, v: BaseEntity, key: str, data: Dict,
+                  dispatcher: ConverterDispatcher = default_dispatcher,
+                  labeler: EntityLabeler = default_labeler,
+                  unhandled: Optional[UnhandledEdges] = None) -> Optional[Tuple[str, str, str]]:
+    triple = dispatcher.convert(u, v, key, data, labeler=labeler)
+    if triple is None and unhandled is not None:
+        unhandled.add(u, v, data)
+    return triple
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""Labels for the entities in KEEN triples.
+
+Most entities are labeled by their CURIE, like ``HGNC:1234``. Complexes defined by their members are labeled by their
+BEL. Since hub nodes take part in many edges, a :class:`CachedEntityLabeler` can be used for the duration of a
+conversion so each node is only labeled once and equal labels share the same string.
+"""
+
+import sys
+from typing import Dict, Tuple
+
+from pybel.dsl import BaseEntity
+
+__all__ = [
+    'EntityLabeler',
+    'CachedEntityLabeler',
+    'default_labeler',
+]
+
+
+class EntityLabeler:
+    """Labels entities without caching."""
+
+    def get_curie(self, node: BaseEntity) -> str:
+        """Get the CURIE of a node, preferring its identifier over its name."""
+        return f'{node.namespace}:{node.identifier or node.name}'
+
+    def get_bel(self, node: BaseEntity) -> str:
+        """Get the BEL of a node."""
+        return str(node)
+
+
+class CachedEntityLabeler(EntityLabeler):
+    """Labels entities, remembering the label of each node and interning it.
+
+    Nodes are looked up by identity rather than by equality, since hashing a PyBEL node means computing its BEL. The
+    labeler holds a reference to each node it has seen so their identities are not reused, so it should only live as
+    long as a single conversion.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._curies: Dict[int, Tuple[BaseEntity, str]] = {}
+        self._bels: Dict[int, Tuple[BaseEntity, str]] = {}
+
+    def get_curie(self, node: BaseEntity) -> str:
+        """Get the CURIE of a node, preferring its identifier over its name."""
+        entry = self._curies.get(id(node))
+        if entry is None:
+            entry = self._curies[id(node)] = node, sys.intern(super().get_curie(node))
+        return entry[1]
+
+    def get_bel(self, node: BaseEntity) -> str:
+        """Get the BEL of a node."""
+        entry = self._bels.get(id(node))
+        if entry is None:
+            entry = self._bels[id(node)] = node, sys.intern(super().get_bel(node))
+        return entry[1]
+
+    def __len__(self) -> int:
+        """Get the number of labels that are cached."""
+        return len(self._curies) + len(self._bels)
+
+
+#: A labeler that doesn't cache, for converting single edges
+default_labeler = EntityLabeler()
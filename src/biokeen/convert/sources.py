@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+"""Sources of BEL edges that can be converted without building a BEL graph.
+
+Conversion only iterates over the edges of a BEL graph once, with ``graph.edges(keys=True, data=True)``, and uses
+``graph.number_of_edges()`` for progress bars and to split the edges into chunks. An :class:`EdgeSource` provides the
+same two methods, so it can be passed to any of the conversion functions in place of a :class:`pybel.BELGraph`:
+
+>>> from biokeen.convert import to_pykeen_df
+>>> from biokeen.convert.sources import get_graph_cache_edge_source
+>>> df = to_pykeen_df(get_graph_cache_edge_source('hippie.bel.json'))
+
+The edge sources for cached BEL graphs read the nodes into memory, then read the links one at a time, so memory is
+bounded by the nodes and a single link. Like :func:`pybel.from_json`, they also produce the edges that PyBEL adds
+implicitly for the nodes, like the ``hasComponent`` edges of a complex, so they produce the same edges as the graph
+that would have been built.
+"""
+
+import gzip
+import json
+import logging
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, TextIO, Tuple
+
+from pybel import BELGraph, from_json_path
+from pybel.dsl import BaseEntity
+from pybel.io.utils import ensure_version
+from pybel.tokens import parse_result_to_dsl
+from ..constants import EMOJI
+from ..graph_cache import NODELINK_LINES_GZ, _load_graph_metadata, get_graph_cache_format, iterate_jsonl_gz
+
+__all__ = [
+    'EdgeSource',
+    'NodeLinkJSONEdgeSource',
+    'NodeLinkLinesEdgeSource',
+    'get_graph_cache_edge_source',
+]
+
+logger = logging.getLogger(__name__)
+
+Edge = Tuple[BaseEntity, BaseEntity, str, Dict]
+ImplicitEdges = Dict[Tuple[int, int, str], Edge]
+
+
+class EdgeSource(ABC):
+    """A source of BEL edges that can be converted in place of a BEL graph."""
+
+    def edges(self, keys: bool = True, data: bool = True) -> Iterator[Edge]:
+        """Iterate over the edges with their keys and data, like the edges of a BEL graph."""
+        if not (keys and data):
+            raise ValueError('edge sources only iterate over edges with their keys and data')
+        return self.iterate_edges()
+
+    @abstractmethod
+    def iterate_edges(self) -> Iterator[Edge]:
+        """Iterate over the edges as ``(u, v, key, data)``."""
+
+    def number_of_edges(self) -> Optional[int]:
+        """Get the number of edges, or an estimate of it, if it is known without iterating over them."""
+        return None
+
+
+class NodeLinkJSONEdgeSource(EdgeSource):
+    """The edges of a BEL graph cached as PyBEL's Node-Link JSON (``.bel.json``), read one at a time."""
+
+    def __init__(self, path: str, check_version: bool = True, chunk_size: int = 2 ** 16) -> None:
+        """Read the edges from the given file when they're iterated over.
+
+        :param path: The path to the Node-Link JSON file
+        :param check_version: Should the version of PyBEL that wrote the file be checked?
+        :param chunk_size: The number of characters read at a time
+        """
+        self.path = path
+        self.check_version = check_version
+        self.chunk_size = chunk_size
+
+    def iterate_edges(self) -> Iterator[Edge]:
+        """Iterate over the edges, reading the nodes first and then the links one at a time."""
+        metadata = {}
+        nodes = implicit_edges = None
+        with open(self.path) as file:
+            reader = _JSONReader(file, chunk_size=self.chunk_size)
+            for key in reader.iterate_object():
+                if key == 'nodes':
+                    nodes, implicit_edges = _read_nodes(
+                        (parse_result_to_dsl(node) for node in reader.iterate_array()),
+                        metadata=metadata,
+                        check_version=self.check_version,
+                    )
+                elif key != 'links':
+                    metadata[key] = reader.decode()
+                elif nodes is None:
+                    break
+                else:
+                    links = (
+                        (link.pop('source'), link.pop('target'), link.pop('key'), link)
+                        for link in reader.iterate_array()
+                    )
+                    yield from _iterate_links(nodes, implicit_edges, links)
+            else:
+                return
+
+        # PyBEL writes the nodes before the links, so this only happens for files written some other way
+        logger.debug(f'{EMOJI} links come before nodes, so the whole graph is built: {self.path}')
+        yield from from_json_path(self.path, check_version=self.check_version).edges(keys=True, data=True)
+
+
+class NodeLinkLinesEdgeSource(EdgeSource):
+    """The edges of a BEL graph cached as BioKEEN's Node-Link JSON lines (``.bel.jsonl.gz``), read one at a time."""
+
+    def __init__(self, path: str, check_version: bool = True) -> None:
+        """Read the edges from the given file when they're iterated over.
+
+        :param path: The path to the gzip-compressed Node-Link JSON lines file
+        :param check_version: Should the version of PyBEL that wrote the file be checked?
+        """
+        self.path = path
+        self.check_version = check_version
+        self._number_of_links = None
+
+    def iterate_edges(self) -> Iterator[Edge]:
+        """Iterate over the edges, reading the nodes first and then the links one at a time."""
+        with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+            header, nodes, links = iterate_jsonl_gz(file)
+            self._number_of_links = header['links']
+            nodes, implicit_edges = _read_nodes(nodes, metadata=header, check_version=self.check_version)
+            yield from _iterate_links(nodes, implicit_edges, links)
+
+    def number_of_edges(self) -> Optional[int]:
+        """Get the number of links in the file, without the edges PyBEL adds implicitly for the nodes."""
+        if self._number_of_links is None:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+                self._number_of_links = json.loads(next(file))['links']
+        return self._number_of_links
+
+
+def get_graph_cache_edge_source(path: str, check_version: bool = True) -> EdgeSource:
+    """Get the edge source for a cached BEL graph in any of the formats from :mod:`biokeen.graph_cache`."""
+    if get_graph_cache_format(path) == NODELINK_LINES_GZ:
+        return NodeLinkLinesEdgeSource(path, check_version=check_version)
+    return NodeLinkJSONEdgeSource(path, check_version=check_version)
+
+
+def _read_nodes(nodes: Iterable[BaseEntity], metadata: Mapping[str, Any],
+                check_version: bool = True) -> Tuple[List[BaseEntity], ImplicitEdges]:
+    """Add the nodes to an otherwise empty BEL graph, so PyBEL adds the edges it implies for them.
+
+    :return: The nodes in the same order, as the graph's instances of them, and the implicit edges by the identities
+     of their nodes and their keys
+    """
+    graph = BELGraph()
+    graph.graph = _load_graph_metadata(metadata.get('graph', {}))
+    ensure_version(graph, check_version=check_version)
+
+    nodes = [graph.add_node_from_data(node) for node in nodes]
+
+    # a node could have been added implicitly before its own entry, so make sure to use the graph's instance
+    instances = {node: node for node in graph}
+    nodes = [instances[node] for node in nodes]
+
+    implicit_edges = {
+        (id(u), id(v), key): (u, v, key, data)
+        for u, v, key, data in graph.edges(keys=True, data=True)
+    }
+    return nodes, implicit_edges
+
+
+def _iterate_links(nodes: List[BaseEntity], implicit_edges: ImplicitEdges,
+                   links: Iterable[Tuple[int, int, str, Dict]]) -> Iterator[Edge]:
+    """Iterate over the links, then the implicit edges that weren't also links, like :func:`pybel.from_json`."""
+    for source, target, key, data in links:
+        u, v = nodes[source], nodes[target]
+        implicit_edge = implicit_edges.pop((id(u), id(v), key), None)
+        if implicit_edge is not None:
+            data = {**implicit_edge[3], **data}
+        yield u, v, key, data
+
+    yield from implicit_edges.values()
+
+
+_NON_WHITESPACE = re.compile(r'\S')
+_DECODER = json.JSONDecoder()
+
+
+class _JSONReader:
+    """Reads a JSON document from a file one value at a time, holding only part of it in memory."""
+
+    def __init__(self, file: TextIO, chunk_size: int = 2 ** 16) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def _read(self, size: Optional[int] = None) -> bool:
+        """Read more of the file, dropping what was already consumed. Returns false at the end of the file."""
+        if self.eof:
+            return False
+        chunk = self.file.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and get the next character without consuming it, or an empty string at the end."""
+        while True:
+            match = _NON_WHITESPACE.search(self.buffer, self.position)
+            if match is not None:
+                self.position = match.start()
+                return self.buffer[self.position]
+            self.position = len(self.buffer)
+            if not self._read():
+                return ''
+
+    def expect(self, char: str) -> None:
+        """Consume the given character, after any whitespace."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f'expected {char!r} but found {found!r}')
+        self.position += 1
+
+    def decode(self) -> Any:
+        """Decode the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                pass
+            else:
+                # a number at the end of the buffer might continue in the rest of the file
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+
+            # read as much again as is left in the buffer, so a long value isn't decoded over and over
+            if not self._read(max(self.chunk_size, len(self.buffer) - self.position)):
+                value, self.position = _DECODER.raw_decode(self.buffer, self.position)
+                return value
+
+    def iterate_array(self) -> Iterator[Any]:
+        """Iterate over the values of the next array."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self.decode()
+            if self._consume_separator(']'):
+                return
+
+    def iterate_object(self) -> Iterator[str]:
+        """Iterate over the keys of the next object. The value of each key has to be consumed before the next one."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.position += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(':')
+            yield key
+            if self._consume_separator('}'):
+                return
+
+    def _consume_separator(self, end: str) -> bool:
+        """Consume a comma, or the end of an array or object. Returns true at the end."""
+        char = self.peek()
+        self.position += 1
+        if char == end:
+            return True
+        if char != ',':
+            raise ValueError(f'expected {end!r} or \',\' but found {char!r}')
+        return False
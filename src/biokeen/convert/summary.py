@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+"""Summaries of KEEN triples.
+
+A summary has the following keys:
+
+- ``namespaces``: the number of times an entity from each namespace appears in a triple
+- ``entities``: the number of distinct entities
+- ``relations``: the number of triples
+- ``predicates``: the number of triples with each relation
+- ``degrees``: the number of entities that appear in a given number of triples
+- ``cardinalities``: the cardinality class of each relation. Like in TransH, a relation is ``1-N`` if its heads have
+  on average at least 1.5 tails, ``N-1`` if its tails have on average at least 1.5 heads, ``N-N`` if both, and
+  ``1-1`` otherwise.
+- ``filter``: the specification of the filter the triples were converted with, if any. See
+  :mod:`biokeen.convert.filters`.
+
+:func:`get_pykeen_summary` computes it from a whole KEEN DataFrame or :class:`biokeen.convert.CompactTriples` and
+:class:`TripleSummarizer` computes it one triple at a time.
+"""
+
+import json
+from collections import Counter
+from typing import Dict, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .filters import TripleFilter
+from .triples import CompactTriples
+from ..locking import atomic_path
+
+__all__ = [
+    'CARDINALITY_THRESHOLD',
+    'get_pykeen_summary',
+    'get_cardinality',
+    'TripleSummarizer',
+]
+
+#: The average number of tails per head (or heads per tail) from which a side of a relation counts as "N"
+CARDINALITY_THRESHOLD = 1.5
+
+
+def get_pykeen_summary(df: Union[pd.DataFrame, CompactTriples], triple_filter: Optional[TripleFilter] = None) -> Dict:
+    """Summarize a KEEN dataframe or compact triples.
+
+    :param triple_filter: The filter the triples were converted with, which is recorded in the summary
+
+    Each column is encoded as integer codes once, unless the triples are already compact, then everything is counted
+    with :func:`numpy.bincount`.
+    """
+    if isinstance(df, CompactTriples):
+        subject_codes, predicate_codes, object_codes = df.triples.T
+        summary = _summarize_codes(
+            entity_codes=np.concatenate([subject_codes, object_codes]),
+            entity_labels=df.entities,
+            predicate_codes=predicate_codes,
+            predicate_labels=df.relations,
+        )
+    else:
+        subjects, predicates, objects = (df[column] for column in df.columns[:3])
+        entity_codes, entity_labels = pd.factorize(pd.concat([subjects, objects], ignore_index=True))
+        predicate_codes, predicate_labels = pd.factorize(predicates)
+        summary = _summarize_codes(
+            entity_codes=entity_codes,
+            entity_labels=entity_labels,
+            predicate_codes=predicate_codes,
+            predicate_labels=predicate_labels,
+        )
+
+    return _add_filter(summary, triple_filter)
+
+
+def _add_filter(summary: Dict, triple_filter: Optional[TripleFilter]) -> Dict:
+    if triple_filter:
+        summary['filter'] = triple_filter.to_json()
+    return summary
+
+
+def _summarize_codes(entity_codes: np.ndarray, entity_labels: np.ndarray, predicate_codes: np.ndarray,
+                     predicate_labels: np.ndarray) -> Dict:
+    """Summarize triples from the codes of their subjects followed by their objects, and of their predicates.
+
+    Labels that no triple uses, like the ones left in the vocabularies of a subset of compact triples, are skipped.
+    """
+    entity_counts = np.bincount(entity_codes, minlength=len(entity_labels))
+
+    # count namespaces over the distinct entities, weighted by how often each of them appears
+    namespace_codes, namespace_labels = pd.factorize(
+        pd.Series(entity_labels, dtype=object).str.split(':', n=1).str[0],
+    )
+    namespace_counts = np.bincount(namespace_codes, weights=entity_counts, minlength=len(namespace_labels))
+
+    predicate_counts = np.bincount(predicate_codes, minlength=len(predicate_labels))
+
+    number_triples = len(predicate_codes)
+    head_codes, tail_codes = entity_codes[:number_triples], entity_codes[number_triples:]
+    heads = _count_distinct_per_predicate(predicate_codes, head_codes, len(predicate_labels), len(entity_labels))
+    tails = _count_distinct_per_predicate(predicate_codes, tail_codes, len(predicate_labels), len(entity_labels))
+
+    degrees = np.bincount(entity_counts) if len(entity_counts) else np.zeros(0, dtype=np.int64)
+
+    return {
+        'namespaces': Counter({
+            namespace: count
+            for namespace, count in zip(namespace_labels, namespace_counts.astype(int).tolist())
+            if count
+        }),
+        'entities': int(np.count_nonzero(entity_counts)),
+        'relations': number_triples,
+        'predicates': _sorted_dict(
+            (predicate, count)
+            for predicate, count in zip(predicate_labels, predicate_counts.tolist())
+            if count
+        ),
+        'degrees': {
+            degree: count
+            for degree, count in enumerate(degrees.tolist())
+            if degree and count
+        },
+        'cardinalities': _sorted_dict(
+            (predicate, get_cardinality(count, number_heads, number_tails))
+            for predicate, count, number_heads, number_tails in zip(
+                predicate_labels, predicate_counts.tolist(), heads.tolist(), tails.tolist(),
+            )
+            if count
+        ),
+    }
+
+
+def _count_distinct_per_predicate(predicate_codes: np.ndarray, entity_codes: np.ndarray, number_predicates: int,
+                                  number_entities: int) -> np.ndarray:
+    """Count the distinct entities that appear with each predicate."""
+    pairs = np.unique(predicate_codes.astype(np.int64) * number_entities + entity_codes)
+    return np.bincount(pairs // max(number_entities, 1), minlength=number_predicates)
+
+
+def get_cardinality(number_triples: int, number_heads: int, number_tails: int) -> str:
+    """Get the cardinality class of a relation from its number of triples, distinct heads, and distinct tails."""
+    head_side = 'N' if CARDINALITY_THRESHOLD <= number_triples / number_tails else '1'
+    tail_side = 'N' if CARDINALITY_THRESHOLD <= number_triples / number_heads else '1'
+    return f'{head_side}-{tail_side}'
+
+
+def _sorted_dict(items) -> Dict:
+    return dict(sorted(items))
+
+
+def _dump_summary(summary: Mapping, path: str, indent=2, **kwargs):
+    with atomic_path(path) as temporary_path, open(temporary_path, 'w') as file:
+        json.dump(summary, file, indent=indent, **kwargs)
+
+
+class TripleSummarizer:
+    """Accumulates the same statistics as :func:`get_pykeen_summary` one triple at a time."""
+
+    def __init__(self):
+        """Initialize an empty summary."""
+        self.namespaces = Counter()
+        self.entities = Counter()
+        self.relations = 0
+        self.heads: Dict[str, Counter] = {}
+        self.tails: Dict[str, Counter] = {}
+        self.predicates = Counter()
+
+    def add(self, subject: str, predicate: str, obj: str) -> None:
+        """Add a (unique) triple to the summary."""
+        for entity in (subject, obj):
+            self.namespaces[entity.split(':')[0]] += 1
+            self.entities[entity] += 1
+        self.relations += 1
+        self.predicates[predicate] += 1
+        self.heads.setdefault(predicate, Counter())[subject] += 1
+        self.tails.setdefault(predicate, Counter())[obj] += 1
+
+    def remove(self, subject: str, predicate: str, obj: str) -> None:
+        """Remove a triple that was previously added from the summary."""
+        for entity in (subject, obj):
+            _decrement(self.namespaces, entity.split(':')[0])
+            _decrement(self.entities, entity)
+        self.relations -= 1
+        _decrement(self.predicates, predicate)
+        _decrement(self.heads[predicate], subject)
+        _decrement(self.tails[predicate], obj)
+
+    def get_summary(self, triple_filter: Optional[TripleFilter] = None) -> Dict:
+        """Get the summary of all triples added so far, and the filter they were converted with, if any."""
+        return _add_filter({
+            'namespaces': self.namespaces,
+            'entities': len(self.entities),
+            'relations': self.relations,
+            'predicates': _sorted_dict(self.predicates.items()),
+            'degrees': _sorted_dict(Counter(self.entities.values()).items()),
+            'cardinalities': _sorted_dict(
+                (predicate, get_cardinality(count, len(self.heads[predicate]), len(self.tails[predicate])))
+                for predicate, count in self.predicates.items()
+            ),
+        }, triple_filter)
+
+
+def _decrement(counter: Counter, key: str) -> None:
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
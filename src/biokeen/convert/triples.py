@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""A compact, array-backed representation of KEEN triples.
+
+Rather than as tuples of strings or as a fixed-width string array, which is as wide as the longest label in it,
+:class:`CompactTriples` stores each triple as three 32-bit indexes into sorted vocabularies of the entity and
+relation labels. Each label is stored once, no matter how many triples it appears in, so a triple takes up twelve
+bytes.
+
+>>> from biokeen.convert import to_pykeen_triples
+>>> graph = ...  # Something from PyBEL
+>>> triples = to_pykeen_triples(graph)
+>>> triples.entity_to_id['HGNC:TP53']
+"""
+
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    'CompactTriples',
+    'encode_labels',
+    'decode_labels',
+]
+
+#: The names of the columns of a KEEN DataFrame
+COLUMNS = ['subject', 'predicate', 'object']
+
+
+class CompactTriples:
+    """Triples stored as indexes into sorted vocabularies of their entities and relations.
+
+    The triples are sorted and unique, in the same order as the tuples of their labels would be.
+    """
+
+    def __init__(self, entities: np.ndarray, relations: np.ndarray, triples: np.ndarray) -> None:
+        """Wrap the vocabularies and the triples.
+
+        :param entities: The sorted, unique labels of the entities
+        :param relations: The sorted, unique labels of the relations
+        :param triples: An (n, 3) array of the indexes of the subject, relation, and object of each triple
+        """
+        self.entities = np.asarray(entities, dtype=object)
+        self.relations = np.asarray(relations, dtype=object)
+        self.triples = np.asarray(triples, dtype=np.int32).reshape(-1, 3)
+        self._entity_to_id: Optional[Dict[str, int]] = None
+        self._relation_to_id: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_labels(cls, labels: Union[np.ndarray, Iterable[Tuple[str, str, str]]]) -> 'CompactTriples':
+        """Encode triples of labels, like the ones from :func:`biokeen.convert.load_pykeen_path`.
+
+        Duplicate triples are dropped.
+        """
+        if not isinstance(labels, np.ndarray):
+            labels = list(labels)
+        labels = np.asarray(labels, dtype=object).reshape(-1, 3)
+
+        entities, entity_codes = np.unique(np.concatenate([labels[:, 0], labels[:, 2]]), return_inverse=True)
+        relations, relation_codes = np.unique(labels[:, 1], return_inverse=True)
+        subject_codes, object_codes = np.split(entity_codes.ravel(), 2)
+
+        return cls(
+            entities=entities,
+            relations=relations,
+            triples=_sort_unique(np.stack([subject_codes, relation_codes.ravel(), object_codes], axis=1)),
+        )
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> 'CompactTriples':
+        """Encode the triples in a KEEN DataFrame, like the one from :func:`biokeen.convert.to_pykeen_df`."""
+        return cls.from_labels(df[df.columns[:3]].to_numpy(dtype=object))
+
+    def __len__(self) -> int:
+        """Get the number of triples."""
+        return len(self.triples)
+
+    @property
+    def entity_to_id(self) -> Dict[str, int]:
+        """Get a dictionary from the labels of the entities to their indexes. It is built the first time it's used."""
+        if self._entity_to_id is None:
+            self._entity_to_id = _get_label_to_id(self.entities)
+        return self._entity_to_id
+
+    @property
+    def relation_to_id(self) -> Dict[str, int]:
+        """Get a dictionary from the labels of the relations to their indexes. It is built the first time it's used."""
+        if self._relation_to_id is None:
+            self._relation_to_id = _get_label_to_id(self.relations)
+        return self._relation_to_id
+
+    def to_labels(self) -> np.ndarray:
+        """Get the triples as an (n, 3) array of labels, like the one from :func:`biokeen.convert.load_pykeen_path`.
+
+        The array has an object dtype, so its cells share the labels in the vocabularies instead of each holding a
+        copy as wide as the longest label.
+        """
+        labels = np.empty((len(self), 3), dtype=object)
+        labels[:, 0] = self.entities[self.triples[:, 0]]
+        labels[:, 1] = self.relations[self.triples[:, 1]]
+        labels[:, 2] = self.entities[self.triples[:, 2]]
+        return labels
+
+    def to_df(self) -> pd.DataFrame:
+        """Get the triples as a KEEN DataFrame, like the one from :func:`biokeen.convert.to_pykeen_df`."""
+        return pd.DataFrame(self.to_labels(), columns=COLUMNS)
+
+    def take(self, indexes: np.ndarray) -> 'CompactTriples':
+        """Get the triples at the given indexes, or where the given mask is true, sharing the vocabularies."""
+        return CompactTriples(self.entities, self.relations, self.triples[indexes])
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Get the arrays to save with :func:`numpy.savez`, which can be loaded back with :meth:`from_arrays`.
+
+        The vocabularies are saved as their UTF-8 bytes and the offsets at which each label ends, rather than as
+        fixed-width string arrays in which every label takes up as much space as the longest one. See
+        :func:`encode_labels`.
+        """
+        entity_bytes, entity_ends = encode_labels(self.entities)
+        relation_bytes, relation_ends = encode_labels(self.relations)
+        return {
+            'entity_bytes': entity_bytes,
+            'entity_ends': entity_ends,
+            'relation_bytes': relation_bytes,
+            'relation_ends': relation_ends,
+            'triples': self.triples,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays) -> 'CompactTriples':
+        """Load triples from the arrays saved from :meth:`to_arrays`, like an opened ``.npz`` file."""
+        return cls(
+            entities=decode_labels(arrays['entity_bytes'], arrays['entity_ends']),
+            relations=decode_labels(arrays['relation_bytes'], arrays['relation_ends']),
+            triples=arrays['triples'],
+        )
+
+
+def encode_labels(labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode labels as their concatenated UTF-8 bytes and the offset at which each of them ends."""
+    encoded = [label.encode('utf-8') for label in labels.tolist()]
+    ends = np.cumsum([len(label) for label in encoded], dtype=np.int64)
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), ends
+
+
+def decode_labels(data: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Decode the labels encoded with :func:`encode_labels` into an array of strings with an object dtype."""
+    data = data.tobytes()
+    ends = ends.tolist()
+    labels = np.empty(len(ends), dtype=object)
+    labels[:] = [data[start:end].decode('utf-8') for start, end in zip([0] + ends[:-1], ends)]
+    return labels
+
+
+def _get_label_to_id(labels: np.ndarray) -> Dict[str, int]:
+    return dict(zip(labels.tolist(), range(len(labels))))
+
+
+def _sort_unique(triples: np.ndarray) -> np.ndarray:
+    """Sort the rows of an (n, 3) array of indexes and drop the duplicates."""
+    triples = triples[np.lexsort((triples[:, 2], triples[:, 1], triples[:, 0]))]
+    if len(triples):
+        triples = triples[np.concatenate([[True], np.any(triples[1:] != triples[:-1], axis=1)])]
+    return triples.astype(np.int32)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""Reports of the BEL edges that no converter handles.
+
+Instead of logging every edge that no converter handles, the edges are counted by their relation and the functions of
+their subject and object, like ``(increases, Protein, Pathology)``. A few of the edges of each kind are kept as
+examples. They are only rendered as BEL when the report is written, so counting an edge costs next to nothing.
+"""
+
+import json
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from pybel import BELGraph
+from pybel.constants import RELATION
+from pybel.dsl import BaseEntity
+from ..constants import EMOJI
+from ..locking import atomic_path
+from ..paths import get_keen_file_path
+
+__all__ = [
+    'UnhandledEdges',
+    'get_unhandled_path',
+]
+
+logger = logging.getLogger(__name__)
+
+UnhandledKey = Tuple[str, str, str]
+
+
+class UnhandledEdges:
+    """Counts the BEL edges that no converter handles, keeping a few examples of each kind."""
+
+    def __init__(self, max_examples: int = 5) -> None:
+        """Initialize an empty report.
+
+        :param max_examples: The maximum number of examples kept for each kind of edge
+        """
+        self.max_examples = max_examples
+        self.counts: Counter = Counter()
+        self.examples: Dict[UnhandledKey, List[Tuple[BaseEntity, BaseEntity, Dict]]] = {}
+
+    def __len__(self) -> int:
+        """Get the number of unhandled edges."""
+        return sum(self.counts.values())
+
+    def add(self, u: BaseEntity, v: BaseEntity, edge_data: Dict) -> None:
+        """Count an unhandled edge."""
+        key = edge_data[RELATION], u.function, v.function
+        self.counts[key] += 1
+        examples = self.examples.setdefault(key, [])
+        if len(examples) < self.max_examples:
+            examples.append((u, v, edge_data))
+
+    def merge(self, other: 'UnhandledEdges') -> None:
+        """Add the unhandled edges from another report, like one from a worker process."""
+        self.counts.update(other.counts)
+        for key, other_examples in other.examples.items():
+            examples = self.examples.setdefault(key, [])
+            examples.extend(other_examples[:self.max_examples - len(examples)])
+
+    def to_json(self) -> List[Dict[str, Any]]:
+        """Get the kinds of unhandled edges with their counts and examples as BEL, from most to least common."""
+        return [
+            {
+                'relation': relation,
+                'subject': subject_function,
+                'object': object_function,
+                'count': count,
+                'examples': [
+                    BELGraph.edge_to_bel(u, v, edge_data)
+                    for u, v, edge_data in self.examples.get((relation, subject_function, object_function), [])
+                ],
+            }
+            for (relation, subject_function, object_function), count in self.counts.most_common()
+        ]
+
+    def to_json_path(self, path: str, indent: int = 2) -> None:
+        """Write the report to a JSON file."""
+        with atomic_path(path) as temporary_path, open(temporary_path, 'w') as file:
+            json.dump(self.to_json(), file, indent=indent)
+
+    def log(self, top: int = 3) -> None:
+        """Log a single warning with the number of unhandled edges and their most common kinds."""
+        if not self.counts:
+            return
+        most_common = ', '.join(
+            f'{relation} from {subject_function} to {object_function} ({count})'
+            for (relation, subject_function, object_function), count in self.counts.most_common(top)
+        )
+        logger.warning(f'{EMOJI} {len(self)} edges of {len(self.counts)} kinds were unhandled. Most common: '
+                       f'{most_common}')
+
+
+def get_unhandled_path(path: str) -> str:
+    """Get the path of the unhandled edge report for a KEEN TSV file."""
+    return get_keen_file_path(path, 'unhandled')
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""Compact on-disk cache for BEL graphs.
+
+Besides PyBEL's Node-Link JSON (``.bel.json``), BEL graphs can be cached in a compact, compressed format
+(``.bel.jsonl.gz``). It is a gzip-compressed file of JSON lines:
+
+1. a header with the format name and version, the graph's metadata, and the number of nodes and links
+2. one line per node, holding the node's data. Nodes are stored once and referred to by their position.
+3. one line per link, holding ``[source, target, key, data]``
+
+Unlike PyBEL's Node-Link JSON, it does not store the BEL string and SHA-512 hash of every node, is written without
+indentation, and can be read and written one line at a time.
+"""
+
+import gzip
+import json
+import os
+from typing import Any, Dict, Iterable, List, Mapping, TextIO, Tuple
+
+from pybel import BELGraph, from_json_path, to_json_path
+from pybel.constants import GRAPH_ANNOTATION_LIST, GRAPH_UNCACHED_NAMESPACES
+from pybel.dsl import BaseEntity
+from pybel.io.utils import ensure_version
+from pybel.tokens import parse_result_to_dsl
+from .locking import atomic_path
+from .paths import DATABASE_FILE_SUFFIXES
+
+__all__ = [
+    'NODELINK_JSON',
+    'NODELINK_LINES_GZ',
+    'GRAPH_CACHE_FORMATS',
+    'get_graph_cache_format',
+    'get_graph_cache_path',
+    'to_graph_cache_path',
+    'from_graph_cache_path',
+    'to_jsonl_gz_path',
+    'from_jsonl_gz_path',
+    'iterate_jsonl_gz',
+]
+
+#: PyBEL's indented Node-Link JSON
+NODELINK_JSON = 'nodelink-json'
+#: BioKEEN's gzip-compressed Node-Link JSON lines
+NODELINK_LINES_GZ = 'nodelink-lines-gz'
+
+#: The file extension of each graph cache format
+GRAPH_CACHE_FORMATS = {
+    NODELINK_JSON: DATABASE_FILE_SUFFIXES['bel-json'],
+    NODELINK_LINES_GZ: DATABASE_FILE_SUFFIXES['bel-lines'],
+}
+
+_FORMAT_VERSION = 1
+_SEPARATORS = (',', ':')
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def get_graph_cache_path(directory: str, name: str, fmt: str = NODELINK_LINES_GZ) -> str:
+    """Get the path of the cached BEL graph for the given database in the given format."""
+    return os.path.join(directory, f'{name}.{GRAPH_CACHE_FORMATS[fmt]}')
+
+
+def get_graph_cache_format(path: str) -> str:
+    """Detect the format of a cached BEL graph from its contents."""
+    with open(path, 'rb') as file:
+        magic = file.read(len(_GZIP_MAGIC))
+    return NODELINK_LINES_GZ if magic == _GZIP_MAGIC else NODELINK_JSON
+
+
+def to_graph_cache_path(graph: BELGraph, path: str, fmt: str = NODELINK_LINES_GZ) -> None:
+    """Write a BEL graph to a cache file in the given format."""
+    if fmt not in GRAPH_CACHE_FORMATS:
+        raise ValueError(f'unknown graph cache format: {fmt}')
+
+    # readers of the cache never see a partially written graph
+    with atomic_path(path) as temporary_path:
+        if fmt == NODELINK_JSON:
+            to_json_path(graph, temporary_path, indent=2)
+        else:
+            to_jsonl_gz_path(graph, temporary_path)
+
+
+def from_graph_cache_path(path: str, check_version: bool = True) -> BELGraph:
+    """Read a BEL graph from a cache file in any of the formats."""
+    if get_graph_cache_format(path) == NODELINK_LINES_GZ:
+        return from_jsonl_gz_path(path, check_version=check_version)
+    return from_json_path(path, check_version=check_version)
+
+
+def to_jsonl_gz_path(graph: BELGraph, path: str, compresslevel: int = 3) -> None:
+    """Write a BEL graph as gzip-compressed Node-Link JSON lines."""
+    nodes = list(graph)
+    mapping = {id(node): i for i, node in enumerate(nodes)}
+
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=compresslevel) as file:
+        _write_line(file, {
+            'format': NODELINK_LINES_GZ,
+            'version': _FORMAT_VERSION,
+            'graph': _dump_graph_metadata(graph.graph),
+            'nodes': len(nodes),
+            'links': graph.number_of_edges(),
+        })
+        for node in nodes:
+            _write_line(file, node)
+        for u, v, key, data in graph.edges(keys=True, data=True):
+            _write_line(file, [mapping[id(u)], mapping[id(v)], key, data])
+
+
+def from_jsonl_gz_path(path: str, check_version: bool = True) -> BELGraph:
+    """Read a BEL graph from gzip-compressed Node-Link JSON lines."""
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        header, nodes, links = iterate_jsonl_gz(file)
+
+        graph = BELGraph()
+        graph.graph = _load_graph_metadata(header['graph'])
+
+        mapping = [graph.add_node_from_data(node) for node in nodes]
+        for source, target, key, data in links:
+            graph.add_edge(mapping[source], mapping[target], key=key, **data)
+
+    return ensure_version(graph, check_version=check_version)
+
+
+def iterate_jsonl_gz(file: TextIO) -> Tuple[Mapping[str, Any], List[BaseEntity], Iterable[List]]:
+    """Read the header and the nodes from an open Node-Link JSON lines file, and iterate over its links lazily."""
+    header = json.loads(next(file))
+    if header.get('format') != NODELINK_LINES_GZ or header.get('version') != _FORMAT_VERSION:
+        raise ValueError(f'unsupported graph cache format: {header.get("format")} v{header.get("version")}')
+
+    nodes = [
+        parse_result_to_dsl(json.loads(next(file)))
+        for _ in range(header['nodes'])
+    ]
+    links = (
+        json.loads(line)
+        for line in file
+    )
+    return header, nodes, links
+
+
+def _write_line(file: TextIO, obj: Any) -> None:
+    file.write(json.dumps(obj, ensure_ascii=False, separators=_SEPARATORS))
+    file.write('\n')
+
+
+def _dump_graph_metadata(metadata: Mapping[str, Any]) -> Dict[str, Any]:
+    """Convert the sets in the graph's metadata to sorted lists, like :func:`pybel.to_json`."""
+    rv = dict(metadata)
+    rv[GRAPH_ANNOTATION_LIST] = {
+        keyword: list(sorted(values))
+        for keyword, values in metadata.get(GRAPH_ANNOTATION_LIST, {}).items()
+    }
+    rv[GRAPH_UNCACHED_NAMESPACES] = list(metadata.get(GRAPH_UNCACHED_NAMESPACES, []))
+    return rv
+
+
+def _load_graph_metadata(metadata: Mapping[str, Any]) -> Dict[str, Any]:
+    """Convert the annotation lists in the graph's metadata back to sets, like :func:`pybel.from_json`."""
+    rv = dict(metadata)
+    rv[GRAPH_ANNOTATION_LIST] = {
+        keyword: set(values)
+        for keyword, values in metadata.get(GRAPH_ANNOTATION_LIST, {}).items()
+    }
+    return rv
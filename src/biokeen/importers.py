@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+"""Importers for PyKEEN, registered under the ``pykeen.data.importer`` entry point.
+
+PyKEEN loads every importer when it starts, so this module doesn't import anything heavy. Each importer only imports
+:mod:`biokeen.content`, and with it PyBEL and Bio2BEL, when it's used.
+"""
+
+from typing import Optional, TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    import numpy as np  # noqa: F401
+
+__all__ = [
+    'handle_bio2bel',
+    'handle_bio2bel_merged',
+    'handle_bel_commons',
+]
+
+
+def handle_bio2bel(module_name: str) -> 'np.ndarray':
+    """Load a Bio2BEL repository. See :func:`biokeen.content.handle_bio2bel`."""
+    from .content import handle_bio2bel as _handle_bio2bel
+    return _handle_bio2bel(module_name)
+
+
+def handle_bio2bel_merged(module_names: str) -> 'np.ndarray':
+    """Load several Bio2BEL repositories, merged. See :func:`biokeen.content.handle_bio2bel_merged`."""
+    from .content import handle_bio2bel_merged as _handle_bio2bel_merged
+    return _handle_bio2bel_merged(module_names)
+
+
+def handle_bel_commons(network_id: Union[int, str], host: Optional[str] = None) -> 'np.ndarray':
+    """Load a BEL document from BEL Commons. See :func:`biokeen.content.handle_bel_commons`."""
+    from .content import handle_bel_commons as _handle_bel_commons
+    return _handle_bel_commons(network_id, host=host)
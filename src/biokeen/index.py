@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+"""An index of the databases built in the BioKEEN data directory.
+
+The index, ``index.json`` in the data directory, has an entry for each database with the files built for it and
+statistics about its triples, so listing the data directory doesn't need to scan it or open any of the files in it:
+
+.. code-block:: json
+
+    {
+        "version": 1,
+        "databases": {
+            "hippie": {
+                "path": "hippie.keen.tsv",
+                "built": "2019-04-01T12:00:00+00:00",
+                "triples": 40000,
+                "entities": 12000,
+                "relations": 1,
+                "module": "bio2bel_hippie",
+                "version": "0.1.0",
+                "files": {"tsv": {"path": "hippie.keen.tsv", "size": 1234567}}
+            }
+        }
+    }
+
+:func:`biokeen.content.install_bio2bel_module` updates the entry of a database whenever it returns its KEEN TSV,
+and ``biokeen data clear`` removes them. The index is always replaced as a whole, so it's never seen half-written,
+and it's locked while it's updated, so processes sharing the data directory don't lose each other's updates. If the
+index is missing, it's rebuilt from the summaries and build manifests in the data directory.
+
+This module only uses the standard library, so ``biokeen data ls`` stays quick.
+"""
+
+import datetime
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from .constants import EMOJI, biokeen_config
+from .locking import FileLock, atomic_path
+from .paths import DATABASE_FILE_SUFFIXES, KEEN_FILE_SUFFIXES, get_database_file_path, get_keen_file_path
+
+__all__ = [
+    'INDEX_VERSION',
+    'get_index_path',
+    'read_index',
+    'write_index',
+    'get_index_entry',
+    'update_index',
+    'rebuild_index',
+    'get_database_files',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The version of the layout of the index. An index with a different version is rebuilt.
+INDEX_VERSION = 1
+
+
+def get_index_path(directory: Optional[str] = None) -> str:
+    """Get the path of the index of the given data directory, which defaults to the configured one."""
+    return os.path.join(directory or biokeen_config.data_directory, 'index.json')
+
+
+def read_index(directory: Optional[str] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Read the entries in the index by the names of their databases, or none if there's no usable index."""
+    path = get_index_path(directory)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        logger.warning(f'{EMOJI} could not read index: {path}')
+        return None
+
+    if index.get('version') != INDEX_VERSION:
+        return None
+    return index['databases']
+
+
+def write_index(databases: Mapping[str, Mapping[str, Any]], directory: Optional[str] = None) -> None:
+    """Replace the index with the given entries.
+
+    The index is written to a temporary file, which then replaces the old one, so readers see either the old or
+    the new index in full.
+    """
+    with atomic_path(get_index_path(directory)) as temporary_path, open(temporary_path, 'w') as file:
+        json.dump({'version': INDEX_VERSION, 'databases': databases}, file, indent=2, sort_keys=True)
+
+
+def _lock_index(directory: Optional[str] = None) -> FileLock:
+    return FileLock(f'{get_index_path(directory)}.lock', stale_after=biokeen_config.lock_stale_timeout)
+
+
+def get_database_files(name: str, directory: Optional[str] = None) -> Dict[str, str]:
+    """Get the paths of the files that exist for the given database, by their role, like ``tsv`` or ``summary``.
+
+    The roles other than ``tsv`` are the ones in :mod:`biokeen.paths`.
+    """
+    directory = directory or biokeen_config.data_directory
+    tsv_path = os.path.join(directory, f'{name}.{biokeen_config.keen_tsv_ext}')
+    paths = {'tsv': tsv_path}
+    paths.update((role, get_keen_file_path(tsv_path, role)) for role in KEEN_FILE_SUFFIXES)
+    paths.update((role, get_database_file_path(directory, name, role)) for role in DATABASE_FILE_SUFFIXES)
+    return {
+        role: path
+        for role, path in paths.items()
+        if os.path.exists(path)
+    }
+
+
+def get_index_entry(name: str, directory: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Describe the given database from its files, or get none if it has no KEEN TSV."""
+    files = get_database_files(name, directory=directory)
+    if 'tsv' not in files:
+        return None
+
+    stats = {role: os.stat(path) for role, path in files.items()}
+    entry = {
+        'path': os.path.basename(files['tsv']),
+        'built': datetime.datetime.fromtimestamp(stats['tsv'].st_mtime, datetime.timezone.utc).isoformat(),
+        'files': {
+            role: {'path': os.path.basename(path), 'size': stats[role].st_size}
+            for role, path in files.items()
+        },
+    }
+
+    summary = _read_json(files.get('summary'))
+    for key in ('triples', 'entities', 'relations', 'filter'):
+        entry[key] = None
+    if summary is not None:
+        entry['triples'] = summary.get('relations')
+        entry['entities'] = summary.get('entities')
+        entry['relations'] = len(summary.get('predicates', ()))
+        entry['filter'] = summary.get('filter')
+
+    bel_inputs = (_read_json(files.get('manifest')) or {}).get('bel', {}).get('inputs', {})
+    entry['module'] = bel_inputs.get('module')
+    entry['version'] = bel_inputs.get('version')
+
+    return entry
+
+
+def _read_json(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    if path is None:
+        return None
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        logger.warning(f'{EMOJI} could not read {path}')
+        return None
+
+
+def update_index(names: Iterable[str], directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Update the entries of the given databases from their files, adding or removing them as needed.
+
+    :return: The entries in the index after the update
+
+    If there's no usable index, it's rebuilt first. The index is only written if an entry changed.
+    """
+    with _lock_index(directory):
+        databases = read_index(directory)
+        if databases is None:
+            return _rebuild_index(directory)
+        return _update_entries(databases, names, directory)
+
+
+def _update_entries(databases: Dict[str, Dict[str, Any]], names: Iterable[str],
+                    directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    changed = False
+    for name in names:
+        entry = get_index_entry(name, directory=directory)
+        if entry == databases.get(name):
+            continue
+        changed = True
+        if entry is None:
+            del databases[name]
+        else:
+            databases[name] = entry
+
+    if changed:
+        write_index(databases, directory)
+    return databases
+
+
+def rebuild_index(directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Rebuild the index by scanning the data directory for KEEN TSVs.
+
+    :return: The entries in the new index
+    """
+    with _lock_index(directory):
+        return _rebuild_index(directory)
+
+
+def _rebuild_index(directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    directory = directory or biokeen_config.data_directory
+    suffix = f'.{biokeen_config.keen_tsv_ext}'
+    logger.info(f'{EMOJI} indexing {directory}')
+    databases = {}
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(suffix):
+            continue
+        name = file_name[:-len(suffix)]
+        entry = get_index_entry(name, directory=directory)
+        if entry is not None:
+            databases[name] = entry
+
+    write_index(databases, directory)
+    return databases
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+"""Locks and atomic writes for a data directory shared by several processes, possibly on several machines.
+
+A :class:`FileLock` is a lock file created with ``O_CREAT | O_EXCL``, which fails if it already exists even on most
+network filesystems. While it's held, a background thread touches the lock file regularly. A process waiting for the
+lock breaks it if the lock file hasn't been touched for a while, since its holder must have died. The waiter only
+compares the lock file with what it saw before, so it doesn't rely on clocks agreeing across machines. It moves the
+stale lock file out of the way before removing it, so only one waiter can break it.
+
+>>> from biokeen.locking import FileLock
+>>> with FileLock('hippie.lock'):
+...     ...  # build the database
+
+:func:`atomic_path` gives a temporary path next to a file to write to instead, which replaces the file once it's
+written, so readers never see a partial file.
+
+This module only uses the standard library.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from .constants import EMOJI
+
+__all__ = [
+    'FileLock',
+    'LockTimeout',
+    'atomic_path',
+]
+
+logger = logging.getLogger(__name__)
+
+
+class LockTimeout(TimeoutError):
+    """Raised when a lock could not be acquired in time."""
+
+
+class FileLock:
+    """A lock held by creating a file, which is broken if its holder stops touching it."""
+
+    def __init__(self, path: str, stale_after: float = 300.0, timeout: Optional[float] = None,
+                 poll_interval: float = 0.5) -> None:
+        """Prepare the lock. It's acquired when the context is entered.
+
+        :param path: The path of the lock file
+        :param stale_after: The number of seconds after which a lock file that hasn't been touched is broken. The
+         holder touches it four times as often.
+        :param timeout: The number of seconds to wait for the lock before giving up with :class:`LockTimeout`.
+         Defaults to waiting as long as it takes.
+        :param poll_interval: The number of seconds between attempts to acquire the lock
+        """
+        self.path = path
+        self.stale_after = stale_after
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._stop: Optional[threading.Event] = None
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def acquire(self) -> None:
+        """Wait until the lock file can be created, breaking it if it's gone stale."""
+        start = time.monotonic()
+        seen, seen_at = None, start
+        while not self._try_create():
+            signature = _get_signature(self.path)
+            now = time.monotonic()
+            if signature != seen:
+                if seen is None:
+                    logger.info(f'{EMOJI} waiting for {self.path}, held by {_read_holder(self.path)}')
+                seen, seen_at = signature, now
+            elif signature is not None and self.stale_after <= now - seen_at:
+                self._break(signature)
+                seen, seen_at = None, now
+                continue
+
+            if self.timeout is not None and self.timeout <= now - start:
+                raise LockTimeout(f'could not acquire {self.path} in {self.timeout} seconds')
+            time.sleep(self.poll_interval)
+
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._touch, args=(self._stop,), daemon=True)
+        self._heartbeat.start()
+
+    def release(self) -> None:
+        """Stop touching the lock file and remove it."""
+        self._stop.set()
+        self._heartbeat.join()
+        self._stop = self._heartbeat = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            logger.warning(f'{EMOJI} lock was broken while it was held: {self.path}')
+
+    def __enter__(self) -> 'FileLock':
+        """Acquire the lock."""
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Release the lock."""
+        self.release()
+
+    def _try_create(self) -> bool:
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with open(fd, 'w') as file:
+            json.dump({'host': socket.gethostname(), 'pid': os.getpid()}, file)
+        return True
+
+    def _touch(self, stop: threading.Event) -> None:
+        while not stop.wait(self.stale_after / 4):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return
+
+    def _break(self, signature: Tuple[int, int, int]) -> None:
+        """Remove a stale lock file, unless another process has replaced it in the meantime.
+
+        The lock file is renamed to a unique name first, which only one of the waiters can do, then checked again. If
+        another process took the lock between the first check and the rename, its lock file is put back instead.
+        """
+        if _get_signature(self.path) != signature:
+            return
+
+        holder = _read_holder(self.path)
+        broken_path = f'{self.path}.{uuid.uuid4().hex[:12]}.broken'
+        try:
+            os.rename(self.path, broken_path)
+        except FileNotFoundError:
+            return  # another waiter broke it first
+
+        try:
+            if _get_signature(broken_path) == signature:
+                logger.warning(f'{EMOJI} breaking stale lock held by {holder}: {self.path}')
+                return
+            # linking fails rather than replaces if yet another process took the lock in the meantime
+            os.link(broken_path, self.path)
+        except FileExistsError:
+            logger.warning(f'{EMOJI} could not put back lock that was taken while it was broken: {self.path}')
+        except OSError:
+            # the filesystem has no hard links, so the lock file is moved back unless the lock was taken again
+            if not os.path.exists(self.path):
+                os.rename(broken_path, self.path)
+        finally:
+            if os.path.exists(broken_path):
+                os.remove(broken_path)
+
+
+def _get_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """Get what changes when a lock file is touched or replaced, or none if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _read_holder(path: str) -> str:
+    try:
+        with open(path) as file:
+            holder = json.load(file)
+    except (OSError, ValueError):
+        return 'an unknown process'
+    return f'process {holder.get("pid")} on {holder.get("host")}'
+
+
+@contextmanager
+def atomic_path(path: str) -> Iterator[str]:
+    """Get a temporary path to write to, which replaces the given path if the block finishes without errors.
+
+    The temporary file is in the same directory, so it can be renamed in a single step. It's a hidden file, so it
+    isn't mistaken for a finished one, and it's removed if anything goes wrong. If nothing was written to the
+    temporary path, the given path is left alone.
+    """
+    directory, file_name = os.path.split(os.path.abspath(path))
+    temporary_path = os.path.join(directory, f'.{file_name}.{uuid.uuid4().hex[:12]}.tmp')
+    try:
+        yield temporary_path
+        if os.path.exists(temporary_path):
+            os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+"""Merging the KEEN TSVs of several databases into one deduplicated store.
+
+The merged store has a shared vocabulary of entities and relations, each sorted. The triples are stored once as
+indexes into the vocabularies, sorted the same way as :func:`biokeen.convert.to_pykeen_df` sorts them. Each triple
+also has a bitmask of the databases it came from, where the i-th bit stands for the i-th database in alphabetical
+order.
+
+Merged stores are cached in the ``merged`` folder of the data directory, keyed by the databases and the sizes and
+modification times of their KEEN TSVs, so merging the same combination again is skipped.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import List, Mapping, Optional
+
+import numpy as np
+
+from .constants import EMOJI, biokeen_config
+from .convert import CompactTriples, load_pykeen_triples
+from .convert.triples import decode_labels, encode_labels
+from .locking import atomic_path
+
+__all__ = [
+    'MergedTriples',
+    'merge_pykeen_paths',
+    'get_merged_directory',
+    'ensure_merged_pykeen_paths',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The maximum number of databases that can be merged, since the sources of each triple are stored as a 64-bit mask
+MAX_DATABASES = 64
+
+
+class MergedTriples(CompactTriples):
+    """Triples merged from several databases, with the databases each of them came from."""
+
+    def __init__(self, databases: List[str], entities: np.ndarray, relations: np.ndarray, triples: np.ndarray,
+                 sources: np.ndarray) -> None:
+        """Wrap the merged triples.
+
+        :param databases: The names of the databases, in alphabetical order
+        :param entities: The sorted, unique labels of the entities
+        :param relations: The sorted, unique labels of the relations
+        :param triples: An (n, 3) array of the indexes of the subject, relation, and object of each triple
+        :param sources: For each triple, the bitmask of the databases it came from
+        """
+        super().__init__(entities=entities, relations=relations, triples=triples)
+        self.databases = list(databases)
+        self.sources = np.asarray(sources, dtype=np.uint64)
+
+    def get_mask(self, database: str) -> np.ndarray:
+        """Get a boolean mask of the triples that came from the given database."""
+        bit = np.uint64(1) << np.uint64(self.databases.index(database))
+        return (self.sources & bit) != 0
+
+    def get_database_counts(self) -> Mapping[str, int]:
+        """Count the triples that came from each database."""
+        return {
+            database: int(self.get_mask(database).sum())
+            for database in self.databases
+        }
+
+    def to_arrays(self):
+        """Get the arrays to save with :func:`numpy.savez`, including the databases and sources.
+
+        Like the vocabularies, the names of the databases are saved compactly with
+        :func:`biokeen.convert.triples.encode_labels`.
+        """
+        arrays = super().to_arrays()
+        arrays['database_bytes'], arrays['database_ends'] = encode_labels(np.array(self.databases, dtype=object))
+        arrays['sources'] = self.sources
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> 'MergedTriples':
+        """Load merged triples from the arrays saved from :meth:`to_arrays`, like an opened ``.npz`` file."""
+        triples = CompactTriples.from_arrays(arrays)
+        return cls(
+            databases=decode_labels(arrays['database_bytes'], arrays['database_ends']).tolist(),
+            entities=triples.entities,
+            relations=triples.relations,
+            triples=triples.triples,
+            sources=arrays['sources'],
+        )
+
+
+def merge_pykeen_paths(paths: Mapping[str, str]) -> MergedTriples:
+    """Merge the KEEN TSVs of several databases.
+
+    :param paths: A dictionary from the names of the databases to the paths of their KEEN TSVs
+
+    Each database is loaded compactly (see :func:`biokeen.convert.load_pykeen_triples`), so only the vocabularies of
+    the databases are merged as strings. Their triples are translated to the merged vocabularies as integers.
+    """
+    databases = sorted(paths)
+    if MAX_DATABASES < len(databases):
+        raise ValueError(f'can not merge more than {MAX_DATABASES} databases')
+
+    parts = [load_pykeen_triples(paths[database]) for database in databases]
+    entities = _union([part.entities for part in parts])
+    relations = _union([part.relations for part in parts])
+
+    triples = np.concatenate([
+        _translate(part, entities, relations)
+        for part in parts
+    ]) if parts else np.empty((0, 3), dtype=np.int32)
+    source_bits = np.concatenate([
+        np.full(len(part), np.uint64(1) << np.uint64(i), dtype=np.uint64)
+        for i, part in enumerate(parts)
+    ]) if parts else np.empty(0, dtype=np.uint64)
+
+    # sort the triples, then collapse each run of duplicates, combining the databases they came from
+    order = np.lexsort((triples[:, 2], triples[:, 1], triples[:, 0]))
+    triples, source_bits = triples[order], source_bits[order]
+    starts = np.flatnonzero(np.concatenate([[True], np.any(triples[1:] != triples[:-1], axis=1)])[:len(triples)])
+    sources = np.bitwise_or.reduceat(source_bits, starts) if len(starts) else source_bits
+
+    return MergedTriples(
+        databases=databases,
+        entities=entities,
+        relations=relations,
+        triples=triples[starts],
+        sources=sources,
+    )
+
+
+def _translate(part: CompactTriples, entities: np.ndarray, relations: np.ndarray) -> np.ndarray:
+    """Translate the indexes of compact triples to the merged vocabularies.
+
+    The vocabularies are searched as they are, with an object dtype, so no fixed-width copies of them are made.
+    """
+    entity_ids = np.searchsorted(entities, part.entities)
+    relation_ids = np.searchsorted(relations, part.relations)
+    return np.stack([
+        entity_ids[part.triples[:, 0]],
+        relation_ids[part.triples[:, 1]],
+        entity_ids[part.triples[:, 2]],
+    ], axis=1).astype(np.int32).reshape(-1, 3)
+
+
+def _union(vocabularies: List[np.ndarray]) -> np.ndarray:
+    """Get the sorted union of several vocabularies, as an array of strings with an object dtype."""
+    if not vocabularies:
+        return np.empty(0, dtype=object)
+    return np.unique(np.concatenate(vocabularies))
+
+
+def get_merged_directory() -> str:
+    """Get the directory in which merged stores are cached."""
+    directory = os.path.join(biokeen_config.data_directory, 'merged')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _get_merge_key(paths: Mapping[str, str]) -> str:
+    """Hash the names of the databases and the sizes and modification times of their KEEN TSVs."""
+    inputs = []
+    for database in sorted(paths):
+        stat = os.stat(paths[database])
+        inputs.append([database, os.path.abspath(paths[database]), stat.st_size, stat.st_mtime_ns])
+    return hashlib.sha256(json.dumps(inputs).encode('utf-8')).hexdigest()
+
+
+def ensure_merged_pykeen_paths(paths: Mapping[str, str], directory: Optional[str] = None) -> MergedTriples:
+    """Merge the KEEN TSVs of several databases, unless the same ones were already merged.
+
+    :param paths: A dictionary from the names of the databases to the paths of their KEEN TSVs
+    :param directory: The directory in which the merged store is cached. Defaults to the ``merged`` folder in the
+     data directory.
+    """
+    key = _get_merge_key(paths)
+    path = os.path.join(directory or get_merged_directory(), f'{key[:16]}.merged.npz')
+
+    merged = _read_merged(path, key)
+    if merged is not None:
+        logger.debug(f'{EMOJI} using merged store: {path}')
+        return merged
+
+    logger.info(f'{EMOJI} merging {", ".join(sorted(paths))}')
+    merged = merge_pykeen_paths(paths)
+    with atomic_path(path) as temporary_path, open(temporary_path, 'wb') as file:
+        np.savez(file, key=np.array(key), **merged.to_arrays())
+    return merged
+
+
+def _read_merged(path: str, key: str) -> Optional[MergedTriples]:
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as store:
+            if str(store['key']) != key:
+                return None
+            return MergedTriples.from_arrays(store)
+    except (OSError, ValueError, KeyError):
+        logger.warning(f'{EMOJI} could not read merged store: {path}')
+        return None
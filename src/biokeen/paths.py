@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""The names of the files built for each database in the data directory.
+
+Most of them are written next to the KEEN TSV of the database and named after it, by replacing its ``.tsv``
+extension with the suffix of their role, so the sidecar of ``hippie.keen.tsv`` is ``hippie.keen.npz``. The others,
+like the build manifest and the cached BEL graph, are named after the database, like ``hippie.manifest.json``.
+
+Every kind of file is listed here, so the index of the data directory and ``biokeen data clear`` know about all of
+them. This module only uses the standard library, so ``biokeen data ls`` stays quick.
+"""
+
+import os
+from typing import Dict
+
+__all__ = [
+    'KEEN_FILE_SUFFIXES',
+    'DATABASE_FILE_SUFFIXES',
+    'get_keen_file_path',
+    'get_database_file_path',
+]
+
+#: The suffixes of the files written next to a KEEN TSV, by their role
+KEEN_FILE_SUFFIXES: Dict[str, str] = {
+    'summary': 'summary.json',
+    'sidecar': 'npz',
+    'parquet': 'parquet',
+    'feather': 'feather',
+    'unhandled': 'unhandled.json',
+    'stats': 'stats.json',
+    'delta': 'delta.tsv',
+    'edges': 'edges.tsv.gz',
+}
+
+#: The suffixes of the other files built for a database, which are named after it, by their role
+DATABASE_FILE_SUFFIXES: Dict[str, str] = {
+    'manifest': 'manifest.json',
+    'bel-json': 'bel.json',
+    'bel-lines': 'bel.jsonl.gz',
+}
+
+
+def get_keen_file_path(path: str, role: str) -> str:
+    """Get the path of the file with the given role, like ``sidecar``, next to a KEEN TSV file."""
+    if path.endswith('.tsv'):
+        path = path[:-len('.tsv')]
+    return f'{path}.{KEEN_FILE_SUFFIXES[role]}'
+
+
+def get_database_file_path(directory: str, name: str, role: str) -> str:
+    """Get the path of the file with the given role, like ``manifest``, for the given database."""
+    return os.path.join(directory, f'{name}.{DATABASE_FILE_SUFFIXES[role]}')
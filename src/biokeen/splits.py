@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+"""Splitting the triples of databases into training, validation, and test sets.
+
+The splits are stratified by relation, so each relation is held out in about the same proportion. They are also free
+of the usual leaks:
+
+- All triples between the same two entities, like duplicates with other relations and inverses like ``A increases
+  B`` and ``B decreases A``, are kept in the same split, so a held-out triple can't be read off a training triple.
+- Every entity and relation in the validation and test sets also appears in the training set.
+
+>>> from biokeen.splits import ensure_split_paths
+>>> paths = ensure_split_paths({'hippie': 'hippie.keen.tsv'}, test_ratio=0.1, seed=0)
+>>> paths['train'], paths['test']
+
+Splits are cached in the ``splits`` folder of the data directory, keyed by the databases, the sizes and modification
+times of their KEEN TSVs, the ratios, and the seed, so the same split is made only once and is the same every time.
+Each split is written as a KEEN TSV, which PyKEEN can load with ``training_set_path`` and ``test_set_path``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+
+from .constants import EMOJI, biokeen_config
+from .convert import CompactTriples, load_pykeen_triples, to_pykeen_path
+from .locking import FileLock, atomic_path
+from .merge import ensure_merged_pykeen_paths
+
+__all__ = [
+    'TRAIN',
+    'VALIDATION',
+    'TEST',
+    'SPLITS',
+    'split_triples',
+    'get_split_directory',
+    'ensure_split_paths',
+]
+
+logger = logging.getLogger(__name__)
+
+TRAIN = 'train'
+VALIDATION = 'valid'
+TEST = 'test'
+
+#: The names of the splits, in the order of their codes
+SPLITS = [TRAIN, VALIDATION, TEST]
+
+#: The version of the splitting algorithm. Changing it invalidates the cached splits.
+SPLIT_VERSION = 1
+
+_TRAIN_CODE, _VALIDATION_CODE, _TEST_CODE = range(len(SPLITS))
+
+
+def split_triples(triples: CompactTriples, test_ratio: float = 0.1, validation_ratio: float = 0.0,
+                  seed: int = 0) -> Dict[str, CompactTriples]:
+    """Split triples into training, validation, and test sets.
+
+    :param triples: The triples to split
+    :param test_ratio: The share of the triples of each relation to hold out for testing
+    :param validation_ratio: The share of the triples of each relation to hold out for validation
+    :param seed: The seed of the random number generator
+    :return: The triples in each split, by the names in :data:`SPLITS`, sharing the vocabularies of the given triples
+
+    The triples are grouped by the pair of entities they connect, regardless of direction. Each group is assigned to
+    the stratum of the relation of its first triple, then the groups of each stratum are shuffled and dealt out to the
+    splits by the number of their triples. Groups with an entity or relation that doesn't appear in the training set
+    are moved back to it, so the held-out sets can come out a little smaller than asked for.
+    """
+    if test_ratio < 0 or validation_ratio < 0 or 1 <= test_ratio + validation_ratio:
+        raise ValueError(f'invalid ratios: test={test_ratio}, validation={validation_ratio}')
+
+    codes = triples.triples
+    groups, strata = _group_pairs(codes, len(triples.entities))
+    group_splits = _deal_groups(groups, strata, test_ratio, validation_ratio, np.random.RandomState(seed))
+
+    # moving groups to the training set only adds to its entities and relations, so one pass is enough
+    uncovered = _get_uncovered(codes, group_splits[groups], len(triples.entities), len(triples.relations))
+    group_splits[np.unique(groups[uncovered])] = _TRAIN_CODE
+
+    splits = group_splits[groups]
+    return {
+        name: triples.take(np.flatnonzero(splits == code))
+        for code, name in enumerate(SPLITS)
+    }
+
+
+def _group_pairs(codes: np.ndarray, number_of_entities: int):
+    """Get the group of each triple, by the unordered pair of its entities, and the relation of each group."""
+    subjects, objects = codes[:, 0].astype(np.int64), codes[:, 2].astype(np.int64)
+    keys = np.minimum(subjects, objects) * number_of_entities + np.maximum(subjects, objects)
+    _, first, groups = np.unique(keys, return_index=True, return_inverse=True)
+    return groups.ravel(), codes[first, 1]
+
+
+def _deal_groups(groups: np.ndarray, strata: np.ndarray, test_ratio: float, validation_ratio: float,
+                 random_state: np.random.RandomState) -> np.ndarray:
+    """Assign each group to a split, so the splits of each stratum have about the right shares of its triples."""
+    sizes = np.bincount(groups, minlength=len(strata))
+
+    # the random keys shuffle the groups within each stratum
+    order = np.lexsort((random_state.permutation(len(strata)), strata))
+    ordered_sizes, ordered_strata = sizes[order], strata[order]
+    ends = np.cumsum(ordered_sizes)
+    stratum_starts = np.searchsorted(ordered_strata, ordered_strata)
+    before = ends - ordered_sizes - (ends[stratum_starts] - ordered_sizes[stratum_starts])
+    stratum_sizes = np.bincount(strata, weights=sizes)
+
+    # a group goes where its middle falls, so a stratum with a single group is never held out
+    positions = (before + ordered_sizes / 2) / stratum_sizes[ordered_strata] if len(order) else np.empty(0)
+    ordered_splits = np.full(len(order), _TRAIN_CODE, dtype=np.int8)
+    ordered_splits[positions < test_ratio + validation_ratio] = _VALIDATION_CODE
+    ordered_splits[positions < test_ratio] = _TEST_CODE
+
+    group_splits = np.empty_like(ordered_splits)
+    group_splits[order] = ordered_splits
+    return group_splits
+
+
+def _get_uncovered(codes: np.ndarray, splits: np.ndarray, number_of_entities: int,
+                   number_of_relations: int) -> np.ndarray:
+    """Get a mask of the held-out triples with an entity or a relation that isn't in the training set."""
+    training = codes[splits == _TRAIN_CODE]
+    entities = np.zeros(number_of_entities, dtype=bool)
+    entities[training[:, [0, 2]].ravel()] = True
+    relations = np.zeros(number_of_relations, dtype=bool)
+    relations[training[:, 1]] = True
+    covered = entities[codes[:, 0]] & entities[codes[:, 2]] & relations[codes[:, 1]]
+    return (splits != _TRAIN_CODE) & ~covered
+
+
+def get_split_directory() -> str:
+    """Get the directory in which splits are cached."""
+    directory = os.path.join(biokeen_config.data_directory, 'splits')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _get_split_key(paths: Mapping[str, str], test_ratio: float, validation_ratio: float, seed: int) -> str:
+    """Hash the databases, the sizes and modification times of their KEEN TSVs, and how they're split."""
+    inputs = []
+    for database in sorted(paths):
+        stat = os.stat(paths[database])
+        inputs.append([database, os.path.abspath(paths[database]), stat.st_size, stat.st_mtime_ns])
+    inputs.append([SPLIT_VERSION, test_ratio, validation_ratio, seed])
+    return hashlib.sha256(json.dumps(inputs).encode('utf-8')).hexdigest()
+
+
+def ensure_split_paths(paths: Mapping[str, str], test_ratio: float = 0.1, validation_ratio: float = 0.0,
+                       seed: int = 0, directory: Optional[str] = None) -> Dict[str, str]:
+    """Split the KEEN TSVs of one or more databases, unless they were already split the same way.
+
+    :param paths: A dictionary from the names of the databases to the paths of their KEEN TSVs. Several databases
+     are merged first. See :func:`biokeen.merge.ensure_merged_pykeen_paths`.
+    :param test_ratio: The share of the triples of each relation to hold out for testing
+    :param validation_ratio: The share of the triples of each relation to hold out for validation
+    :param seed: The seed of the random number generator
+    :param directory: The directory in which the splits are cached. Defaults to the ``splits`` folder in the data
+     directory.
+    :return: The paths of the KEEN TSVs of the splits, by the names in :data:`SPLITS`
+
+    The description of a split, with the number of triples in each set, is written last, next to them, as
+    ``<prefix>.split.json``. Only splits with a description are used. A split is locked while it's written, so
+    processes sharing the data directory make each split only once.
+    """
+    if not paths:
+        raise ValueError('no databases to split')
+
+    key = _get_split_key(paths, test_ratio, validation_ratio, seed)
+    prefix = os.path.join(directory or get_split_directory(), f'{"+".join(sorted(paths))}.{key[:16]}')
+    split_paths = {name: f'{prefix}.{name}.{biokeen_config.keen_tsv_ext}' for name in SPLITS}
+    description_path = f'{prefix}.split.json'
+
+    with FileLock(f'{prefix}.lock', stale_after=biokeen_config.lock_stale_timeout):
+        if _is_split(description_path, key, split_paths):
+            logger.debug(f'{EMOJI} using split: {description_path}')
+            return split_paths
+
+        logger.info(f'{EMOJI} splitting {", ".join(sorted(paths))}')
+        triples = _load_triples(paths)
+        splits = split_triples(triples, test_ratio=test_ratio, validation_ratio=validation_ratio, seed=seed)
+        for name, split in splits.items():
+            _write_split(split, split_paths[name])
+
+        description = {
+            'key': key,
+            'databases': sorted(paths),
+            'test_ratio': test_ratio,
+            'validation_ratio': validation_ratio,
+            'seed': seed,
+            'triples': {name: len(split) for name, split in splits.items()},
+        }
+        with atomic_path(description_path) as temporary_path, open(temporary_path, 'w') as file:
+            json.dump(description, file, indent=2)
+
+    logger.info(f'{EMOJI} split {len(triples)} triples: ' + ', '.join(
+        f'{len(split)} {name}' for name, split in splits.items()
+    ))
+    return split_paths
+
+
+def _load_triples(paths: Mapping[str, str]) -> CompactTriples:
+    if 1 == len(paths):
+        path, = paths.values()
+        return load_pykeen_triples(path)
+    return ensure_merged_pykeen_paths(paths)
+
+
+def _write_split(triples: CompactTriples, path: str) -> None:
+    """Write the triples of a split, or an empty file if there are none, so every split can be loaded."""
+    if not to_pykeen_path(triples, path):
+        with atomic_path(path) as temporary_path:
+            open(temporary_path, 'w').close()
+
+
+def _is_split(description_path: str, key: str, split_paths: Mapping[str, str]) -> bool:
+    if not os.path.exists(description_path) or not all(map(os.path.exists, split_paths.values())):
+        return False
+
+    try:
+        with open(description_path) as file:
+            return json.load(file).get('key') == key
+    except (OSError, ValueError):
+        logger.warning(f'{EMOJI} could not read split: {description_path}')
+        return False
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""Synthetic BEL graphs for testing and benchmarking.
+
+:func:`generate_bel_graph` builds a random BEL graph from a seed. Its edges are a mix of the relations and entity types
+found in Bio2BEL databases, in roughly the proportions the converters see in practice, plus a small share of edges no
+converter handles. Node popularity follows a power law, so some nodes are hubs that take part in many edges.
+"""
+
+import itertools as itt
+import random
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from pybel import BELGraph
+from pybel.constants import (
+    ASSOCIATION, CAUSES_NO_CHANGE, DECREASES, DIRECTLY_DECREASES, EQUIVALENT_TO, HAS_COMPONENT, INCREASES, IS_A,
+    NEGATIVE_CORRELATION, PART_OF, POSITIVE_CORRELATION, REGULATES,
+)
+from pybel.dsl import (
+    Abundance, BaseEntity, BiologicalProcess, ComplexAbundance, MicroRna, NamedComplexAbundance, Pathology, Protein,
+    Rna, activity,
+)
+
+__all__ = [
+    'generate_bel_graph',
+]
+
+_PROTEINS = 'proteins'
+_RNAS = 'rnas'
+_MIRNAS = 'mirnas'
+_CHEMICALS = 'chemicals'
+_PATHOLOGIES = 'pathologies'
+_PROCESSES = 'processes'
+_FAMILIES = 'families'
+_COMPLEXES = 'complexes'
+
+#: The share of the nodes of each type
+_NODE_SHARES = {
+    _PROTEINS: 0.40,
+    _RNAS: 0.10,
+    _MIRNAS: 0.05,
+    _CHEMICALS: 0.10,
+    _PATHOLOGIES: 0.10,
+    _PROCESSES: 0.15,
+    _FAMILIES: 0.05,
+    _COMPLEXES: 0.05,
+}
+
+
+class _EdgeKind(NamedTuple):
+    """A kind of edge that is generated."""
+
+    #: The relative frequency of this kind of edge
+    weight: float
+    #: The node pool subjects are drawn from
+    subjects: str
+    #: The relations, one of which is chosen at random
+    relations: Tuple[str, ...]
+    #: The node pool objects are drawn from
+    objects: str
+    #: Does the edge have a citation and evidence?
+    qualified: bool = True
+    #: Is the object's activity modified?
+    object_activity: bool = False
+
+
+_EDGE_KINDS = [
+    # complex membership and ontology
+    _EdgeKind(0.05, _PROTEINS, (PART_OF,), _FAMILIES, qualified=False),
+    _EdgeKind(0.04, _FAMILIES, (HAS_COMPONENT,), _PROTEINS, qualified=False),
+    _EdgeKind(0.05, _PROCESSES, (PART_OF,), _PROCESSES, qualified=False),
+    _EdgeKind(0.08, _PROTEINS, (PART_OF,), _PROCESSES, qualified=False),
+    _EdgeKind(0.05, _PROTEINS, (IS_A,), _FAMILIES, qualified=False),
+    _EdgeKind(0.02, _CHEMICALS, (EQUIVALENT_TO,), _CHEMICALS, qualified=False),
+    # regulation
+    _EdgeKind(0.12, _PROTEINS, (INCREASES, DECREASES, REGULATES), _PROTEINS, object_activity=True),
+    _EdgeKind(0.03, _COMPLEXES, (INCREASES, DECREASES), _PROTEINS, object_activity=True),
+    _EdgeKind(0.12, _PROTEINS, (INCREASES, DECREASES, REGULATES), _PROTEINS),
+    _EdgeKind(0.10, _MIRNAS, (DECREASES, DIRECTLY_DECREASES), _RNAS),
+    # chemicals and diseases
+    _EdgeKind(0.05, _CHEMICALS, (DECREASES,), _PATHOLOGIES),
+    _EdgeKind(0.05, _CHEMICALS, (INCREASES,), _PATHOLOGIES),
+    _EdgeKind(0.06, _PROTEINS, (POSITIVE_CORRELATION, NEGATIVE_CORRELATION), _PROTEINS),
+    _EdgeKind(0.10, _PROTEINS, (ASSOCIATION,), _PATHOLOGIES),
+    # not handled by any converter
+    _EdgeKind(0.03, _PROTEINS, (CAUSES_NO_CHANGE,), _PROTEINS),
+]
+
+
+def generate_bel_graph(number_edges: int = 1000, number_nodes: Optional[int] = None,
+                       seed: Optional[int] = None) -> BELGraph:
+    """Generate a random BEL graph.
+
+    :param number_edges: The number of edges to generate. The graph's number of edges differs slightly, since
+     duplicate unqualified edges are merged and PyBEL adds an edge from each complex to each of its members.
+    :param number_nodes: The number of nodes to generate. Defaults to a fifth of the number of edges. Nodes that end
+     up in no edge are not in the graph.
+    :param seed: The seed for the random number generator. The same seed always gives the same graph.
+    """
+    rng = random.Random(seed)
+    if number_nodes is None:
+        number_nodes = max(len(_NODE_SHARES), number_edges // 5)
+
+    pools = _generate_node_pools(rng, number_nodes)
+    pickers = {
+        name: _get_picker(rng, nodes)
+        for name, nodes in pools.items()
+    }
+
+    graph = BELGraph(name='synthetic', version=str(seed))
+    edge_kinds = rng.choices(_EDGE_KINDS, weights=[kind.weight for kind in _EDGE_KINDS], k=number_edges)
+    for i, kind in enumerate(edge_kinds):
+        u, v = pickers[kind.subjects](), pickers[kind.objects]()
+        relation = rng.choice(kind.relations)
+        if not kind.qualified:
+            graph.add_unqualified_edge(u, v, relation)
+            continue
+
+        graph.add_qualified_edge(
+            u, v,
+            relation=relation,
+            citation=str(rng.randint(1_000_000, 31_000_000)),
+            evidence=f'Synthetic evidence {i}',
+            annotations={'Species': rng.choice(['9606', '10090', '10116'])},
+            object_modifier=activity(rng.choice(['cat', 'kin', 'tscript'])) if kind.object_activity else None,
+        )
+
+    return graph
+
+
+def _generate_node_pools(rng: random.Random, number_nodes: int) -> Dict[str, List[BaseEntity]]:
+    sizes = {
+        name: max(1, round(share * number_nodes))
+        for name, share in _NODE_SHARES.items()
+    }
+
+    proteins = [Protein('HGNC', f'GENE{i}', identifier=str(i)) for i in range(sizes[_PROTEINS])]
+    return {
+        _PROTEINS: proteins,
+        _RNAS: [Rna('HGNC', f'GENE{i}', identifier=str(i)) for i in range(sizes[_RNAS])],
+        _MIRNAS: [MicroRna('MIRBASE', f'hsa-mir-{i}') for i in range(sizes[_MIRNAS])],
+        _CHEMICALS: [Abundance('CHEBI', f'chemical {i}', identifier=str(i)) for i in range(sizes[_CHEMICALS])],
+        _PATHOLOGIES: [Pathology('MESHD', f'Disease {i}', identifier=f'D{i:06}') for i in range(sizes[_PATHOLOGIES])],
+        _PROCESSES: [BiologicalProcess('GO', f'process {i}', identifier=f'{i:07}') for i in range(sizes[_PROCESSES])],
+        _FAMILIES: [NamedComplexAbundance('FPLX', f'FAMILY{i}') for i in range(sizes[_FAMILIES])],
+        _COMPLEXES: [
+            ComplexAbundance(_sample_members(rng, proteins))
+            for _ in range(sizes[_COMPLEXES])
+        ],
+    }
+
+
+def _sample_members(rng: random.Random, proteins: Sequence[Protein]) -> List[Protein]:
+    return rng.sample(proteins, k=min(len(proteins), rng.randint(2, 4)))
+
+
+def _get_picker(rng: random.Random, nodes: Sequence[BaseEntity]) -> Callable[[], BaseEntity]:
+    """Get a function that picks a node, where the i-th node is picked with a probability proportional to 1 / (i+1)."""
+    cum_weights = list(itt.accumulate(1 / rank for rank in range(1, len(nodes) + 1)))
+    return lambda: rng.choices(nodes, cum_weights=cum_weights)[0]
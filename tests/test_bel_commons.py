@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the cached acquisition of networks from BEL Commons."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+from biokeen.bel_commons import ensure_bel_commons_network, ensure_bel_commons_networks
+from biokeen.constants import biokeen_config
+from biokeen.content import handle_bel_commons
+from pybel import to_json
+from tests.test_convert import _make_graph, converters_true_list
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves the same network for every network identifier, honoring ETags."""
+
+    body = json.dumps(to_json(_make_graph())).encode('utf-8')
+    etag = '"{}"'.format(hashlib.sha256(body).hexdigest())
+    requests = []
+    delay = 0.0
+
+    def do_GET(self):  # noqa: N802
+        """Serve a network."""
+        self.requests.append((self.path, self.headers.get('If-None-Match')))
+        time.sleep(self.delay)
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        """Do not log requests."""
+
+
+class TestBELCommons(unittest.TestCase):
+    """Tests for the BEL Commons cache against a local stand-in server."""
+
+    def setUp(self):
+        """Start a local server and use a temporary data directory."""
+        _Handler.requests = []
+        _Handler.delay = 0.0
+        self.server = HTTPServer(('127.0.0.1', 0), _Handler)
+        self.host = 'http://127.0.0.1:{}'.format(self.server.server_port)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.patch = mock.patch.object(biokeen_config, 'data_directory', self.directory.name)
+        self.patch.start()
+
+    def tearDown(self):
+        """Stop the server and remove the temporary data directory."""
+        self.patch.stop()
+        self.directory.cleanup()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_revalidate(self):
+        """Test that a cached network is revalidated instead of downloaded and converted again."""
+        path = ensure_bel_commons_network(1, host=self.host)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual([('/api/network/1/export/nodelink', None)], _Handler.requests)
+
+        mtime = os.stat(path).st_mtime_ns
+        self.assertEqual(path, ensure_bel_commons_network('1', host=self.host))
+        self.assertEqual(('/api/network/1/export/nodelink', _Handler.etag), _Handler.requests[-1])
+        self.assertEqual(mtime, os.stat(path).st_mtime_ns)
+
+        triples = handle_bel_commons(1, host=self.host)
+        self.assertEqual(
+            {triple for *_, triple in converters_true_list},
+            set(map(tuple, triples)),
+        )
+
+    def test_offline(self):
+        """Test that the cache is used when the server can't be reached."""
+        path = ensure_bel_commons_network(1, host=self.host)
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertEqual(path, ensure_bel_commons_network(1, host=self.host))
+
+    def test_timeout(self):
+        """Test that the cache is used when the server doesn't respond in time."""
+        path = ensure_bel_commons_network(1, host=self.host)
+        _Handler.delay = 1.0
+        with mock.patch.object(biokeen_config, 'bel_commons_timeout', 0.1):
+            self.assertEqual(path, ensure_bel_commons_network(1, host=self.host))
+
+    def test_corrupt_meta(self):
+        """Test that unreadable metadata is treated as no cache, so the network is downloaded again."""
+        path = ensure_bel_commons_network(1, host=self.host)
+        meta_path = os.path.join(os.path.dirname(path), '1.http.json')
+        with open(meta_path, 'w') as file:
+            file.write('{"etag": ')
+
+        self.assertEqual(path, ensure_bel_commons_network(1, host=self.host))
+        self.assertEqual(('/api/network/1/export/nodelink', None), _Handler.requests[-1])
+        with open(meta_path) as file:
+            self.assertEqual(_Handler.etag, json.load(file)['etag'])
+
+    def test_many(self):
+        """Test fetching several networks concurrently."""
+        paths = ensure_bel_commons_networks([1, 2, '3', 3], host=self.host, n_workers=3)
+        self.assertEqual({1, 2, 3}, set(paths))
+        self.assertEqual(3, len(set(paths.values())))
+        self.assertTrue(all(os.path.exists(path) for path in paths.values()))
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for columnar copies of KEEN TSV files."""
+
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from biokeen.convert import load_pykeen_triples, to_pykeen_df, to_pykeen_path
+from biokeen.convert.columnar import (
+    COLUMNAR_FORMATS, from_pykeen_columnar_path, get_columnar_path, iterate_columnar_paths, read_columnar_path,
+)
+from biokeen.convert.io import _read_pykeen_tsv
+from tests.test_convert import _make_graph
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+@unittest.skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+class TestColumnar(unittest.TestCase):
+    """Tests for writing and reading columnar files next to KEEN TSV files."""
+
+    def setUp(self):
+        """Make a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.keen.tsv')
+        self.df = to_pykeen_df(_make_graph(), use_tqdm=False)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_roundtrip(self):
+        """Test that each format stores the same triples as the TSV, dictionary-encoded."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        for fmt in COLUMNAR_FORMATS:
+            with self.subTest(format=fmt):
+                to_pykeen_path(self.df, self.path, columnar=fmt)
+                columnar_path = get_columnar_path(self.path, fmt)
+                self.assertEqual(os.path.join(self.directory.name, f'test.keen.{fmt}'), columnar_path)
+                self.assertEqual([columnar_path], iterate_columnar_paths(self.path))
+
+                expected = _read_pykeen_tsv(self.path)
+                for triples in (from_pykeen_columnar_path(self.path), read_columnar_path(columnar_path)):
+                    self.assertEqual(expected.entities.tolist(), triples.entities.tolist())
+                    self.assertEqual(expected.relations.tolist(), triples.relations.tolist())
+                    self.assertEqual(expected.triples.tolist(), triples.triples.tolist())
+
+                if fmt == 'parquet':
+                    schema = pq.read_schema(columnar_path)
+                    self.assertTrue(all(pa.types.is_dictionary(field.type) for field in schema))
+
+                os.remove(columnar_path)
+
+    def test_stale(self):
+        """Test that a columnar file is used to load the triples until the TSV changes."""
+        to_pykeen_path(self.df, self.path, columnar='feather')
+        self.assertEqual(len(self.df.index), len(load_pykeen_triples(self.path)))
+
+        with open(self.path, 'a') as file:
+            print('HGNC:3', 'partOf', 'GO:3', sep='\t', file=file)
+
+        self.assertIsNone(from_pykeen_columnar_path(self.path))
+        self.assertEqual(len(self.df.index) + 1, len(load_pykeen_triples(self.path)))
+
+    def test_invalid_format(self):
+        """Test that only the columnar formats can be written."""
+        with self.assertRaises(ValueError):
+            get_columnar_path(self.path, 'csv')
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for acquiring and caching content."""
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from biokeen.cache import get_manifest_path, read_manifest
+from biokeen.constants import biokeen_config
+from biokeen.content import install_bio2bel_module, install_bio2bel_modules
+from biokeen.convert import TripleFilter, load_pykeen_path
+from biokeen.convert.columnar import from_pykeen_columnar_path
+from biokeen.index import read_index
+from pybel import to_json_path
+from tests.test_columnar import HAS_PYARROW
+from tests.test_convert import _make_graph
+
+NAME = 'biokeentest'
+
+
+class TestInstall(unittest.TestCase):
+    """Tests for the build cache of :func:`install_bio2bel_module`."""
+
+    def setUp(self):
+        """Use a temporary data directory with a cached BEL graph."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.patch = mock.patch.object(biokeen_config, 'data_directory', self.directory.name)
+        self.patch.start()
+        # for worker processes that do not inherit the patched configuration
+        self.env_patch = mock.patch.dict(os.environ, {'BIOKEEN_DATA_DIRECTORY': self.directory.name})
+        self.env_patch.start()
+        self.json_path = os.path.join(self.directory.name, f'{NAME}.bel.json')
+        to_json_path(_make_graph(), self.json_path)
+
+    def tearDown(self):
+        """Remove the temporary data directory."""
+        self.env_patch.stop()
+        self.patch.stop()
+        self.directory.cleanup()
+
+    def _install(self, **kwargs) -> str:
+        with mock.patch('biokeen.content.to_pykeen_triples', wraps=_to_pykeen_triples) as to_pykeen_triples:
+            path = install_bio2bel_module(NAME, **kwargs)
+        self.converted = to_pykeen_triples.called
+        return path
+
+    def test_reconvert_on_converter_change(self):
+        """Test that the KEEN TSV is only rebuilt from the cached BEL graph when the converters change."""
+        path = self._install()
+        self.assertTrue(self.converted)
+        self.assertTrue(os.path.exists(path))
+        manifest = read_manifest(get_manifest_path(self.directory.name, NAME))
+        self.assertIn('bel', manifest)
+        self.assertIn('keen', manifest)
+        self.assertEqual(os.path.basename(path), read_index()[NAME]['path'])
+
+        self.assertEqual(path, self._install())
+        self.assertFalse(self.converted)
+
+        with mock.patch('biokeen.convert.dispatch.ConverterDispatcher.get_fingerprint', return_value='changed'):
+            self.assertEqual(path, self._install())
+        self.assertTrue(self.converted)
+
+    @unittest.skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+    def test_columnar(self):
+        """Test that a columnar file is written next to the KEEN TSV, even if it's already up to date."""
+        path = install_bio2bel_module(NAME)
+        columnar_path = os.path.join(self.directory.name, f'{NAME}.keen.parquet')
+        self.assertFalse(os.path.exists(columnar_path))
+
+        self.assertEqual(path, install_bio2bel_module(NAME, columnar='parquet'))
+        self.assertTrue(os.path.exists(columnar_path))
+        self.assertIsNotNone(from_pykeen_columnar_path(path))
+
+        with mock.patch('biokeen.convert.dispatch.ConverterDispatcher.get_fingerprint', return_value='changed'):
+            self.assertEqual(path, install_bio2bel_module(NAME, columnar='feather'))
+        self.assertIsNotNone(from_pykeen_columnar_path(path, fmt='feather'))
+        self.assertIsNone(from_pykeen_columnar_path(path, fmt='parquet'))
+
+        for kwargs in ({'stream': True}, {'external_sort': True}):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                install_bio2bel_module(NAME, columnar='parquet', **kwargs)
+
+    def test_out_of_core(self):
+        """Test that streamed or sorted triples aren't read back into memory for a sidecar."""
+        sidecar_path = os.path.join(self.directory.name, f'{NAME}.keen.npz')
+        for kwargs in ({'stream': True}, {'external_sort': True}):
+            with self.subTest(**kwargs):
+                get_fingerprint = mock.patch(
+                    'biokeen.convert.dispatch.ConverterDispatcher.get_fingerprint', return_value=str(kwargs),
+                )
+                with get_fingerprint, mock.patch('biokeen.content.load_pykeen_triples') as load_pykeen_triples:
+                    path = install_bio2bel_module(NAME, **kwargs)
+                load_pykeen_triples.assert_not_called()
+                self.assertTrue(os.path.exists(path))
+                self.assertFalse(os.path.exists(sidecar_path))
+
+    def test_filter(self):
+        """Test that the filter is recorded, and that the cached BEL graph is reconverted when it changes."""
+        triple_filter = TripleFilter(exclude_relations=['isA'])
+        path = self._install(triple_filter=triple_filter, instrument=True)
+        self.assertTrue(self.converted)
+        self.assertNotIn('isA', load_pykeen_path(path)[:, 1].tolist())
+        with open(os.path.join(self.directory.name, f'{NAME}.keen.summary.json')) as file:
+            self.assertEqual({'exclude_relations': ['isA']}, json.load(file)['filter'])
+        self.assertEqual({'exclude_relations': ['isA']}, read_index()[NAME]['filter'])
+
+        self.assertEqual(path, self._install(triple_filter=TripleFilter(exclude_relations=['isA'])))
+        self.assertFalse(self.converted)
+
+        self.assertEqual(path, self._install())
+        self.assertTrue(self.converted)
+        self.assertIn('isA', load_pykeen_path(path)[:, 1].tolist())
+        self.assertIsNone(read_index()[NAME]['filter'])
+
+        with self.assertRaises(ValueError):
+            install_bio2bel_module(NAME, incremental=True, triple_filter=triple_filter)
+
+    def test_instrument(self):
+        """Test that statistics about the converters are written next to the summary."""
+        path = install_bio2bel_module(NAME, instrument=True)
+        with open(os.path.join(self.directory.name, f'{NAME}.keen.stats.json')) as file:
+            stats = json.load(file)
+        self.assertEqual(_make_graph().number_of_edges(), stats['edges'])
+        self.assertTrue(os.path.exists(path))
+
+    def test_pipeline(self):
+        """Test that overlapping the stages of a rebuild gives the same outputs and manifest as running them in turn."""
+        graph = _make_graph()
+        outputs = []
+        for pipeline in (False, True):
+            with mock.patch('biokeen.content._build_bel_graph', return_value=graph):
+                path = install_bio2bel_module(NAME, rebuild=True, pipeline=pipeline)
+
+            manifest = read_manifest(get_manifest_path(self.directory.name, NAME))
+            graph_path = os.path.join(self.directory.name, manifest['bel']['output']['path'])
+            self.assertTrue(os.path.exists(graph_path))
+            outputs.append((
+                _read_bytes(path),
+                _read_bytes(os.path.join(self.directory.name, f'{NAME}.keen.summary.json')),
+                _read_bytes(os.path.join(self.directory.name, f'{NAME}.keen.unhandled.json')),
+                gzip.decompress(_read_bytes(graph_path)),  # the gzip header has a timestamp
+            ))
+            self.assertEqual(manifest['bel']['output']['sha256'], manifest['keen']['inputs']['bel_sha256'])
+
+        self.assertEqual(outputs[0], outputs[1])
+
+        # the cached BEL graph and its manifest are usable afterwards
+        self.assertEqual(path, self._install())
+        self.assertFalse(self.converted)
+
+    def test_reconvert_on_bel_change(self):
+        """Test that the KEEN TSV is rebuilt when the cached BEL graph changes."""
+        self._install()
+        graph = _make_graph()
+        graph.remove_edges_from(list(graph.edges())[:3])
+        to_json_path(graph, self.json_path)
+
+        self._install()
+        self.assertTrue(self.converted)
+
+    def test_concurrent(self):
+        """Test that a database installed by several threads at once is only converted by one of them."""
+        with mock.patch('biokeen.content.to_pykeen_triples', wraps=_to_pykeen_triples) as to_pykeen_triples:
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                paths = list(executor.map(lambda _: install_bio2bel_module(NAME), range(3)))
+        self.assertEqual(1, to_pykeen_triples.call_count)
+        self.assertEqual(1, len(set(paths)))
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, f'{NAME}.lock')))
+
+    def test_install_many(self):
+        """Test installing several databases concurrently, where one of them fails."""
+        with open(os.path.join(self.directory.name, 'broken.bel.json'), 'w') as file:
+            print('{"not": "a graph"', file=file)
+
+        results = install_bio2bel_modules([NAME, 'broken'], n_workers=2, stream=True)
+        self.assertEqual({NAME, 'broken'}, set(results))
+
+        self.assertIsNone(results[NAME].error)
+        self.assertTrue(os.path.exists(results[NAME].path))
+
+        self.assertIsNone(results['broken'].path)
+        self.assertIsNotNone(results['broken'].error)
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def _to_pykeen_triples(*args, **kwargs):
+    from biokeen.convert import to_pykeen_triples
+    return to_pykeen_triples(*args, use_tqdm=False, **kwargs)
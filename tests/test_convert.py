@@ -2,16 +2,33 @@
 
 """Tests for the conversion procedure."""
 
+import inspect
+import os
+import tempfile
 import unittest
 from typing import Tuple, Type
+from unittest import mock
 
-from biokeen.convert import get_triple
+import numpy as np
+import pandas as pd
+
+from biokeen.convert import (
+    CompactTriples, TripleSummarizer, from_pykeen_sidecar_path, get_pykeen_summary, get_sidecar_path, get_triple,
+    load_pykeen_path, load_pykeen_triples, stream_pykeen_path, to_pykeen_df, to_pykeen_path, to_pykeen_sidecar_path,
+    to_pykeen_triples,
+)
 from biokeen.convert.converters import (
     AssociationConverter, Converter, CorrelationConverter, DecreasesAmountConverter, DrugIndicationConverter,
     DrugSideEffectConverter, EquivalenceConverter, IncreasesAmountConverter, IsAConverter,
     MiRNADecreasesExpressionConverter, NamedComplexHasComponentConverter,
     PartOfNamedComplexConverter, RegulatesActivityConverter, RegulatesAmountConverter, SubprocessPartOfBiologicalProcess
 )
+from biokeen.convert.dispatch import ConverterDispatcher, DEFAULT_CONVERTERS
+from biokeen.convert.instrumentation import InstrumentedDispatcher
+from biokeen.convert.io import _iterate_chunks, _iterate_triples_parallel
+from biokeen.convert.labels import CachedEntityLabeler
+from biokeen.convert.unhandled import UnhandledEdges
+from biokeen.testing import generate_bel_graph
 from pybel import BELGraph
 from pybel.constants import (
     ASSOCIATION, DECREASES, EQUIVALENT_TO, HAS_COMPONENT, INCREASES, IS_A, NEGATIVE_CORRELATION, OBJECT, PART_OF,
@@ -105,6 +122,11 @@ class TestConverters(unittest.TestCase):
             converter.convert(u, v, key, edge_data),
             msg=f'Conversion failed: {converter.__name__}',
         )
+        self.assertEqual(
+            triple,
+            converter.convert(u, v, key, edge_data, labeler=CachedEntityLabeler()),
+            msg=f'Conversion with cached labels failed: {converter.__name__}',
+        )
         graph = BELGraph()
         graph.add_edge(u, v, key=key, **edge_data)
         self.assertEqual(
@@ -124,3 +146,376 @@ class TestConverters(unittest.TestCase):
         for converter, u, v, edge_data in converters_false_list:
             with self.subTest():
                 self.assertFalse(converter.predicate(u, v, n(), edge_data))
+
+
+class TestDispatcher(unittest.TestCase):
+    """Tests for the converter dispatcher."""
+
+    def setUp(self):
+        """Build a dispatcher over the default converters."""
+        self.dispatcher = ConverterDispatcher(DEFAULT_CONVERTERS)
+
+    def test_first_match_wins(self):
+        """Test the dispatcher picks the same converter as a linear scan over all converters."""
+        for _, u, v, edge_data, _ in converters_true_list:
+            key = n()
+            expected = next(
+                (converter for converter in DEFAULT_CONVERTERS if converter.predicate(u, v, key, edge_data)),
+                None,
+            )
+            with self.subTest(u=u, v=v, edge_data=edge_data):
+                self.assertIs(expected, self.dispatcher.get_converter(u, v, key, edge_data))
+
+    def test_candidates(self):
+        """Test that only applicable converters are candidates."""
+        candidates = self.dispatcher.get_candidates(PART_OF, BiologicalProcess, BiologicalProcess)
+        self.assertEqual((SubprocessPartOfBiologicalProcess,), candidates)
+
+        candidates = self.dispatcher.get_candidates(INCREASES, Abundance, Pathology)
+        self.assertEqual(DrugSideEffectConverter, candidates[0])
+        self.assertNotIn(DrugIndicationConverter, candidates)
+        self.assertNotIn(RegulatesAmountConverter, candidates)
+
+        self.assertEqual((), self.dispatcher.get_candidates(PART_OF, Rna, Rna))
+        self.assertIs(candidates, self.dispatcher.get_candidates(INCREASES, Abundance, Pathology))
+
+    def test_fingerprint(self):
+        """Test that the fingerprint changes with the converters, the labels and the version, but not the I/O code."""
+        fingerprint = self.dispatcher.get_fingerprint()
+        self.assertEqual(fingerprint, ConverterDispatcher(DEFAULT_CONVERTERS).get_fingerprint())
+        self.assertNotEqual(fingerprint, ConverterDispatcher(DEFAULT_CONVERTERS[::-1]).get_fingerprint())
+
+        get_source = inspect.getsource
+
+        def get_changed_source(module):
+            source = get_source(module)
+            return source + '# changed\n' if module.__name__ == 'biokeen.convert.labels' else source
+
+        with mock.patch('inspect.getsource', get_changed_source):
+            self.assertNotEqual(fingerprint, self.dispatcher.get_fingerprint())
+
+        with mock.patch('biokeen.convert.dispatch.CONVERSION_VERSION', -1):
+            self.assertNotEqual(fingerprint, self.dispatcher.get_fingerprint())
+
+        def get_changed_io_source(module):
+            source = get_source(module)
+            return source + '# changed\n' if module.__name__ == 'biokeen.convert.io' else source
+
+        with mock.patch('inspect.getsource', get_changed_io_source):
+            self.assertEqual(fingerprint, self.dispatcher.get_fingerprint())
+
+
+class TestLabels(unittest.TestCase):
+    """Tests for labeling entities."""
+
+    def test_cached(self):
+        """Test that each node is labeled once and equal labels share the same string."""
+        labeler = CachedEntityLabeler()
+        p1 = Protein('HGNC', 'YFG')
+        label = labeler.get_curie(p1)
+        self.assertEqual('HGNC:YFG', label)
+        self.assertIs(label, labeler.get_curie(p1))
+        self.assertEqual(1, len(labeler))
+
+        p2 = Protein('HGNC', ''.join(['Y', 'FG']))
+        self.assertIs(label, labeler.get_curie(p2))
+        self.assertEqual(2, len(labeler))
+
+        self.assertIs(labeler.get_bel(p1), labeler.get_bel(p2))
+
+
+def _make_graph() -> BELGraph:
+    """Build a BEL graph with an edge for each of the test cases."""
+    graph = BELGraph()
+    for _, u, v, edge_data, _ in converters_true_list:
+        graph.add_edge(u, v, key=n(), **edge_data)
+    return graph
+
+
+class TestToPykeenDf(unittest.TestCase):
+    """Tests for converting a whole BEL graph."""
+
+    def test_parallel(self):
+        """Test that parallel conversion gives the same result as serial conversion."""
+        graph = _make_graph()
+        serial_df = to_pykeen_df(graph, use_tqdm=False)
+        self.assertEqual(
+            {triple for *_, triple in converters_true_list},
+            set(map(tuple, serial_df.values)),
+        )
+
+        parallel_df = to_pykeen_df(graph, use_tqdm=False, n_jobs=2, chunk_size=3)
+        self.assertTrue(serial_df.equals(parallel_df))
+
+    def test_parallel_window(self):
+        """Test that only a couple of chunks per process are submitted ahead of the triples that are consumed."""
+        submitted = []
+
+        def iterate_chunks(it, chunk_size):
+            for chunk in _iterate_chunks(it, chunk_size):
+                submitted.append(chunk)
+                yield chunk
+
+        graph = generate_bel_graph(300, seed=0)
+        with mock.patch('biokeen.convert.io._iterate_chunks', iterate_chunks):
+            triples = _iterate_triples_parallel(graph, n_jobs=2, chunk_size=10, use_tqdm=False)
+            first = next(triples)
+            self.assertEqual(5, len(submitted))
+            self.assertEqual(
+                set(map(tuple, to_pykeen_triples(graph, use_tqdm=False).to_labels().tolist())),
+                {first, *triples},
+            )
+
+    def test_stream(self):
+        """Test that streaming to a file writes the same triples and summary as building a DataFrame."""
+        graph = _make_graph()
+        df = to_pykeen_df(graph, use_tqdm=False)
+
+        with tempfile.TemporaryDirectory() as directory:
+            df_path = os.path.join(directory, 'df.keen.tsv')
+            to_pykeen_path(df, df_path)
+
+            stream_path = os.path.join(directory, 'stream.keen.tsv')
+            summary = stream_pykeen_path(graph, stream_path, use_tqdm=False)
+
+            with open(df_path) as file:
+                expected_lines = sorted(file)
+            with open(stream_path) as file:
+                lines = list(file)
+
+        self.assertEqual(len(lines), len(set(lines)))
+        self.assertEqual(expected_lines, sorted(lines))
+        self.assertEqual(get_pykeen_summary(df), summary)
+
+    def test_stream_empty(self):
+        """Test that no file is left behind when streaming a graph without convertible edges."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'empty.keen.tsv')
+            summary = stream_pykeen_path(BELGraph(), path, use_tqdm=False)
+            self.assertFalse(os.path.exists(path))
+        self.assertEqual(0, summary['relations'])
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Tests for collecting statistics about the converters."""
+
+    def test_stats(self):
+        """Test that instrumenting the conversion gives the same triples and consistent statistics."""
+        graph = _make_graph()
+        expected_df = to_pykeen_df(graph, use_tqdm=False)
+
+        dispatcher = InstrumentedDispatcher(DEFAULT_CONVERTERS)
+        self.assertTrue(expected_df.equals(to_pykeen_df(graph, use_tqdm=False, dispatcher=dispatcher)))
+
+        stats = dispatcher.stats
+        self.assertEqual(graph.number_of_edges(), stats.edges)
+        self.assertEqual(
+            [converter.__name__ for converter in DEFAULT_CONVERTERS],
+            list(stats.converters),
+        )
+        self.assertEqual(stats.edges - stats.unhandled, sum(s.matches for s in stats.converters.values()))
+        self.assertLessEqual(stats.edges - stats.unhandled, sum(s.evaluations for s in stats.converters.values()))
+        self.assertEqual(
+            stats.converters['NamedComplexHasComponentConverter'].matches,
+            sum(
+                converter is NamedComplexHasComponentConverter
+                for converter, *_ in converters_true_list
+            ),
+        )
+        self.assertIsNotNone(stats.edges_per_second)
+
+        parallel_dispatcher = InstrumentedDispatcher(DEFAULT_CONVERTERS)
+        to_pykeen_df(graph, use_tqdm=False, n_jobs=2, chunk_size=3, dispatcher=parallel_dispatcher)
+        self.assertEqual(stats.edges, parallel_dispatcher.stats.edges)
+        self.assertEqual(
+            {name: s.matches for name, s in stats.converters.items()},
+            {name: s.matches for name, s in parallel_dispatcher.stats.converters.items()},
+        )
+
+
+class TestUnhandled(unittest.TestCase):
+    """Tests for reporting the edges no converter handles."""
+
+    def test_report(self):
+        """Test that unhandled edges are counted by kind and only rendered as BEL when the report is made."""
+        graph = _make_graph()
+        for i in range(10):
+            graph.add_edge(Protein('HGNC', f'U{i}'), Pathology('MESHD', 'D'), key=n(), relation='causesNoChange')
+
+        unhandled = UnhandledEdges(max_examples=3)
+        with mock.patch('pybel.BELGraph.edge_to_bel') as edge_to_bel:
+            to_pykeen_df(graph, use_tqdm=False, unhandled=unhandled)
+        edge_to_bel.assert_not_called()
+
+        report = unhandled.to_json()
+        self.assertEqual(
+            {'relation': 'causesNoChange', 'subject': 'Protein', 'object': 'Pathology', 'count': 10},
+            {key: value for key, value in report[0].items() if key != 'examples'},
+        )
+        self.assertEqual(3, len(report[0]['examples']))
+        self.assertEqual('p(HGNC:U0) causesNoChange path(MESHD:D)', report[0]['examples'][0])
+        self.assertEqual(len(unhandled), sum(kind['count'] for kind in report))
+
+        parallel_unhandled = UnhandledEdges(max_examples=3)
+        to_pykeen_df(graph, use_tqdm=False, n_jobs=2, chunk_size=4, unhandled=parallel_unhandled)
+        self.assertEqual(unhandled.counts, parallel_unhandled.counts)
+        self.assertEqual(3, len(parallel_unhandled.to_json()[0]['examples']))
+
+
+class TestKeenTSV(unittest.TestCase):
+    """Tests for writing and reading KEEN TSV files."""
+
+    def test_round_trip(self):
+        """Test that labels with quotes, tabs, and backslashes read back the same from the TSV as from the sidecar."""
+        triples = CompactTriples.from_labels([
+            ('complex(p(HGNC:"B C"), p(HGNC:A))', 'hasComponent', 'HGNC:A'),
+            ('"quoted"', 'isA', 'tab\there'),
+            ('back\\slash', 'partOf', 'line\nbreak'),
+        ])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'test.keen.tsv')
+            to_pykeen_path(triples, path)
+            with open(path) as file:
+                self.assertIn('complex(p(HGNC:"B C"), p(HGNC:A))\thasComponent\tHGNC:A\n', file.read())
+
+            np.testing.assert_array_equal(triples.to_labels(), load_pykeen_path(path))
+            self.assertTrue(os.path.exists(get_sidecar_path(path)))
+            np.testing.assert_array_equal(triples.to_labels(), load_pykeen_path(path))
+
+            df = triples.to_df()
+            to_pykeen_path(df, path)
+            os.remove(get_sidecar_path(path))
+            np.testing.assert_array_equal(triples.to_labels(), load_pykeen_path(path))
+
+
+class TestSidecar(unittest.TestCase):
+    """Tests for the binary sidecar of KEEN TSV files."""
+
+    def setUp(self):
+        """Write a KEEN TSV file to a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.keen.tsv')
+        to_pykeen_path(to_pykeen_df(_make_graph(), use_tqdm=False), self.path)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_sidecar(self):
+        """Test the sidecar is written, used, and invalidated when the TSV changes."""
+        sidecar_path = get_sidecar_path(self.path)
+        self.assertEqual(os.path.join(self.directory.name, 'test.keen.npz'), sidecar_path)
+        self.assertIsNone(from_pykeen_sidecar_path(self.path))
+
+        expected = load_pykeen_path(self.path)
+        self.assertTrue(os.path.exists(sidecar_path))
+        np.testing.assert_array_equal(expected, from_pykeen_sidecar_path(self.path))
+        np.testing.assert_array_equal(expected, load_pykeen_path(self.path))
+
+        with open(self.path, 'a') as file:
+            print('HGNC:3', 'partOf', 'GO:3', sep='\t', file=file)
+
+        self.assertIsNone(from_pykeen_sidecar_path(self.path))
+        triples = load_pykeen_path(self.path)
+        self.assertEqual(len(expected) + 1, len(triples))
+        np.testing.assert_array_equal(triples, from_pykeen_sidecar_path(self.path))
+
+    def test_compact(self):
+        """Test the sidecar stores the triples compactly and loads the same triples as parsing the TSV."""
+        triples = load_pykeen_triples(self.path)
+        with np.load(get_sidecar_path(self.path)) as sidecar:
+            self.assertEqual(np.int32, sidecar['triples'].dtype)
+            self.assertEqual(len(triples.entities), len(sidecar['entity_ends']))
+
+        expected = np.loadtxt(self.path, dtype=str, comments='@Comment@ Subject Predicate Object', delimiter='\t')
+        self.assertEqual(expected.tolist(), load_pykeen_path(self.path).tolist())
+        self.assertEqual(expected.tolist(), triples.to_labels().tolist())
+
+    def test_long_label(self):
+        """Test that one long label doesn't blow up the sidecar, and that non-ASCII labels read back."""
+        labels = [(f'HGNC:{i}', 'partOf', f'GO:{i % 100}') for i in range(2000)]
+        labels.append(('complex(' + 'p(HGNC:A), ' * 200 + 'p(HGNC:Ä))', 'hasComponent', 'HGNC:Ä'))
+        to_pykeen_path(CompactTriples.from_labels(labels), self.path)
+        to_pykeen_sidecar_path(self.path)
+
+        self.assertLess(os.path.getsize(get_sidecar_path(self.path)), 2 * os.path.getsize(self.path))
+        self.assertEqual(sorted(labels), list(map(tuple, load_pykeen_path(self.path).tolist())))
+
+
+class TestCompactTriples(unittest.TestCase):
+    """Tests for the compact representation of triples."""
+
+    def test_from_labels(self):
+        """Test that triples are sorted, deduplicated, and can be looked up by their labels."""
+        triples = CompactTriples.from_labels([
+            ('HGNC:B', 'partOf', 'GO:X'),
+            ('HGNC:A', 'increases', 'HGNC:B'),
+            ('HGNC:B', 'partOf', 'GO:X'),
+        ])
+        self.assertEqual(2, len(triples))
+        self.assertEqual(['GO:X', 'HGNC:A', 'HGNC:B'], triples.entities.tolist())
+        self.assertEqual(['increases', 'partOf'], triples.relations.tolist())
+        self.assertEqual(np.int32, triples.triples.dtype)
+        self.assertEqual([[1, 0, 2], [2, 1, 0]], triples.triples.tolist())
+        self.assertEqual(2, triples.entity_to_id['HGNC:B'])
+        self.assertEqual(1, triples.relation_to_id['partOf'])
+        self.assertEqual(
+            [['HGNC:A', 'increases', 'HGNC:B'], ['HGNC:B', 'partOf', 'GO:X']],
+            triples.to_labels().tolist(),
+        )
+
+    def test_to_pykeen_triples(self):
+        """Test that the compact triples from a BEL graph are the same as its KEEN DataFrame."""
+        graph = _make_graph()
+        df = to_pykeen_df(graph, use_tqdm=False)
+        triples = to_pykeen_triples(graph, use_tqdm=False)
+        self.assertEqual(df.values.tolist(), triples.to_labels().tolist())
+        self.assertTrue(df.equals(triples.to_df()))
+        self.assertEqual(df.values.tolist(), CompactTriples.from_df(df).to_labels().tolist())
+
+
+class TestSummary(unittest.TestCase):
+    """Tests for summarizing KEEN triples."""
+
+    def test_summary(self):
+        """Test the vectorized summary and the streaming summary on triples with known statistics."""
+        triples = [
+            ('HGNC:A', 'partOf', 'GO:X'),
+            ('HGNC:B', 'partOf', 'GO:X'),
+            ('HGNC:C', 'partOf', 'GO:X'),
+            ('HGNC:A', 'isA', 'FPLX:F'),
+            ('HGNC:A', 'isA', 'FPLX:G'),
+            ('HGNC:A', 'increasesAmountOf', 'HGNC:B'),
+            ('HGNC:A', 'increasesAmountOf', 'HGNC:C'),
+            ('HGNC:B', 'increasesAmountOf', 'HGNC:C'),
+            ('HGNC:C', 'increasesAmountOf', 'HGNC:B'),
+        ]
+        expected = {
+            'namespaces': {'HGNC': 13, 'GO': 3, 'FPLX': 2},
+            'entities': 6,
+            'relations': 9,
+            'predicates': {'increasesAmountOf': 4, 'isA': 2, 'partOf': 3},
+            'degrees': {1: 2, 3: 1, 4: 2, 5: 1},
+            'cardinalities': {'increasesAmountOf': 'N-1', 'isA': '1-N', 'partOf': 'N-1'},
+        }
+
+        summary = get_pykeen_summary(pd.DataFrame(triples, columns=['subject', 'predicate', 'object']))
+        self.assertEqual(expected, summary)
+        self.assertEqual(['HGNC', 'GO', 'FPLX'], list(summary['namespaces']))
+
+        compact = CompactTriples.from_labels(triples)
+        self.assertEqual(expected, get_pykeen_summary(compact))
+
+        # the vocabularies of a subset still have the labels no triple uses anymore
+        subset = compact.take(compact.triples[:, 1] == compact.relation_to_id['partOf'])
+        self.assertEqual(
+            get_pykeen_summary(pd.DataFrame(triples[:3], columns=['subject', 'predicate', 'object'])),
+            get_pykeen_summary(subset),
+        )
+
+        summarizer = TripleSummarizer()
+        for triple in triples:
+            summarizer.add(*triple)
+        summarizer.add('HGNC:D', 'isA', 'FPLX:F')
+        summarizer.remove('HGNC:D', 'isA', 'FPLX:F')
+        self.assertEqual(expected, summarizer.get_summary())
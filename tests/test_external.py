@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for sorting triples on disk."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from biokeen.convert import get_pykeen_summary, to_pykeen_df, to_pykeen_path
+from biokeen.convert.external import sort_pykeen_path
+from biokeen.testing import generate_bel_graph
+from pybel import BELGraph
+
+
+class TestExternalSort(unittest.TestCase):
+    """Tests for :func:`biokeen.convert.external.sort_pykeen_path`."""
+
+    def test_same_as_df(self):
+        """Test that spilling to many runs and merging them in several passes gives the same file as in memory."""
+        graph = generate_bel_graph(1000, seed=0)
+        df = to_pykeen_df(graph, use_tqdm=False)
+
+        with tempfile.TemporaryDirectory() as directory:
+            df_path = os.path.join(directory, 'df.keen.tsv')
+            to_pykeen_path(df, df_path)
+
+            sorted_path = os.path.join(directory, 'sorted.keen.tsv')
+            with mock.patch('biokeen.convert.external.MAX_RUNS_PER_MERGE', 4):
+                summary = sort_pykeen_path(graph, sorted_path, memory_limit=10_000, use_tqdm=False)
+
+            with open(df_path, 'rb') as file:
+                expected = file.read()
+            with open(sorted_path, 'rb') as file:
+                self.assertEqual(expected, file.read())
+
+            self.assertEqual(['df.keen.tsv', 'sorted.keen.tsv'], sorted(os.listdir(directory)))
+
+        self.assertEqual(get_pykeen_summary(df), summary)
+
+    def test_empty(self):
+        """Test that no file is left behind if there are no triples."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'empty.keen.tsv')
+            summary = sort_pykeen_path(BELGraph(), path, use_tqdm=False)
+            self.assertEqual([], os.listdir(directory))
+
+        self.assertEqual(0, summary['relations'])
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for filtering triples during conversion."""
+
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+
+import pandas as pd
+from click.testing import CliRunner
+
+from biokeen.cli import main
+from biokeen.convert import CompactTriples, TripleFilter, stream_pykeen_path, to_pykeen_df, to_pykeen_summary_path
+from biokeen.convert.converters import IsAConverter
+from biokeen.convert.dispatch import DEFAULT_CONVERTERS
+from biokeen.convert.external import sort_pykeen_path
+from biokeen.convert.filters import prune_k_core
+from biokeen.convert.instrumentation import InstrumentedDispatcher
+from biokeen.convert.unhandled import UnhandledEdges
+from biokeen.testing import generate_bel_graph
+from pybel import BELGraph
+from pybel.dsl import Abundance, Pathology
+
+
+def _get_namespace(labels: pd.Series) -> pd.Series:
+    return labels.str.split(':').str[0]
+
+
+def _prune_k_core(df: pd.DataFrame, k: int) -> pd.DataFrame:
+    """Prune a KEEN dataframe to its k-core the slow way."""
+    while True:
+        degrees = Counter(df['subject']) + Counter(df['object'])
+        keep = df['subject'].map(degrees).ge(k) & df['object'].map(degrees).ge(k)
+        if keep.all():
+            return df.reset_index(drop=True)
+        df = df[keep]
+
+
+class TestFilters(unittest.TestCase):
+    """Tests for :class:`biokeen.convert.filters.TripleFilter`."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Convert a random graph without any filters."""
+        cls.graph = generate_bel_graph(300, seed=0)
+        cls.df = to_pykeen_df(cls.graph, use_tqdm=False)
+
+    def assert_filtered(self, expected: pd.DataFrame, triple_filter: TripleFilter, n_jobs: int = 1):
+        """Assert that converting with the filter gives the same triples as filtering afterwards."""
+        df = to_pykeen_df(self.graph, use_tqdm=False, n_jobs=n_jobs, chunk_size=50, triple_filter=triple_filter)
+        self.assertLess(0, len(df))
+        self.assertLess(len(df), len(self.df))
+        pd.testing.assert_frame_equal(expected.reset_index(drop=True), df)
+
+    def test_namespaces(self):
+        """Test keeping only triples between entities in some namespaces."""
+        namespaces = {'HGNC', 'GO'}
+        expected = self.df[
+            _get_namespace(self.df['subject']).isin(namespaces) & _get_namespace(self.df['object']).isin(namespaces)
+        ]
+        self.assert_filtered(expected, TripleFilter(namespaces=namespaces))
+
+    def test_exclude_namespaces(self):
+        """Test dropping triples with an entity in some namespace."""
+        expected = self.df[
+            (_get_namespace(self.df['subject']) != 'CHEBI') & (_get_namespace(self.df['object']) != 'CHEBI')
+        ]
+        self.assert_filtered(expected, TripleFilter(exclude_namespaces=['CHEBI']))
+
+    def test_relations(self):
+        """Test keeping and dropping relations, also in worker processes."""
+        expected = self.df[self.df['predicate'].isin({'partOf', 'isA'})]
+        self.assert_filtered(expected, TripleFilter(relations=['partOf', 'isA']))
+        self.assert_filtered(expected, TripleFilter(relations=['partOf', 'isA']), n_jobs=2)
+
+        expected = self.df[self.df['predicate'] != 'partOf']
+        self.assert_filtered(expected, TripleFilter(exclude_relations=['partOf']))
+
+    def test_converters(self):
+        """Test that converters can be left out by name or by class."""
+        expected = self.df[self.df['predicate'] != 'isA']
+        self.assert_filtered(expected, TripleFilter(exclude_converters=['IsAConverter']))
+        self.assert_filtered(expected, TripleFilter(exclude_converters=[IsAConverter]), n_jobs=2)
+
+        expected = self.df[self.df['predicate'] == 'isA']
+        self.assert_filtered(expected, TripleFilter(converters=[IsAConverter]))
+
+    def test_converter_fall_through(self):
+        """Test that an edge an excluded converter matches is left unhandled instead of converted by a later one."""
+        graph = BELGraph()
+        graph.add_increases(Abundance('CHEBI', 'x'), Pathology('MESH', 'y'), citation='1', evidence='e')
+        self.assertEqual(
+            [['CHEBI:x', 'increases', 'MESH:y']],
+            to_pykeen_df(graph, use_tqdm=False).values.tolist(),
+        )
+
+        for n_jobs in (1, 2):
+            with self.subTest(n_jobs=n_jobs):
+                unhandled = UnhandledEdges()
+                df = to_pykeen_df(
+                    graph, use_tqdm=False, n_jobs=n_jobs, unhandled=unhandled,
+                    triple_filter=TripleFilter(exclude_converters=['DrugSideEffectConverter']),
+                )
+                self.assertEqual(0, len(df))
+                self.assertEqual(1, len(unhandled))
+
+    def test_instrumented(self):
+        """Test that the statistics of an instrumented dispatcher are collected when some converters are left out."""
+        for n_jobs in (1, 2):
+            with self.subTest(n_jobs=n_jobs):
+                dispatcher = InstrumentedDispatcher(DEFAULT_CONVERTERS)
+                to_pykeen_df(
+                    self.graph, use_tqdm=False, n_jobs=n_jobs, dispatcher=dispatcher,
+                    triple_filter=TripleFilter(exclude_converters=[IsAConverter]),
+                )
+                self.assertEqual(self.graph.number_of_edges(), dispatcher.stats.edges)
+                self.assertLess(0, dispatcher.stats.unhandled)
+
+    def test_unknown_converter(self):
+        """Test that a converter that doesn't exist is an error rather than a filter that does nothing."""
+        with self.assertRaises(ValueError):
+            to_pykeen_df(self.graph, use_tqdm=False, triple_filter=TripleFilter(converters=['NoSuchConverter']))
+
+    def test_k_core(self):
+        """Test that pruning to a k-core during conversion is the same as pruning afterwards."""
+        for k in (2, 3):
+            with self.subTest(k=k):
+                self.assert_filtered(_prune_k_core(self.df, k), TripleFilter(k_core=k))
+
+        relations = self.df[self.df['predicate'] != 'partOf']
+        self.assert_filtered(
+            _prune_k_core(relations, 2),
+            TripleFilter(exclude_relations=['partOf'], k_core=2),
+        )
+
+    def test_prune_k_core_vocabularies(self):
+        """Test that the entities and relations left without triples are dropped."""
+        triples = CompactTriples.from_labels([
+            ('A', 'r', 'B'),
+            ('B', 'r', 'C'),
+            ('C', 'r', 'A'),
+            ('C', 's', 'D'),
+        ])
+        pruned = prune_k_core(triples, 2)
+        self.assertEqual(['A', 'B', 'C'], pruned.entities.tolist())
+        self.assertEqual(['r'], pruned.relations.tolist())
+        self.assertEqual([['A', 'r', 'B'], ['B', 'r', 'C'], ['C', 'r', 'A']], pruned.to_labels().tolist())
+
+        self.assertEqual(0, len(prune_k_core(triples, 4)))
+
+    def test_negative_k_core(self):
+        """Test that a negative k-core is an error."""
+        with self.assertRaises(ValueError):
+            TripleFilter(k_core=-1)
+
+    def test_cli_streamed_k_core(self):
+        """Test that the command line refuses a k-core with streaming or sorting before it builds anything."""
+        runner = CliRunner()
+        with mock.patch('biokeen.content.iterate_install_bio2bel_modules') as iterate_install_bio2bel_modules:
+            for flag in ('--stream', '--external-sort'):
+                with self.subTest(flag=flag):
+                    result = runner.invoke(main, ['data', 'get', 'hippie', '--k-core', '2', flag])
+                    self.assertEqual(2, result.exit_code, msg=result.output)
+                    self.assertIn('--k-core', result.output)
+        iterate_install_bio2bel_modules.assert_not_called()
+
+    def test_json(self):
+        """Test that the specification only has what is filtered, and can be read back."""
+        self.assertFalse(TripleFilter())
+        self.assertFalse(TripleFilter(k_core=1))
+        self.assertEqual({}, TripleFilter().to_json())
+
+        triple_filter = TripleFilter(namespaces=['HGNC', 'GO'], exclude_converters=[IsAConverter], k_core=2)
+        self.assertTrue(triple_filter)
+        specification = {'namespaces': ['GO', 'HGNC'], 'exclude_converters': ['IsAConverter'], 'k_core': 2}
+        self.assertEqual(specification, triple_filter.to_json())
+        self.assertEqual(specification, TripleFilter.from_json(specification).to_json())
+
+    def test_summary(self):
+        """Test that the filter is recorded in the summaries written in memory, by streaming, and by sorting."""
+        triple_filter = TripleFilter(exclude_namespaces=['CHEBI'])
+        df = to_pykeen_df(self.graph, use_tqdm=False, triple_filter=triple_filter)
+
+        with tempfile.TemporaryDirectory() as directory:
+            summary_path = os.path.join(directory, 'df.keen.summary.json')
+            to_pykeen_summary_path(df, summary_path, triple_filter=triple_filter)
+            with open(summary_path) as file:
+                summary = json.load(file)
+            self.assertEqual({'exclude_namespaces': ['CHEBI']}, summary['filter'])
+            self.assertEqual(len(df), summary['relations'])
+
+            for function in (stream_pykeen_path, sort_pykeen_path):
+                with self.subTest(function=function.__name__):
+                    path = os.path.join(directory, f'{function.__name__}.keen.tsv')
+                    rv = function(self.graph, path, use_tqdm=False, triple_filter=triple_filter)
+                    self.assertEqual(summary, json.loads(json.dumps(rv)))
+
+    def test_streamed_k_core(self):
+        """Test that pruning to a k-core is refused when the triples are never all in memory."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.keen.tsv')
+            for function in (stream_pykeen_path, sort_pykeen_path):
+                with self.subTest(function=function.__name__), self.assertRaises(ValueError):
+                    function(self.graph, path, use_tqdm=False, triple_filter=TripleFilter(k_core=2))
+            self.assertEqual([], os.listdir(directory))
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the BEL graph cache formats."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from biokeen.convert import to_pykeen_df
+from biokeen.graph_cache import (
+    NODELINK_JSON, NODELINK_LINES_GZ, from_graph_cache_path, get_graph_cache_format, get_graph_cache_path,
+    to_graph_cache_path,
+)
+from pybel.constants import HAS_COMPONENT
+from pybel.dsl import ComplexAbundance, Protein
+from tests.test_convert import _make_graph
+
+
+def _make_complex_graph():
+    graph = _make_graph()
+    p1, p2 = Protein('HGNC', 'A'), Protein('HGNC', 'B C')
+    graph.add_qualified_edge(
+        ComplexAbundance([p1, p2]), p1, relation=HAS_COMPONENT, evidence='test', citation='1234',
+        annotations={'Species': '9606'},
+    )
+    return graph
+
+
+class TestGraphCache(unittest.TestCase):
+    """Tests for writing and reading cached BEL graphs."""
+
+    def test_roundtrip(self):
+        """Test that both formats give back the same graph and the format is detected from the file."""
+        graph = _make_complex_graph()
+        expected_df = to_pykeen_df(graph, use_tqdm=False)
+
+        with tempfile.TemporaryDirectory() as directory:
+            for fmt in (NODELINK_JSON, NODELINK_LINES_GZ):
+                with self.subTest(format=fmt):
+                    path = get_graph_cache_path(directory, 'test', fmt)
+                    to_graph_cache_path(graph, path, fmt)
+                    self.assertEqual(fmt, get_graph_cache_format(path))
+
+                    other = from_graph_cache_path(path)
+                    self.assertEqual(graph.number_of_nodes(), other.number_of_nodes())
+                    self.assertEqual(
+                        sorted(
+                            (u.as_bel(), v.as_bel(), key, json.dumps(data, sort_keys=True))
+                            for u, v, key, data in graph.edges(keys=True, data=True)
+                        ),
+                        sorted(
+                            (u.as_bel(), v.as_bel(), key, json.dumps(data, sort_keys=True))
+                            for u, v, key, data in other.edges(keys=True, data=True)
+                        ),
+                    )
+                    self.assertTrue(expected_df.equals(to_pykeen_df(other, use_tqdm=False)))
+
+            self.assertLess(
+                os.path.getsize(get_graph_cache_path(directory, 'test', NODELINK_LINES_GZ)),
+                os.path.getsize(get_graph_cache_path(directory, 'test', NODELINK_JSON)),
+            )
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""Tests that lightweight commands and plugin discovery don't import heavy dependencies."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from typing import Mapping, Optional, Set
+
+#: Packages that only the commands that build or train on data should import
+HEAVY_PACKAGES = {'bio2bel', 'numpy', 'pandas', 'pybel', 'pykeen', 'sqlalchemy'}
+
+
+def _get_imported_packages(code: str, env: Optional[Mapping[str, str]] = None) -> Set[str]:
+    """Run the code in a fresh interpreter and get the top-level packages it imported."""
+    code = f'{code}\nimport json, sys\nprint(json.dumps(sorted({{name.split(".")[0] for name in sys.modules}})))'
+    output = subprocess.check_output(
+        [sys.executable, '-c', code],
+        env={**os.environ, **(env or {})},
+        stderr=subprocess.DEVNULL,
+    )
+    return set(json.loads(output.decode('utf-8').strip().splitlines()[-1]))
+
+
+class TestImports(unittest.TestCase):
+    """Tests that importing BioKEEN is cheap."""
+
+    def test_cli(self):
+        """Test that importing the CLI, showing its help, and listing data don't import heavy dependencies."""
+        with tempfile.TemporaryDirectory() as directory:
+            # listing data rebuilds the index, which must not be written to the real data directory
+            env = {'BIOKEEN_DATA_DIRECTORY': directory}
+            for code in [
+                'import biokeen.cli',
+                'from biokeen.cli import main\nmain(["--help"], standalone_mode=False)',
+                'from biokeen.cli import main\nmain(["data", "ls"], standalone_mode=False)',
+            ]:
+                with self.subTest(code=code):
+                    self.assertFalse(HEAVY_PACKAGES & _get_imported_packages(code, env=env))
+            self.assertEqual(['index.json'], os.listdir(directory))
+
+        # the configuration isn't even loaded until it's used
+        self.assertNotIn('easy_config', _get_imported_packages('import biokeen.cli'))
+
+    def test_lazy_attributes(self):
+        """Test that the subpackages and the configuration class can still be reached the old ways."""
+        self.assertFalse(HEAVY_PACKAGES & _get_imported_packages('import biokeen'))
+        self.assertIn('pybel', _get_imported_packages('import biokeen\nbiokeen.convert.to_pykeen_df'))
+
+        from biokeen.config import BiokeenConfig
+        from biokeen.constants import BiokeenConfig as ReexportedBiokeenConfig
+        self.assertIs(BiokeenConfig, ReexportedBiokeenConfig)
+
+    def test_importers(self):
+        """Test that loading the importers for PyKEEN doesn't import heavy dependencies."""
+        imported = _get_imported_packages('from biokeen.importers import handle_bio2bel, handle_bel_commons')
+        self.assertFalse(HEAVY_PACKAGES & imported)
+
+    def test_lazy_config(self):
+        """Test that the configuration is only loaded and the data directory only created when they're used."""
+        with tempfile.TemporaryDirectory() as directory:
+            data_directory = os.path.join(directory, 'data')
+            env = {'BIOKEEN_DATA_DIRECTORY': data_directory}
+
+            _get_imported_packages('import biokeen.constants', env=env)
+            self.assertFalse(os.path.exists(data_directory))
+
+            _get_imported_packages(
+                'from biokeen.constants import biokeen_config\nbiokeen_config.data_directory', env=env,
+            )
+            self.assertTrue(os.path.exists(data_directory))
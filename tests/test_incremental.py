@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the incremental reconversion of BEL graphs."""
+
+import os
+import tempfile
+import unittest
+
+from biokeen.convert import get_pykeen_summary, to_pykeen_df, to_pykeen_path
+from biokeen.convert.incremental import iterate_edge_hashes, update_pykeen_path
+from tests.test_convert import _make_graph
+
+
+class TestIncremental(unittest.TestCase):
+    """Tests for updating a KEEN TSV with only the edges of a BEL graph that changed."""
+
+    def assert_same_as_full(self, graph, path, summary):
+        """Assert the KEEN TSV and summary are the same as from converting the whole graph."""
+        df = to_pykeen_df(graph, use_tqdm=False)
+        full_path = os.path.join(os.path.dirname(path), 'full.keen.tsv')
+        to_pykeen_path(df, full_path)
+
+        with open(full_path) as file:
+            expected = file.read()
+        with open(path) as file:
+            self.assertEqual(expected, file.read())
+
+        self.assertEqual(get_pykeen_summary(df), summary)
+
+    def test_update(self):
+        """Test that only added edges are converted and the removed triples are dropped."""
+        graph = _make_graph()
+        n_edges = len({edge_hash for edge_hash, *_ in iterate_edge_hashes(graph)})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'test.keen.tsv')
+            delta_path = os.path.join(directory, 'test.keen.delta.tsv')
+
+            delta = update_pykeen_path(graph, path, delta_path=delta_path, use_tqdm=False)
+            self.assertEqual(n_edges, delta.converted_edges)
+            self.assertEqual(delta.triples, delta.added)
+            self.assertEqual([], delta.removed)
+            self.assert_same_as_full(graph, path, delta.summary)
+
+            delta = update_pykeen_path(graph, path, use_tqdm=False)
+            before = set(delta.triples)
+            self.assertEqual(0, delta.converted_edges)
+            self.assertEqual([], delta.added)
+            self.assertEqual([], delta.removed)
+
+            edges = list(graph.edges(keys=True, data=True))
+            removed_u, removed_v, removed_key, _ = edges[0]
+            graph.remove_edge(removed_u, removed_v, removed_key)
+            added_u, added_v, _, added_data = edges[1]
+            graph.add_edge(added_v, added_u, key='new', **added_data)
+
+            delta = update_pykeen_path(graph, path, delta_path=delta_path, use_tqdm=False)
+            self.assertEqual(1, delta.converted_edges)
+            self.assert_same_as_full(graph, path, delta.summary)
+
+            with open(delta_path) as file:
+                lines = [line.rstrip('\n').split('\t') for line in file]
+
+        self.assertEqual(
+            [('-', *triple) for triple in delta.removed] + [('+', *triple) for triple in delta.added],
+            [tuple(line) for line in lines],
+        )
+        self.assertEqual(before - set(delta.triples), set(delta.removed))
+        self.assertEqual(set(delta.triples) - before, set(delta.added))
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the index of the data directory."""
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from click.testing import CliRunner
+
+from biokeen.cache import get_manifest_path
+from biokeen.cli import main
+from biokeen.constants import biokeen_config
+from biokeen.content import get_database_lock
+from biokeen.convert import get_columnar_path, get_sidecar_path, to_pykeen_df, to_pykeen_path, to_pykeen_summary_path
+from biokeen.convert.incremental import get_edges_path
+from biokeen.convert.instrumentation import get_stats_path
+from biokeen.convert.unhandled import get_unhandled_path
+from biokeen.graph_cache import NODELINK_LINES_GZ, get_graph_cache_path
+from biokeen.index import get_database_files, get_index_path, read_index, rebuild_index, update_index
+from tests.test_convert import _make_graph
+
+
+class TestIndex(unittest.TestCase):
+    """Tests for keeping the index of the data directory up to date."""
+
+    def setUp(self):
+        """Use a temporary data directory with a KEEN TSV and its summary."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.patch = mock.patch.object(biokeen_config, 'data_directory', self.directory.name)
+        self.patch.start()
+        self.df = to_pykeen_df(_make_graph(), use_tqdm=False)
+        self._write('test')
+
+    def tearDown(self):
+        """Remove the temporary data directory."""
+        self.patch.stop()
+        self.directory.cleanup()
+
+    def _write(self, name: str) -> None:
+        to_pykeen_path(self.df, os.path.join(self.directory.name, f'{name}.keen.tsv'))
+        to_pykeen_summary_path(self.df, os.path.join(self.directory.name, f'{name}.keen.summary.json'))
+
+    def test_update(self):
+        """Test that entries are added, updated, and removed, and that the index is rebuilt if it's missing."""
+        self.assertIsNone(read_index())
+        databases = update_index(['test'])
+        self.assertEqual(databases, read_index())
+        self.assertEqual({'test'}, set(databases))
+        entry = databases['test']
+        self.assertEqual('test.keen.tsv', entry['path'])
+        self.assertEqual(len(self.df.index), entry['triples'])
+        self.assertEqual({'tsv', 'summary'}, set(entry['files']))
+
+        self._write('other')
+        self.assertEqual({'test', 'other'}, set(update_index(['other'])))
+
+        os.remove(os.path.join(self.directory.name, 'test.keen.tsv'))
+        self.assertEqual({'other'}, set(update_index(['test'])))
+        self.assertEqual({'other'}, set(read_index()))
+
+        # only the index is left, since it's replaced atomically
+        self.assertEqual(
+            ['index.json', 'other.keen.summary.json', 'other.keen.tsv', 'test.keen.summary.json'],
+            sorted(os.listdir(self.directory.name)),
+        )
+
+        os.remove(get_index_path())
+        self.assertEqual({'other'}, set(update_index([])))
+
+    def test_database_files(self):
+        """Test that the files of every role are found, named the same way as where they're written."""
+        path = os.path.join(self.directory.name, 'test.keen.tsv')
+        expected = {
+            'tsv': path,
+            'sidecar': get_sidecar_path(path),
+            'edges': get_edges_path(path),
+            'unhandled': get_unhandled_path(path),
+            'stats': get_stats_path(path),
+            'parquet': get_columnar_path(path, 'parquet'),
+            'manifest': get_manifest_path(self.directory.name, 'test'),
+            'bel-lines': get_graph_cache_path(self.directory.name, 'test', NODELINK_LINES_GZ),
+        }
+        for role_path in expected.values():
+            open(role_path, 'a').close()
+        expected['summary'] = os.path.join(self.directory.name, 'test.keen.summary.json')
+
+        self.assertEqual(expected, get_database_files('test'))
+
+    def test_cli(self):
+        """Test that the data is listed from the index, and that clearing it removes all built data."""
+        rebuild_index()
+        runner = CliRunner()
+
+        # the index is used without scanning the data directory
+        with mock.patch('os.listdir', side_effect=AssertionError):
+            result = runner.invoke(main, ['data', 'ls'])
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        header, row = result.output.splitlines()
+        self.assertEqual(['name', 'triples', 'entities', 'relations', 'size'], header.split()[:5])
+        self.assertEqual(['test', str(len(self.df.index))], row.split()[:2])
+
+        result = runner.invoke(main, ['data', 'ls', '--paths'])
+        self.assertEqual(os.path.join(self.directory.name, 'test.keen.tsv'), result.output.strip())
+
+        for folder in ('splits', 'merged'):
+            os.makedirs(os.path.join(self.directory.name, folder))
+            open(os.path.join(self.directory.name, folder, 'test.cache'), 'w').close()
+        open(get_edges_path(os.path.join(self.directory.name, 'test.keen.tsv')), 'w').close()
+
+        # the database is only removed once the process building it releases its lock
+        lock = get_database_lock('test')
+        lock.acquire()
+        results = []
+        clearing = threading.Thread(target=lambda: results.append(runner.invoke(main, ['data', 'clear', '--yes'])))
+        clearing.start()
+        clearing.join(1.0)
+        self.assertTrue(clearing.is_alive())
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, 'test.keen.tsv')))
+
+        lock.release()
+        clearing.join()
+        self.assertEqual(0, results[0].exit_code, msg=results[0].output)
+        self.assertEqual({}, read_index())
+        self.assertEqual(['index.json'], os.listdir(self.directory.name))
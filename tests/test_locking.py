@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for locks and atomic writes in a shared data directory."""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from biokeen.locking import FileLock, LockTimeout, _get_signature, atomic_path
+
+
+def _hold(lock_path: str, log_path: str) -> None:
+    """Hold the lock for a moment, logging when it was acquired and released."""
+    with FileLock(lock_path, poll_interval=0.01):
+        with open(log_path, 'a') as file:
+            print('acquired', file=file, flush=True)
+        time.sleep(0.05)
+        with open(log_path, 'a') as file:
+            print('released', file=file, flush=True)
+
+
+class TestFileLock(unittest.TestCase):
+    """Tests for locks held by creating files."""
+
+    def setUp(self):
+        """Make a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.lock')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_exclusive(self):
+        """Test that processes holding the lock don't overlap, and that the lock file is removed afterwards."""
+        log_path = os.path.join(self.directory.name, 'log.txt')
+        processes = [multiprocessing.Process(target=_hold, args=(self.path, log_path)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        with open(log_path) as file:
+            self.assertEqual(['acquired', 'released'] * 4, file.read().split())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_stale(self):
+        """Test that a lock file nobody touches is broken."""
+        with open(self.path, 'w') as file:
+            json.dump({'host': 'elsewhere', 'pid': 0}, file)
+
+        with FileLock(self.path, stale_after=0.2, timeout=5, poll_interval=0.01):
+            with open(self.path) as file:
+                self.assertEqual(os.getpid(), json.load(file)['pid'])
+
+    def test_break_replaced(self):
+        """Test that a lock file replaced just before the stale one is broken is put back, not removed."""
+        with open(self.path, 'w') as file:
+            json.dump({'host': 'elsewhere', 'pid': 0}, file)
+        os.utime(self.path, ns=(0, 0))
+        stale = _get_signature(self.path)
+
+        # another waiter breaks the stale lock and takes it between the check and the rename
+        os.remove(self.path)
+        with open(self.path, 'w') as file:
+            json.dump({'host': 'elsewhere', 'pid': 1}, file)
+        with mock.patch('biokeen.locking._get_signature', side_effect=[stale, _get_signature(self.path)]):
+            FileLock(self.path)._break(stale)
+
+        with open(self.path) as file:
+            self.assertEqual(1, json.load(file)['pid'])
+        self.assertEqual(['test.lock'], os.listdir(self.directory.name))
+
+        # a waiter that saw the same stale lock file leaves it alone once it's gone
+        os.remove(self.path)
+        FileLock(self.path)._break(stale)
+        self.assertEqual([], os.listdir(self.directory.name))
+
+    def test_heartbeat(self):
+        """Test that a lock that's still held isn't broken, even after it would have gone stale."""
+        with FileLock(self.path, stale_after=0.2):
+            with self.assertRaises(LockTimeout):
+                FileLock(self.path, stale_after=0.2, timeout=1, poll_interval=0.01).acquire()
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestAtomicPath(unittest.TestCase):
+    """Tests for writing files atomically."""
+
+    def test_atomic(self):
+        """Test that the file is only replaced once it's written, and that no temporary files are left behind."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'test.keen.tsv')
+            with open(path, 'w') as file:
+                print('old', file=file)
+
+            with self.assertRaises(RuntimeError):
+                with atomic_path(path) as temporary_path, open(temporary_path, 'w') as file:
+                    print('new', file=file)
+                    raise RuntimeError
+            with open(path) as file:
+                self.assertEqual('old', file.read().strip())
+
+            with atomic_path(path) as temporary_path:
+                with open(temporary_path, 'w') as file:
+                    print('new', file=file)
+                with open(path) as file:
+                    self.assertEqual('old', file.read().strip())
+            with open(path) as file:
+                self.assertEqual('new', file.read().strip())
+
+            self.assertEqual(['test.keen.tsv'], os.listdir(directory))
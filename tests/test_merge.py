@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for merging several databases."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from biokeen.convert import to_pykeen_path
+from biokeen.merge import ensure_merged_pykeen_paths, merge_pykeen_paths
+
+TRIPLES_A = [
+    ('HGNC:A', 'increases', 'HGNC:B'),
+    ('HGNC:B', 'partOf', 'GO:X'),
+    ('HGNC:C', 'partOf', 'GO:X'),
+]
+TRIPLES_B = [
+    ('HGNC:B', 'partOf', 'GO:X'),
+]
+TRIPLES_C = [
+    ('CHEBI:1', 'decreases', 'MESHD:D'),
+    ('HGNC:B', 'partOf', 'GO:X'),
+]
+
+
+def _write(directory: str, name: str, triples) -> str:
+    path = os.path.join(directory, f'{name}.keen.tsv')
+    to_pykeen_path(pd.DataFrame(triples, columns=['subject', 'predicate', 'object']), path)
+    return path
+
+
+class TestMerge(unittest.TestCase):
+    """Tests for merging the KEEN TSVs of several databases."""
+
+    def setUp(self):
+        """Write the KEEN TSVs of three databases."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = {
+            'c': _write(self.directory.name, 'c', TRIPLES_C),
+            'a': _write(self.directory.name, 'a', TRIPLES_A),
+            'b': _write(self.directory.name, 'b', TRIPLES_B),
+        }
+
+    def tearDown(self):
+        """Remove the KEEN TSVs."""
+        self.directory.cleanup()
+
+    def test_merge(self):
+        """Test that the merged triples are deduplicated and sorted, and know where they came from."""
+        merged = merge_pykeen_paths(self.paths)
+        self.assertEqual(['a', 'b', 'c'], merged.databases)
+        self.assertEqual(
+            sorted(set(TRIPLES_A + TRIPLES_B + TRIPLES_C)),
+            [tuple(triple) for triple in merged.to_labels().tolist()],
+        )
+        self.assertEqual(sorted(merged.entities.tolist()), merged.entities.tolist())
+        self.assertEqual(len(set(merged.entities.tolist())), len(merged.entities))
+
+        shared = merged.to_labels().tolist().index(['HGNC:B', 'partOf', 'GO:X'])
+        self.assertEqual(0b111, merged.sources[shared])
+        self.assertEqual({'a': 3, 'b': 1, 'c': 2}, merged.get_database_counts())
+
+    def test_cache(self):
+        """Test that merging the same combination again uses the cache, unless one of the TSVs changed."""
+        with mock.patch('biokeen.merge.merge_pykeen_paths', wraps=merge_pykeen_paths) as merge:
+            expected = ensure_merged_pykeen_paths(self.paths, directory=self.directory.name)
+            self.assertEqual(1, merge.call_count)
+
+            merged = ensure_merged_pykeen_paths(self.paths, directory=self.directory.name)
+            self.assertEqual(1, merge.call_count)
+            self.assertEqual(expected.to_labels().tolist(), merged.to_labels().tolist())
+            self.assertEqual(expected.sources.tolist(), merged.sources.tolist())
+
+            ensure_merged_pykeen_paths({'a': self.paths['a'], 'b': self.paths['b']}, directory=self.directory.name)
+            self.assertEqual(2, merge.call_count)
+
+            _write(self.directory.name, 'b', TRIPLES_A)
+            ensure_merged_pykeen_paths(self.paths, directory=self.directory.name)
+            self.assertEqual(3, merge.call_count)
+
+    def test_long_label(self):
+        """Test that one long label doesn't make every label in the merged store as wide as it."""
+        long_label = 'complex(' + 'p(HGNC:A), ' * 200 + 'p(HGNC:Ä))'
+        _write(self.directory.name, 'c', TRIPLES_C + [(long_label, 'hasComponent', 'HGNC:A')])
+        merged = ensure_merged_pykeen_paths(self.paths, directory=self.directory.name)
+        self.assertIn(long_label, merged.entities.tolist())
+
+        path, = (
+            os.path.join(self.directory.name, name)
+            for name in os.listdir(self.directory.name)
+            if name.endswith('.merged.npz')
+        )
+        with np.load(path) as store:
+            self.assertNotIn('U', {store[key].dtype.kind for key in store.files if key != 'key'})
+        self.assertEqual(
+            merged.to_labels().tolist(),
+            ensure_merged_pykeen_paths(self.paths, directory=self.directory.name).to_labels().tolist(),
+        )
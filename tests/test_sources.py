@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for converting cached BEL graphs without building them."""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from typing import List, Tuple
+
+from biokeen.convert import to_pykeen_df
+from biokeen.convert.sources import (
+    NodeLinkJSONEdgeSource, NodeLinkLinesEdgeSource, _JSONReader, get_graph_cache_edge_source,
+)
+from biokeen.graph_cache import (
+    NODELINK_JSON, NODELINK_LINES_GZ, from_graph_cache_path, get_graph_cache_path, to_graph_cache_path,
+)
+from pybel import to_json
+from tests.test_convert import _make_graph
+from tests.test_graph_cache import _make_complex_graph
+
+
+def _get_edges(graph) -> List[Tuple[str, str, str, str]]:
+    return sorted(
+        (u.as_bel(), v.as_bel(), key, json.dumps(data, sort_keys=True))
+        for u, v, key, data in graph.edges(keys=True, data=True)
+    )
+
+
+class TestEdgeSources(unittest.TestCase):
+    """Tests for reading the edges of cached BEL graphs one at a time."""
+
+    def setUp(self):
+        """Make a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_graph_cache(self):
+        """Test that the edge sources give the same edges and triples as the graphs built from the same files."""
+        for make_graph in (_make_graph, _make_complex_graph):
+            graph = make_graph()
+            for fmt, cls in ((NODELINK_JSON, NodeLinkJSONEdgeSource), (NODELINK_LINES_GZ, NodeLinkLinesEdgeSource)):
+                with self.subTest(graph=make_graph.__name__, format=fmt):
+                    path = get_graph_cache_path(self.directory.name, make_graph.__name__, fmt)
+                    to_graph_cache_path(graph, path, fmt)
+                    expected = from_graph_cache_path(path)
+
+                    source = get_graph_cache_edge_source(path)
+                    self.assertIsInstance(source, cls)
+                    self.assertEqual(_get_edges(expected), _get_edges(source))
+
+                    expected_df = to_pykeen_df(expected, use_tqdm=False)
+                    self.assertTrue(expected_df.equals(to_pykeen_df(source, use_tqdm=False)))
+                    self.assertTrue(expected_df.equals(to_pykeen_df(source, use_tqdm=False, n_jobs=2)))
+
+    def test_small_chunks(self):
+        """Test reading Node-Link JSON a few characters at a time, and with the links before the nodes."""
+        graph = _make_complex_graph()
+        expected = _get_edges(graph)
+        graph_json = to_json(graph)
+
+        path = os.path.join(self.directory.name, 'test.bel.json')
+        with open(path, 'w') as file:
+            json.dump(graph_json, file, indent=2)
+        for chunk_size in (1, 7, 64):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(expected, _get_edges(NodeLinkJSONEdgeSource(path, chunk_size=chunk_size)))
+
+        with open(path, 'w') as file:
+            json.dump({'links': graph_json['links'], **graph_json}, file)
+        self.assertEqual(expected, _get_edges(NodeLinkJSONEdgeSource(path, chunk_size=7)))
+
+    def test_reader(self):
+        """Test that values split across chunks, like numbers, are decoded whole."""
+        document = {'a': 12345, 'b': [1.5, 'x y', {'c': None}, [], {}], 'd': True, 'e': -987654321}
+        reader = _JSONReader(io.StringIO(json.dumps(document, indent=1)), chunk_size=2)
+        rv = {}
+        for key in reader.iterate_object():
+            rv[key] = list(reader.iterate_array()) if key == 'b' else reader.decode()
+        self.assertEqual(document, rv)
+        self.assertEqual('', reader.peek())
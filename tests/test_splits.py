@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for splitting triples into training, validation, and test sets."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from biokeen.constants import biokeen_config
+from biokeen.convert import CompactTriples, load_pykeen_triples, to_pykeen_path
+from biokeen.splits import SPLITS, TEST, TRAIN, VALIDATION, ensure_split_paths, split_triples
+
+
+def _make_triples(seed: int = 0) -> CompactTriples:
+    """Make random triples over a few relations, with some of them repeated with another relation or inverted."""
+    random_state = np.random.RandomState(seed)
+    triples = np.stack([
+        random_state.randint(300, size=3000),
+        random_state.choice(4, size=3000, p=[0.55, 0.25, 0.15, 0.05]),
+        random_state.randint(300, size=3000),
+    ], axis=1)
+    inverses = triples[:500, ::-1].copy()
+    inverses[:, 1] = 4
+    triples = np.concatenate([triples, inverses])
+    return CompactTriples.from_labels(np.stack([
+        np.char.add('HGNC:', triples[:, 0].astype(str)),
+        np.char.add('r', triples[:, 1].astype(str)),
+        np.char.add('HGNC:', triples[:, 2].astype(str)),
+    ], axis=1))
+
+
+def _get_pairs(triples: CompactTriples):
+    return set(map(frozenset, triples.triples[:, [0, 2]].tolist()))
+
+
+class TestSplitTriples(unittest.TestCase):
+    """Tests for :func:`biokeen.splits.split_triples`."""
+
+    def setUp(self):
+        """Make random triples and split them."""
+        self.triples = _make_triples()
+        self.splits = split_triples(self.triples, test_ratio=0.1, validation_ratio=0.1, seed=0)
+
+    def test_partition(self):
+        """Test that each triple is in exactly one split."""
+        self.assertEqual(SPLITS, list(self.splits))
+        self.assertEqual(len(self.triples), sum(map(len, self.splits.values())))
+        together = np.concatenate([split.triples for split in self.splits.values()])
+        self.assertEqual(len(self.triples), len(np.unique(together, axis=0)))
+
+    def test_seed(self):
+        """Test that the same seed gives the same split and another seed gives another one."""
+        again = split_triples(self.triples, test_ratio=0.1, validation_ratio=0.1, seed=0)
+        for name in SPLITS:
+            np.testing.assert_array_equal(self.splits[name].triples, again[name].triples)
+
+        other = split_triples(self.triples, test_ratio=0.1, validation_ratio=0.1, seed=1)
+        self.assertFalse(np.array_equal(self.splits[TEST].triples, other[TEST].triples))
+
+    def test_no_leaks(self):
+        """Test that no pair of entities is in two splits and the held-out entities and relations are trained on."""
+        pairs = {name: _get_pairs(split) for name, split in self.splits.items()}
+        self.assertFalse(pairs[TRAIN] & pairs[VALIDATION])
+        self.assertFalse(pairs[TRAIN] & pairs[TEST])
+        self.assertFalse(pairs[VALIDATION] & pairs[TEST])
+
+        training = self.splits[TRAIN].triples
+        for name in (VALIDATION, TEST):
+            held_out = self.splits[name].triples
+            self.assertTrue(np.isin(held_out[:, [0, 2]], training[:, [0, 2]]).all())
+            self.assertTrue(np.isin(held_out[:, 1], training[:, 1]).all())
+
+    def test_stratified(self):
+        """Test that each relation is held out in about the right proportion."""
+        relations = self.triples.triples[:, 1]
+        for relation in range(len(self.triples.relations)):
+            total = (relations == relation).sum()
+            for name in (VALIDATION, TEST):
+                with self.subTest(relation=self.triples.relations[relation], split=name):
+                    held_out = (self.splits[name].triples[:, 1] == relation).sum()
+                    self.assertAlmostEqual(0.1, held_out / total, delta=0.05)
+
+    def test_small(self):
+        """Test that a relation with a single pair of entities is never held out, and empty triples can be split."""
+        triples = CompactTriples.from_labels([('A', 'r', 'B'), ('B', 's', 'A')])
+        splits = split_triples(triples, test_ratio=0.5)
+        self.assertEqual(2, len(splits[TRAIN]))
+
+        splits = split_triples(CompactTriples.from_labels([]))
+        self.assertEqual([0, 0, 0], [len(splits[name]) for name in SPLITS])
+
+    def test_invalid_ratios(self):
+        """Test that ratios that leave nothing for training are an error."""
+        for test_ratio, validation_ratio in [(-0.1, 0.1), (0.5, 0.5), (1.0, 0.0)]:
+            with self.subTest(test_ratio=test_ratio, validation_ratio=validation_ratio), self.assertRaises(ValueError):
+                split_triples(self.triples, test_ratio=test_ratio, validation_ratio=validation_ratio)
+
+
+class TestEnsureSplitPaths(unittest.TestCase):
+    """Tests for caching splits with :func:`biokeen.splits.ensure_split_paths`."""
+
+    def setUp(self):
+        """Use a temporary data directory with two KEEN TSVs."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.patch = mock.patch.object(biokeen_config, 'data_directory', self.directory.name)
+        self.patch.start()
+        self.paths = {}
+        for seed, name in enumerate(['a', 'b']):
+            self.paths[name] = os.path.join(self.directory.name, f'{name}.keen.tsv')
+            to_pykeen_path(_make_triples(seed), self.paths[name])
+
+    def tearDown(self):
+        """Remove the temporary data directory."""
+        self.patch.stop()
+        self.directory.cleanup()
+
+    def _ensure(self, paths, **kwargs):
+        with mock.patch('biokeen.splits.split_triples', wraps=split_triples) as wrapped:
+            split_paths = ensure_split_paths(paths, **kwargs)
+        self.split = wrapped.called
+        return split_paths
+
+    def test_cache(self):
+        """Test that a split is only made once for the same databases, ratios, and seed."""
+        paths = {'a': self.paths['a']}
+        split_paths = self._ensure(paths, test_ratio=0.2)
+        self.assertTrue(self.split)
+        self.assertEqual(SPLITS, list(split_paths))
+        self.assertEqual(len(load_pykeen_triples(self.paths['a'])), sum(
+            len(load_pykeen_triples(path)) for path in split_paths.values() if os.path.getsize(path)
+        ))
+        self.assertEqual(0, os.path.getsize(split_paths[VALIDATION]))
+
+        with open(split_paths[TRAIN].replace(f'.{TRAIN}.keen.tsv', '.split.json')) as file:
+            description = json.load(file)
+        self.assertEqual(['a'], description['databases'])
+        self.assertEqual(len(load_pykeen_triples(split_paths[TEST])), description['triples'][TEST])
+
+        self.assertEqual(split_paths, self._ensure(paths, test_ratio=0.2))
+        self.assertFalse(self.split)
+
+        self.assertNotEqual(split_paths, self._ensure(paths, test_ratio=0.2, seed=1))
+        self.assertTrue(self.split)
+
+        # rewriting the KEEN TSV makes a new split
+        os.utime(self.paths['a'], ns=(0, 0))
+        self.assertNotEqual(split_paths, self._ensure(paths, test_ratio=0.2))
+        self.assertTrue(self.split)
+
+    def test_merged(self):
+        """Test that several databases are merged before they're split."""
+        split_paths = self._ensure(self.paths, validation_ratio=0.1)
+        splits = {name: load_pykeen_triples(path) for name, path in split_paths.items()}
+        merged = {
+            tuple(triple)
+            for path in self.paths.values()
+            for triple in load_pykeen_triples(path).to_labels().tolist()
+        }
+        self.assertEqual(merged, {
+            tuple(triple)
+            for split in splits.values()
+            for triple in split.to_labels().tolist()
+        })
+        self.assertEqual(len(merged), sum(map(len, splits.values())))
+        self.assertTrue(os.path.basename(split_paths[TRAIN]).startswith('a+b.'))
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the synthetic BEL graph generator."""
+
+import unittest
+
+from biokeen.convert.dispatch import default_dispatcher
+from biokeen.convert.incremental import iterate_edge_hashes
+from biokeen.testing import generate_bel_graph
+
+
+class TestGenerate(unittest.TestCase):
+    """Tests for generating synthetic BEL graphs."""
+
+    def test_seed(self):
+        """Test that the same seed gives the same graph, and another seed a different one."""
+        def get_hashes(seed):
+            return [edge_hash for edge_hash, *_ in iterate_edge_hashes(generate_bel_graph(500, seed=seed))]
+
+        hashes = get_hashes(1)
+        self.assertEqual(hashes, get_hashes(1))
+        self.assertNotEqual(hashes, get_hashes(2))
+
+    def test_mix(self):
+        """Test that the graph exercises every converter, and has some edges that no converter handles."""
+        graph = generate_bel_graph(2000, seed=0)
+        converters = [
+            default_dispatcher.get_converter(u, v, key, data)
+            for u, v, key, data in graph.edges(keys=True, data=True)
+        ]
+        self.assertIn(None, converters)
+        self.assertEqual(set(default_dispatcher.converters), set(converters) - {None})